@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark disk usage and write time of .txt files vs. the compressed archive.
+
+Simulates several crawl runs over the same site: every run saves the same
+articles again (plus a few that changed), and some articles are reachable
+from more than one listing page. Storage modes:
+
+* ``txt``          - one Page_N/<title>.txt per article, as stage4/stage5 do
+* ``archive-gzip`` - ``scraper.archive.Archive`` with gzip blobs
+* ``archive-zstd`` - the same with zstd (needs ``zstandard``)
+
+Usage:
+    python benchmarks/bench_archive.py [--articles 500] [--runs 5] [--duplicates 0.2]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from stage5 import stage5
+from scraper import archive as archive_module
+from scraper.archive import Archive
+
+
+def make_articles(count, duplicates, seed=1):
+    rng = random.Random(seed)
+    with open(os.path.join(ROOT, 'stage3', 'source.html'), encoding='utf-8') as file:
+        words = file.read().split()
+    articles = []
+    for i in range(count):
+        if articles and rng.random() < duplicates:
+            # the same article listed again on another page
+            url, text = rng.choice(articles)[1:]
+        else:
+            url = f"https://www.nature.com/articles/a{i}"
+            text = "\n".join(" ".join(rng.choices(words, k=40)) for _ in range(8))
+        articles.append((1 + i // 20, url, text))
+    return articles
+
+
+def disk_usage(path):
+    return sum(os.path.getsize(os.path.join(folder, name))
+               for folder, _, names in os.walk(path) for name in names)
+
+
+def run(mode, articles, runs, workdir):
+    start = time.perf_counter()
+    for run_number in range(runs):
+        # a few articles get updated between runs
+        changed = {url for _, url, _ in articles[run_number::50]}
+        if mode == 'txt':
+            for page, url, text in articles:
+                text = text + f"\nUpdate {run_number}" if url in changed else text
+                folder_name = os.path.join(workdir, f"Page_{page}")
+                os.makedirs(folder_name, exist_ok=True)
+                stage5.save_article(url.rsplit('/', 1)[1] + ".txt", text, folder_name)
+        else:
+            with Archive(workdir, codec=mode.split('-')[1]) as archive:
+                for page, url, text in articles:
+                    text = text + f"\nUpdate {run_number}" if url in changed else text
+                    archive.put(url, text, page=page)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--articles', type=int, default=500)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--duplicates', type=float, default=0.2,
+                        help="share of links that point at an already listed article")
+    args = parser.parse_args()
+
+    articles = make_articles(args.articles, args.duplicates)
+    text_bytes = sum(len(text.encode('utf-8')) for _, _, text in articles)
+    modes = ['txt', 'archive-gzip'] + (['archive-zstd'] if archive_module.zstandard else [])
+    print(f"{args.articles} articles ({text_bytes // 1024} KiB of text) x {args.runs} runs")
+    print(f"{'mode':<13} | {'seconds':>8} | {'on disk KiB':>11} | {'files':>6}")
+    print('-' * 48)
+    for mode in modes:
+        with tempfile.TemporaryDirectory() as workdir:
+            seconds = run(mode, articles, args.runs, workdir)
+            files = sum(len(names) for _, _, names in os.walk(workdir))
+            print(f"{mode:<13} | {seconds:>8.2f} | {disk_usage(workdir) // 1024:>11} | {files:>6}")
+    if not archive_module.zstandard:
+        print("(zstandard is not installed; archive-zstd skipped)")
+
+
+if __name__ == '__main__':
+    main()
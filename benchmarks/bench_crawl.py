@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+End-to-end crawl benchmark against a local Nature.com stand-in site.
+
+Serves a ``scraper.synthetic_site.SyntheticSite`` from ``LocalServer``
+(optionally with per-response latency and a bandwidth cap) and runs the
+real crawl code against it, without rate limiting:
+
+* ``stage4``         - ``stage4.main()``: listing page 3 and its News articles
+* ``stage5``         - ``stage5.crawl_serially``
+* ``stage5-threads`` - ``stage5.crawl_concurrently`` with --workers threads
+* ``stage5-async``   - ``stage5.crawl``, the asyncio engine (requires aiohttp)
+
+Every run happens in a fresh process, so its CPU time (parse workers
+included) and peak memory are its own. Reported per mode (median of
+--repeat runs): pages/s (listing and article requests), articles/s,
+p50/p99 fetch latency, CPU seconds and peak RSS. Results are appended as
+JSON lines to --results with the git commit and compared with the last
+earlier result of the same configuration, so regressions show up between
+commits.
+
+Usage:
+    python benchmarks/bench_crawl.py [--modes stage4,stage5,stage5-threads] [--pages 5]
+        [--articles-per-page 20] [--latency-ms 20] [--bandwidth-kbps 2000] [--workers 8]
+        [--parse-workers 0] [--repeat 3] [--results benchmarks/results/crawl.jsonl]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from scraper import http_client, metrics, parsing
+from scraper.local_server import LocalServer
+from scraper.synthetic_site import LISTING_PATH, SyntheticSite
+
+MODES = ('stage4', 'stage5', 'stage5-threads', 'stage5-async')
+DEFAULT_RESULTS = os.path.join(ROOT, 'benchmarks', 'results', 'crawl.jsonl')
+# 10% apart from 0.1 ms to a minute, fine enough for p50/p99
+LATENCY_BUCKETS = tuple(0.0001 * 1.1 ** k for k in range(141))
+COMPARED = (('pages_per_s', 'pages/s', True), ('p50_ms', 'p50 ms', False), ('p99_ms', 'p99 ms', False),
+            ('cpu_s', 'CPU s', False), ('peak_rss_mib', 'RSS MiB', False))
+
+
+def crawl(mode, base_url, pages, workers, parse_workers):
+    # Imported here, in the benchmark process, after the parser is selected
+    if mode == 'stage4':
+        from stage4 import stage4
+        stage4.BASE_URL = base_url
+        stage4.TARGET_URL = f"{base_url}{LISTING_PATH}{stage4.TARGET_PAGE}"
+        with contextlib.redirect_stdout(io.StringIO()):
+            stage4.main()
+        return
+    from stage5 import stage5
+    stage5.BASE_URL = base_url
+    stage5.TARGET_URL = base_url + LISTING_PATH
+    if mode == 'stage5':
+        stage5.crawl_serially(pages, "News")
+    elif mode == 'stage5-threads':
+        stage5.crawl_concurrently(pages, "News", workers=workers, per_host=workers,
+                                  parse_workers=parse_workers)
+    else:
+        asyncio.run(stage5.crawl(pages, "News", workers=workers, per_host=workers,
+                                 parse_workers=parse_workers))
+
+
+def peak_rss_mib(usage):
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return usage.ru_maxrss / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10)
+
+
+def run_once(mode, base_url, pages, workers, parse_workers, parser):
+    """One crawl in this (fresh) process; returns its measurements."""
+    parsing.set_backend(parser)
+    registry = metrics.Metrics(buckets=LATENCY_BUCKETS)
+    metrics.set_metrics(registry)
+    http_client.set_client(http_client.HttpClient())
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        before = [resource.getrusage(who) for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)]
+        start = time.perf_counter()
+        crawl(mode, base_url, pages, workers, parse_workers)
+        seconds = time.perf_counter() - start
+        after = [resource.getrusage(who) for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)]
+        os.chdir(ROOT)
+
+    fetch = registry.phases['fetch']
+    articles = registry.phases['save'].count if 'save' in registry.phases else 0
+    return {
+        'seconds': seconds,
+        'requests': fetch.count,
+        'articles': articles,
+        'pages_per_s': fetch.count / seconds,
+        'articles_per_s': articles / seconds,
+        'p50_ms': fetch.quantile(0.5) * 1000,
+        'p99_ms': fetch.quantile(0.99) * 1000,
+        'mib_per_s': fetch.bytes / seconds / 2 ** 20,
+        'cpu_s': sum(end.ru_utime + end.ru_stime - begin.ru_utime - begin.ru_stime
+                     for begin, end in zip(before, after)),
+        'peak_rss_mib': max(peak_rss_mib(usage) for usage in after),
+    }
+
+
+def run_fresh(*args):
+    # spawn: no memory or imported state inherited from this process
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+        return executor.submit(run_once, *args).result()
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ('-dirty' if dirty else '')
+
+
+def load_results(path):
+    try:
+        with open(path, encoding='utf-8') as file:
+            return [json.loads(line) for line in file if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def compare(result, previous):
+    changes = []
+    for key, label, higher_is_better in COMPARED:
+        old, new = previous['results'][key], result[key]
+        if old:
+            change = (new - old) / old * 100
+            worse = change < 0 if higher_is_better else change > 0
+            changes.append(f"{label} {change:+.0f}%{' (worse)' if worse and abs(change) >= 5 else ''}")
+    return f"  vs {previous['commit']}: " + ', '.join(changes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--modes', default='stage4,stage5,stage5-threads',
+                        help=f"comma separated, from {', '.join(MODES)}")
+    parser.add_argument('--pages', type=int, default=5, help="listing pages of the site")
+    parser.add_argument('--articles-per-page', type=int, default=20)
+    parser.add_argument('--paragraphs', type=int, default=12, help="paragraphs per article")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="server delay per response")
+    parser.add_argument('--bandwidth-kbps', type=float, default=0.0,
+                        help="body transfer rate per response in KiB/s (0: unlimited)")
+    parser.add_argument('--workers', type=int, default=8, help="fetchers of the concurrent modes")
+    parser.add_argument('--parse-workers', type=int, default=0)
+    parser.add_argument('--parser', choices=parsing.BACKENDS, default=parsing.get_backend())
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--results', default=DEFAULT_RESULTS,
+                        help="JSON Lines file the results are appended to and compared against")
+    args = parser.parse_args()
+    modes = args.modes.split(',')
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+    if 'stage4' in modes and args.pages < 3:
+        parser.error("stage4 crawls listing page 3; use --pages 3 or more")
+
+    site = SyntheticSite(pages=args.pages, articles_per_page=args.articles_per_page,
+                         paragraphs=args.paragraphs)
+    previous_results = load_results(args.results)
+    commit = git_commit()
+    print(f"{args.pages} listing pages, {len(site.news)} News articles, "
+          f"{site.size() / 2 ** 20:.1f} MiB, latency {args.latency_ms:g} ms, "
+          f"bandwidth {f'{args.bandwidth_kbps:g} KiB/s' if args.bandwidth_kbps else 'unlimited'}, "
+          f"parser {args.parser}, commit {commit}")
+    print(f"{'mode':<15} | {'pages/s':>8} | {'articles/s':>10} | {'p50 ms':>7} | {'p99 ms':>7} | "
+          f"{'CPU s':>6} | {'RSS MiB':>7}")
+    print('-' * 80)
+
+    new_results = []
+    with LocalServer(site.routes(), latency=args.latency_ms / 1000,
+                     bandwidth=args.bandwidth_kbps * 1024 or None) as server:
+        for mode in modes:
+            if mode == 'stage5-async':
+                from scraper.async_client import aiohttp
+                if aiohttp is None:
+                    print(f"{mode:<15} | skipped: aiohttp is not installed")
+                    continue
+            runs = [run_fresh(mode, server.base_url, args.pages, args.workers, args.parse_workers,
+                              args.parser)
+                    for _ in range(args.repeat)]
+            result = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+            print(f"{mode:<15} | {result['pages_per_s']:>8.1f} | {result['articles_per_s']:>10.1f} | "
+                  f"{result['p50_ms']:>7.1f} | {result['p99_ms']:>7.1f} | {result['cpu_s']:>6.2f} | "
+                  f"{result['peak_rss_mib']:>7.1f}")
+
+            config = {'mode': mode, 'pages': args.pages, 'articles_per_page': args.articles_per_page,
+                      'paragraphs': args.paragraphs, 'latency_ms': args.latency_ms,
+                      'bandwidth_kbps': args.bandwidth_kbps, 'workers': args.workers,
+                      'parse_workers': args.parse_workers, 'parser': args.parser}
+            earlier = [record for record in previous_results if record['config'] == config]
+            if earlier:
+                print(compare(result, earlier[-1]))
+            new_results.append({'commit': commit, 'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                                'python': sys.version.split()[0], 'config': config, 'results': result})
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.results)), exist_ok=True)
+    with open(args.results, 'a', encoding='utf-8') as file:
+        for record in new_results:
+            file.write(json.dumps(record) + '\n')
+    print(f"Results appended to {args.results}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark peak memory of in-memory vs. streaming downloads.
+
+A local stand-in server serves a large binary fixture. Each download runs in
+a fresh subprocess so its peak RSS (ru_maxrss) can be measured in isolation:
+
+* ``baseline``  - imports only, no download
+* ``in-memory`` - what stage3 used to do: ``response.content`` then one write
+* ``streaming`` - ``scraper.download.download`` with chunked writes
+
+Usage:
+    python benchmarks/bench_download.py [--size-mb 128] [--chunk-kb 64]
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraper import http_client
+from scraper.download import download
+from scraper.local_server import LocalServer
+
+MODES = ('baseline', 'in-memory', 'streaming')
+
+
+def peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def child(mode, url, path, chunk_size):
+    start = time.perf_counter()
+    if mode == 'in-memory':
+        response = http_client.get(url)
+        with open(path, 'wb') as file:
+            file.write(response.content)
+    elif mode == 'streaming':
+        download(url, path, chunk_size=chunk_size)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({'seconds': elapsed, 'peak_rss': peak_rss_bytes()}))
+
+
+def run_child(mode, url, path, chunk_size):
+    output = subprocess.check_output(
+        [sys.executable, os.path.abspath(__file__), '--child', mode, url, path, str(chunk_size)])
+    return json.loads(output)
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        mode, url, path, chunk_size = sys.argv[2:6]
+        child(mode, url, path, int(chunk_size))
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--size-mb', type=int, default=128)
+    parser.add_argument('--chunk-kb', type=int, default=64)
+    args = parser.parse_args()
+
+    body = os.urandom(1024 * 1024) * args.size_mb
+    with LocalServer({'/large.bin': (200, {'Content-Type': 'application/octet-stream'}, body)}) as server, \
+            tempfile.TemporaryDirectory() as tempdir:
+        url = server.url('/large.bin')
+        print(f"{'mode':<10} | {'seconds':>8} | {'peak RSS MiB':>12} | {'above baseline':>14}")
+        print('-' * 54)
+        baseline = None
+        for mode in MODES:
+            path = os.path.join(tempdir, mode + '.bin')
+            result = run_child(mode, url, path, args.chunk_kb * 1024)
+            baseline = result['peak_rss'] if baseline is None else baseline
+            if mode != 'baseline' and os.path.getsize(path) != len(body):
+                raise SystemExit(f"{mode}: downloaded {os.path.getsize(path)} of {len(body)} bytes")
+            print(f"{mode:<10} | {result['seconds']:>8.2f} | {result['peak_rss'] / 2 ** 20:>12.1f} | "
+                  f"{(result['peak_rss'] - baseline) / 2 ** 20:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark head-only fetches against full downloads for metadata lookups.
+
+A local stand-in server serves article pages with a small <head> and a
+large body. Each page is looked up N times with both approaches, extracting
+the title and description as stage2 does:
+
+* ``full``      - ``http_client.get`` downloads the whole body
+* ``head-only`` - ``http_client.get_head`` stops reading after ``</head>``
+
+Reports body bytes read, mean and p95 latency, and the connections opened
+(a head-only fetch that stops early can't return its connection to the pool).
+
+Usage:
+    python benchmarks/bench_head_fetch.py [--requests 50] [--body-kb 2048]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from stage2 import stage2
+from scraper import http_client
+from scraper.local_server import LocalServer
+
+
+def article_page(body_kb):
+    head = ('<html><head><meta charset="utf-8"><title>Large article | Nature</title>'
+            '<meta name="description" content="A page with a very long body"></head>')
+    paragraph = "<p>Lorem ipsum dolor sit amet, consectetur adipiscing elit.</p>"
+    return head + "<body>" + paragraph * (body_kb * 1024 // len(paragraph)) + "</body></html>"
+
+
+def run(label, fetch, server, count):
+    server.reset_counters()
+    latencies, bytes_read = [], 0
+    for _ in range(count):
+        start = time.perf_counter()
+        response = fetch(server.url('/article'))
+        metadata = stage2.parse_metadata(response.content)
+        latencies.append(time.perf_counter() - start)
+        bytes_read += getattr(response, 'bytes_read', len(response.content))
+    assert metadata['title'] == "Large article | Nature"
+    p95 = sorted(latencies)[int(len(latencies) * 0.95) - 1]
+    print(f"{label:<10} | {bytes_read / count / 1024:>12.1f} | {statistics.mean(latencies) * 1000:>8.2f} | "
+          f"{p95 * 1000:>8.2f} | {server.connections:>11}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--body-kb', type=int, default=2048)
+    args = parser.parse_args()
+
+    with LocalServer({'/article': article_page(args.body_kb)}) as server:
+        print(f"{'mode':<10} | {'KiB read/req':>12} | {'mean ms':>8} | {'p95 ms':>8} | {'connections':>11}")
+        print('-' * 62)
+        with http_client.HttpClient() as client:
+            run('full', client.get, server, args.requests)
+        with http_client.HttpClient() as client:
+            run('head-only', client.get_head, server, args.requests)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark the pooled HTTP client against bare requests.get.
+
+A local stand-in server serves an article-sized page with a small artificial
+delay on every new connection (simulating the TCP/TLS handshake to a remote
+host). The script fetches the same page N times with both approaches and
+reports wall-clock time and the number of connections the server accepted.
+
+Usage:
+    python benchmarks/bench_http_client.py [--requests 200] [--handshake-ms 20]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import requests
+from scraper import http_client
+from scraper.local_server import LocalServer
+
+PAGE = "<html><body>" + "<p>Lorem ipsum dolor sit amet.</p>" * 500 + "</body></html>"
+
+
+class HandshakeServer(LocalServer):
+    """Local server that charges a fixed delay for each new connection."""
+
+    def __init__(self, routes, handshake_delay):
+        super().__init__(routes)
+        self.handshake_delay = handshake_delay
+
+    def _count_connection(self):
+        super()._count_connection()
+        time.sleep(self.handshake_delay)
+
+
+def run(label, fetch, url, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        fetch(url).raise_for_status()
+    elapsed = time.perf_counter() - start
+    return label, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--handshake-ms', type=float, default=20.0)
+    args = parser.parse_args()
+
+    with HandshakeServer({'/article': PAGE}, args.handshake_ms / 1000) as server:
+        url = server.url('/article')
+        results = []
+
+        server.reset_counters()
+        results.append(run('requests.get', lambda u: requests.get(u, timeout=30),
+                           url, args.requests) + (server.connections,))
+
+        server.reset_counters()
+        with http_client.HttpClient() as client:
+            results.append(run('HttpClient.get', client.get, url, args.requests)
+                           + (server.connections,))
+
+    print(f"{'client':<16} | {'requests':>8} | {'seconds':>8} | {'req/s':>8} | {'connections':>11}")
+    print('-' * 63)
+    for label, elapsed, connections in results:
+        print(f"{label:<16} | {args.requests:>8} | {elapsed:>8.3f} | "
+              f"{args.requests / elapsed:>8.1f} | {connections:>11}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark the import time of the scraper package and the stages.
+
+Every import runs in a fresh ``python -X importtime`` interpreter, which is
+what CLI startup and each spawned parse-pool worker pay. Reported per
+module (median of --repeat runs): wall-clock import time, the heavy
+third-party packages the import pulled in (none, since they load lazily on
+first use; see scraper/lazy.py) and, with --top N, the slowest imports
+below it according to ``-X importtime``. The last row imports the heavy
+packages themselves, i.e. what an eager import would add.
+
+Usage:
+    python benchmarks/bench_import.py [--modules scraper,stage1.stage1,stage5.stage5] [--repeat 5] [--top 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ('scraper',) + tuple(f'stage{n}.stage{n}' for n in range(1, 6))
+HEAVY = ('requests', 'bs4', 'lxml.html', 'aiohttp', 'pyarrow', 'zstandard')
+HEAVY_ROW = '(heavy deps)'
+PROBE = """
+import json, sys, time
+sys.path[:0] = {paths!r}
+start = time.perf_counter()
+{imports}
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'heavy': [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def probe(module):
+    if module == HEAVY_ROW:
+        # pyarrow.parquet is what the parquet sink needs
+        imports = [f'import {name}' for name in HEAVY if name != 'pyarrow'] + ['import pyarrow.parquet']
+        paths = []
+    else:
+        imports = [f'import {module}']
+        paths = [ROOT]
+    # optional packages that are not installed are skipped
+    imports = [f'try:\n    {line}\nexcept ImportError:\n    pass' for line in imports]
+    return PROBE.format(paths=paths, imports='\n'.join(imports), heavy=HEAVY)
+
+
+def parse_importtime(stderr):
+    # "import time: self [us] | cumulative | imported package", children
+    # first, nesting shown by two spaces per level
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        entries.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return entries
+
+
+def slowest_children(entries, module, top):
+    """The ``top`` slowest direct imports of ``module`` as (microseconds, name)."""
+    names = [name for _, _, depth, name in entries]
+    if module not in names:
+        return []
+    index = names.index(module)
+    children = []
+    # the module's own imports are listed right before it, down to the
+    # previous top-level entry
+    for _, cumulative_us, depth, name in reversed(entries[:index]):
+        if depth == 0:
+            break
+        if depth == 1:
+            children.append((cumulative_us, name))
+    return sorted(children, reverse=True)[:top]
+
+
+def run_once(module):
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', probe(module)],
+                             stdin=subprocess.DEVNULL, capture_output=True, text=True, cwd=ROOT)
+    if process.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{process.stderr}")
+    result = json.loads(process.stdout.splitlines()[-1])
+    result['entries'] = parse_importtime(process.stderr)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--modules', default=','.join(MODULES),
+                        help="comma separated modules; stageN.stageN imports that stage's script")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=0,
+                        help="also list the N slowest imports of each module")
+    args = parser.parse_args()
+
+    print(f"{'module':<14} | {'import ms':>9} | heavy packages imported")
+    print('-' * 60)
+    for module in args.modules.split(',') + [HEAVY_ROW]:
+        runs = [run_once(module) for _ in range(args.repeat)]
+        milliseconds = statistics.median(run['seconds'] for run in runs) * 1000
+        heavy = runs[-1]['heavy']
+        print(f"{module:<14} | {milliseconds:>9.1f} | {', '.join(heavy) or '-'}")
+        if args.top and module != HEAVY_ROW:
+            for cumulative_us, name in slowest_children(runs[-1]['entries'], module, args.top):
+                print(f"{'':<14} | {cumulative_us / 1000:>9.1f} |   {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark article parsing throughput with threads vs. worker processes.
+
+Parses a batch of saved article pages (the rich article fixture from the
+stage5 tests, padded with the page chrome of stage3/source.html) with the
+same function the crawl uses, ``stage5.parse_article_html``:
+
+* ``threads``   - a ThreadPoolExecutor, i.e. what the threaded crawl does
+                  without --parse-workers; limited by the GIL
+* ``processes`` - ``stage5.make_parse_pool``, as with --parse-workers N
+
+Usage:
+    python benchmarks/bench_parse_pool.py [--pages 400] [--workers 1,2,4,8] [--parser lxml]
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from stage5 import stage5
+from scraper import parsing
+from scraper.fixtures import RICH_ARTICLE_HTML, SOURCE_HTML
+
+
+def fixture_page():
+    with open(SOURCE_HTML, encoding='utf-8') as file:
+        chrome = file.read()
+    # the article fixture plus a realistic amount of page chrome after it
+    return RICH_ARTICLE_HTML.replace('</body>', chrome + '</body>')
+
+
+def run(executor, pages):
+    start = time.perf_counter()
+    records = list(executor.map(stage5.parse_article_html, pages, chunksize=1))
+    return time.perf_counter() - start, records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--pages', type=int, default=400)
+    parser.add_argument('--workers', default='1,2,4,8',
+                        help="comma separated worker counts")
+    parser.add_argument('--parser', choices=parsing.BACKENDS, default=parsing.get_backend())
+    args = parser.parse_args()
+    parsing.set_backend(args.parser)
+
+    page = fixture_page()
+    pages = [page] * args.pages
+    reference = stage5.parse_article_html(page)
+    print(f"{args.pages} pages of {len(page) // 1024} KiB, parser {args.parser}, "
+          f"{os.cpu_count()} CPUs")
+    print(f"{'mode':<10} | {'workers':>7} | {'seconds':>8} | {'pages/s':>8} | {'speedup':>7}")
+    print('-' * 52)
+    baseline = None
+    for mode in ('threads', 'processes'):
+        for workers in (int(value) for value in args.workers.split(',')):
+            if mode == 'threads':
+                executor = ThreadPoolExecutor(max_workers=workers)
+            else:
+                executor = stage5.make_parse_pool(workers)
+                # start the workers before timing
+                list(executor.map(stage5.parse_article_html, [page] * workers))
+            with executor:
+                seconds, records = run(executor, pages)
+            if any(record != reference for record in records):
+                raise SystemExit(f"{mode}/{workers}: parse results differ")
+            baseline = baseline or seconds
+            print(f"{mode:<10} | {workers:>7} | {seconds:>8.2f} | {args.pages / seconds:>8.0f} | "
+                  f"{baseline / seconds:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark the HTML parser backends on saved pages.
+
+Parses stage3/source.html and the stage5 test fixtures (a listing page scaled
+up to many articles and the rich article page) with every available backend,
+runs the stage5 extraction functions on the result and reports the mean time
+per page. Extraction output is checked for parity along the way.
+
+Usage:
+    python benchmarks/bench_parsers.py [--repeat 20] [--listing-articles 200]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from stage5 import stage5
+from scraper import parsing
+from scraper.fixtures import RICH_ARTICLE_HTML, RICH_LISTING_HTML, SOURCE_HTML
+
+
+def scaled_listing(articles):
+    """Repeat the fixture's <article> blocks until the page holds ``articles`` of them."""
+    head, rest = RICH_LISTING_HTML.split('<article>', 1)
+    body, tail = ('<article>' + rest).rsplit('</article>', 1)
+    blocks = body.count('<article>')
+    return head + (body + '</article>') * (articles // blocks) + tail
+
+
+def workloads(listing_articles):
+    with open(SOURCE_HTML, encoding='utf-8') as file:
+        source_html = file.read()
+    listing_html = scaled_listing(listing_articles)
+    return [
+        ('stage3/source.html', source_html, stage5.parse_article_content),
+        (f'listing x{listing_articles}', listing_html,
+         lambda document: stage5.get_news_article_links(document, 'News')),
+        ('rich article', RICH_ARTICLE_HTML, stage5.parse_article_content),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--listing-articles', type=int, default=200)
+    args = parser.parse_args()
+
+    backends = [backend for backend in ('html.parser', 'lxml', parsing.LXML_FAST_PATH)
+                if parsing.lxml_html is not None or backend == 'html.parser']
+
+    print(f"{'page':<20} | {'backend':<12} | {'ms/page':>8} | {'speedup':>7} | parity")
+    print('-' * 64)
+    for name, html, extract in workloads(args.listing_articles):
+        reference = extract(parsing.parse_document(html, 'html.parser'))
+        baseline = None
+        for backend in backends:
+            run = lambda: extract(parsing.parse_document(html, backend))
+            same = run() == reference
+            seconds = min(timeit.repeat(run, number=1, repeat=args.repeat))
+            baseline = baseline or seconds
+            print(f"{name:<20} | {backend:<12} | {seconds * 1000:>8.2f} | "
+                  f"{baseline / seconds:>6.1f}x | {'ok' if same else 'MISMATCH'}")
+
+
+if __name__ == '__main__':
+    main()
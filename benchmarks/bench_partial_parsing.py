@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark full vs. strained (SoupStrainer) parsing of large saved pages.
+
+Builds a large listing page (many <article> cards wrapped in the page chrome
+of stage3/source.html) and a large article page (a long body plus the same
+chrome), then parses each with and without the stage5 strainers. Reports
+parse time and the peak memory allocated while parsing (tracemalloc).
+
+Usage:
+    python benchmarks/bench_partial_parsing.py [--repeat 5] [--articles 500] [--paragraphs 400]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from stage5 import stage5
+from scraper import parsing
+from scraper.fixtures import SOURCE_HTML
+
+
+def page_chrome():
+    """Split stage3/source.html around its <body> so content can be injected."""
+    with open(SOURCE_HTML, encoding='utf-8') as file:
+        html = file.read()
+    head, body = html.split('<body', 1)
+    body_open, body_rest = body.split('>', 1)
+    return head + '<body' + body_open + '>', body_rest
+
+
+def large_listing(articles):
+    before, after = page_chrome()
+    cards = "".join(
+        f'<article class="c-card"><div class="c-card__body"><h3><a data-track-action="view article" '
+        f'href="/articles/n{i}">Article {i}</a></h3><div class="c-card__summary"><p>Summary {i}</p>'
+        f'</div></div><div class="c-meta"><span data-test="article.type">'
+        f'{"News" if i % 3 else "Research"}</span><time>01 Jan 2020</time></div></article>'
+        for i in range(articles)
+    )
+    return before + '<main><ul class="app-article-list">' + cards + '</ul></main>' + after
+
+
+def large_article(paragraphs):
+    before, after = page_chrome()
+    body = "".join(f"<p>Paragraph {i} of the article with <a href='#r{i}'>a reference</a>.</p>"
+                   for i in range(paragraphs))
+    sidebar = "".join(f"<li><a href='/related/{i}'>Related {i}</a></li>" for i in range(paragraphs))
+    return (before + '<h1>Large article | Nature</h1><div class="c-article-body">' + body
+            + '</div><aside><ul>' + sidebar + '</ul></aside>' + after)
+
+
+def peak_memory(func):
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--articles', type=int, default=500)
+    parser.add_argument('--paragraphs', type=int, default=400)
+    args = parser.parse_args()
+
+    workloads = [
+        ('listing', large_listing(args.articles), stage5.LISTING_STRAINER,
+         lambda soup: stage5.get_news_article_links(soup, 'News')),
+        ('article', large_article(args.paragraphs), stage5.ARTICLE_STRAINER,
+         stage5.parse_article_content),
+    ]
+    backends = ['html.parser'] + (['lxml'] if parsing.lxml_html is not None else [])
+
+    print(f"{'page':<8} | {'KiB':>6} | {'backend':<11} | {'mode':<8} | {'ms':>8} | "
+          f"{'peak MiB':>8} | parity")
+    print('-' * 72)
+    for name, html, strainer, extract in workloads:
+        for backend in backends:
+            reference = None
+            for mode, parse_only in (('full', None), ('strained', strainer)):
+                run = lambda: extract(parsing.parse_document(html, backend, parse_only=parse_only))
+                result = run()
+                reference = reference if reference is not None else result
+                seconds = min(timeit.repeat(run, number=1, repeat=args.repeat))
+                peak = peak_memory(run)
+                print(f"{name:<8} | {len(html) // 1024:>6} | {backend:<11} | {mode:<8} | "
+                      f"{seconds * 1000:>8.1f} | {peak / 2 ** 20:>8.1f} | "
+                      f"{'ok' if result == reference else 'MISMATCH'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,94 +2,242 @@
 """
 Test runner for all stages of the SimpleWebScraper project.
 
-This script runs unit tests for all stages and provides a summary of results.
+Each stage's tests run in a worker process of their own, several stages in
+parallel, so one stage's imports, ``sys.path`` entries and module state
+can't leak into another's and a crashing or hanging suite only fails its
+own stage. Workers send back one plain record per test (outcome, duration,
+traceback) over a pipe. The runner prints every test with its duration,
+flags slow tests, lists the slowest ones and ends with a summary.
+
+Usage:
+    python run_tests.py [stage ...] [-j JOBS] [--quiet] [--slow SECONDS] [--slowest N]
+                        [--timeout SECONDS]
 """
 
-import unittest
+import argparse
+import multiprocessing
 import sys
-import os
+import time
+import traceback
+import unittest
+from multiprocessing.connection import wait
 from pathlib import Path
 
+ROOT = Path(__file__).parent
+STAGES = ('stage1', 'stage2', 'stage3', 'stage4', 'stage5', 'scraper')
+SLOW_SECONDS = 1.0
+SLOWEST = 10
+FAILED = ('fail', 'error', 'unexpected success')
+
+
+class TimingResult(unittest.TestResult):
+    """Records the outcome and duration of every test as a picklable dict."""
+
+    def __init__(self):
+        super().__init__()
+        # test output goes into the failure details instead of the terminal
+        self.buffer = True
+        self.records = []
+        self._current = None
+        self._start = 0.0
+
+    def startTest(self, test):
+        super().startTest(test)
+        self._current = {'test': test.id(), 'outcome': 'ok', 'seconds': 0.0, 'details': ''}
+        self._start = time.perf_counter()
+
+    def stopTest(self, test):
+        self._current['seconds'] = time.perf_counter() - self._start
+        self.records.append(self._current)
+        self._current = None
+        # the captured output is already in the details; don't echo it from the worker
+        self._mirrorOutput = False
+        super().stopTest(test)
+
+    def _set_outcome(self, test, outcome, err=None, details=''):
+        if err:
+            details = self._exc_info_to_string(err, test)
+        if self._current is None or test.id() != self._current['test']:
+            # setUpClass/setUpModule failures and import errors outside any test
+            self.records.append({'test': test.id(), 'outcome': outcome, 'seconds': 0.0,
+                                 'details': details})
+            return
+        if self._current['outcome'] not in FAILED:
+            self._current['outcome'] = outcome
+        self._current['details'] += details
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        self._set_outcome(test, 'error', err)
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self._set_outcome(test, 'fail', err)
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        self._set_outcome(test, 'skip', details=reason)
+
+    def addExpectedFailure(self, test, err):
+        super().addExpectedFailure(test, err)
+        self._set_outcome(test, 'expected failure')
+
+    def addUnexpectedSuccess(self, test):
+        super().addUnexpectedSuccess(test)
+        self._set_outcome(test, 'unexpected success')
+
+    def addSubTest(self, test, subtest, err):
+        super().addSubTest(test, subtest, err)
+        if err is not None:
+            failure = issubclass(err[0], test.failureException)
+            details = f'{subtest.id()}\n{self._exc_info_to_string(err, test)}'
+            self._set_outcome(test, 'fail' if failure else 'error', details=details)
+
+
+def run_stage(stage, connection):
+    # Worker process: the stages are packages under the project root, which is
+    # the only directory added to sys.path
+    stage_dir = ROOT / stage
+    sys.path.insert(0, str(ROOT))
+    start = time.perf_counter()
+    try:
+        suite = unittest.TestLoader().discover(str(stage_dir), pattern='test_*.py', top_level_dir=str(ROOT))
+        result = TimingResult()
+        suite.run(result)
+        records = result.records
+    except Exception:
+        records = [{'test': f'{stage} (discovery)', 'outcome': 'error', 'seconds': 0.0,
+                    'details': traceback.format_exc()}]
+    connection.send({'stage': stage, 'seconds': time.perf_counter() - start, 'records': records})
+    connection.close()
+
+
+def crashed(stage, seconds, reason):
+    return {'stage': stage, 'seconds': seconds,
+            'records': [{'test': f'{stage} (worker)', 'outcome': 'error', 'seconds': seconds,
+                         'details': reason}]}
 
-def discover_and_run_tests():
-    """Discover and run all test files in the project."""
-    
-    # Get the project root directory
-    project_root = Path(__file__).parent
-    
-    # Results storage
-    all_results = []
-    
-    # Test each stage
-    stages = ['stage1', 'stage2', 'stage3', 'stage4']
-    
+
+def run_stages(stages, jobs, timeout=None):
+    """Run each stage in its own process, ``jobs`` at a time; yields results as they finish."""
+    # spawn: every worker starts from a clean interpreter, not a copy of this one
+    context = multiprocessing.get_context('spawn')
+    pending = list(stages)
+    running = {}
+    while pending or running:
+        while pending and len(running) < jobs:
+            stage = pending.pop(0)
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=run_stage, args=(stage, sender), name=f'tests-{stage}')
+            process.start()
+            # the worker holds the only sending end, so a crash shows up as EOF
+            sender.close()
+            running[receiver] = (stage, process, time.perf_counter())
+
+        wait_for = None
+        if timeout:
+            oldest = min(started for _, _, started in running.values())
+            wait_for = max(0.0, oldest + timeout - time.perf_counter())
+        ready = wait(list(running), timeout=wait_for)
+        now = time.perf_counter()
+        for receiver in list(running):
+            stage, process, started = running[receiver]
+            if receiver in ready:
+                try:
+                    result = receiver.recv()
+                except EOFError:
+                    process.join()
+                    result = crashed(stage, now - started,
+                                     f"worker exited with code {process.exitcode} before reporting")
+            elif timeout and now - started >= timeout:
+                process.kill()
+                result = crashed(stage, now - started, f"timed out after {timeout:g} s")
+            else:
+                continue
+            del running[receiver]
+            receiver.close()
+            process.join()
+            yield result
+
+
+def print_stage(result, slow, quiet):
+    records = result['records']
+    failed = [record for record in records if record['outcome'] in FAILED]
+    print(f"\n{'=' * 50}")
+    print(f"{result['stage'].upper()}: {len(records)} tests in {result['seconds']:.2f}s")
+    print(f"{'=' * 50}")
+    for record in records:
+        if quiet and record['outcome'] not in FAILED:
+            continue
+        flag = '  << slow' if record['seconds'] >= slow else ''
+        print(f"{record['seconds']:>8.3f}s  {record['outcome']:<6}  {record['test']}{flag}")
+    for record in failed:
+        print(f"\n{'-' * 50}\n{record['outcome'].upper()}: {record['test']}\n{record['details']}")
+
+
+def summarize(result):
+    outcomes = [record['outcome'] for record in result['records']]
+    return {
+        'stage': result['stage'],
+        'tests_run': len(outcomes),
+        'failures': outcomes.count('fail') + outcomes.count('unexpected success'),
+        'errors': outcomes.count('error'),
+        'seconds': result['seconds'],
+    }
+
+
+def discover_and_run_tests(stages=STAGES, jobs=None, slow=SLOW_SECONDS, slowest=SLOWEST, quiet=False,
+                           timeout=None):
+    """Run the stages' tests in parallel worker processes and print a summary."""
+    found = []
     for stage in stages:
-        stage_dir = project_root / stage
-        if not stage_dir.exists():
+        if (ROOT / stage).is_dir():
+            found.append(stage)
+        else:
             print(f"Warning: {stage} directory not found, skipping...")
-            continue
-            
-        print(f"\n{'='*50}")
-        print(f"Running tests for {stage.upper()}")
-        print(f"{'='*50}")
-        
-        # Add stage directory to Python path
-        sys.path.insert(0, str(stage_dir))
-        
-        try:
-            # Discover tests in the stage directory
-            loader = unittest.TestLoader()
-            suite = loader.discover(str(stage_dir), pattern='test_*.py')
-            
-            # Run the tests
-            runner = unittest.TextTestRunner(verbosity=2, stream=sys.stdout)
-            result = runner.run(suite)
-            
-            # Store results
-            all_results.append({
-                'stage': stage,
-                'tests_run': result.testsRun,
-                'failures': len(result.failures),
-                'errors': len(result.errors),
-                'success': result.wasSuccessful()
-            })
-            
-        except Exception as e:
-            print(f"Error running tests for {stage}: {e}")
-            all_results.append({
-                'stage': stage,
-                'tests_run': 0,
-                'failures': 0,
-                'errors': 1,
-                'success': False
-            })
-        
-        # Remove from path to avoid conflicts
-        if str(stage_dir) in sys.path:
-            sys.path.remove(str(stage_dir))
-    
+    stages = found
+    # the suites mostly wait on sockets and sleeps, so one worker per stage pays off
+    jobs = jobs or len(stages) or 1
+    start = time.perf_counter()
+    results = {}
+    for result in run_stages(stages, jobs, timeout):
+        print_stage(result, slow, quiet)
+        results[result['stage']] = result
+    wall = time.perf_counter() - start
+
+    records = [record for stage in stages for record in results[stage]['records']]
+    if slowest:
+        print(f"\n{'=' * 50}")
+        print(f"SLOWEST {slowest} TESTS")
+        print(f"{'=' * 50}")
+        for record in sorted(records, key=lambda record: record['seconds'], reverse=True)[:slowest]:
+            flag = '  << slow' if record['seconds'] >= slow else ''
+            print(f"{record['seconds']:>8.3f}s  {record['test']}{flag}")
+
     # Print summary
-    print(f"\n{'='*50}")
+    print(f"\n{'=' * 50}")
     print("TEST SUMMARY")
-    print(f"{'='*50}")
-    
+    print(f"{'=' * 50}")
+
     total_tests = 0
     total_failures = 0
     total_errors = 0
-    
-    for result in all_results:
-        status = "✓ PASSED" if result['success'] else "✗ FAILED"
-        print(f"{result['stage'].upper():<10} | {result['tests_run']:>2} tests | "
-              f"{result['failures']:>2} failures | {result['errors']:>2} errors | {status}")
-        
-        total_tests += result['tests_run']
-        total_failures += result['failures']
-        total_errors += result['errors']
-    
-    print(f"{'-'*50}")
-    print(f"{'TOTAL':<10} | {total_tests:>2} tests | "
-          f"{total_failures:>2} failures | {total_errors:>2} errors")
-    
+
+    for summary in (summarize(results[stage]) for stage in stages):
+        success = summary['failures'] == 0 and summary['errors'] == 0
+        status = "✓ PASSED" if success else "✗ FAILED"
+        print(f"{summary['stage'].upper():<10} | {summary['tests_run']:>3} tests | "
+              f"{summary['failures']:>2} failures | {summary['errors']:>2} errors | "
+              f"{summary['seconds']:>6.2f}s | {status}")
+
+        total_tests += summary['tests_run']
+        total_failures += summary['failures']
+        total_errors += summary['errors']
+
+    print(f"{'-' * 50}")
+    print(f"{'TOTAL':<10} | {total_tests:>3} tests | "
+          f"{total_failures:>2} failures | {total_errors:>2} errors | {wall:>6.2f}s ({jobs} workers)")
+
     # Overall result
     overall_success = total_failures == 0 and total_errors == 0
     if overall_success:
@@ -100,5 +248,24 @@ def discover_and_run_tests():
         return 1
 
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the tests of every stage in parallel processes")
+    parser.add_argument('stages', nargs='*', default=list(STAGES),
+                        help=f"stages to test (default: {' '.join(STAGES)})")
+    parser.add_argument('-j', '--jobs', type=int,
+                        help="stages tested at once (default: all of them)")
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help="only list failing tests, the slowest tests and the summary")
+    parser.add_argument('--slow', type=float, default=SLOW_SECONDS,
+                        help="flag tests taking at least this many seconds")
+    parser.add_argument('--slowest', type=int, default=SLOWEST,
+                        help="list this many slowest tests (0: none)")
+    parser.add_argument('--timeout', type=float,
+                        help="fail a stage whose tests run longer than this many seconds")
+    return parser.parse_args(argv)
+
+
 if __name__ == '__main__':
-    sys.exit(discover_and_run_tests())
+    args = parse_args()
+    sys.exit(discover_and_run_tests(args.stages, args.jobs, args.slow, args.slowest, args.quiet,
+                                    args.timeout))
@@ -0,0 +1,45 @@
+"""
+Shared building blocks for the SimpleWebScraper stages.
+
+The stage packages keep their own scraping logic; this package holds the
+infrastructure they have in common (HTTP client, local test server, ...).
+
+Importing it has no side effects and costs next to nothing: submodules are
+imported on first use, and so are the heavy third-party packages behind
+them (``scraper.lazy``). The fetch, parse and save functions are available
+from the package itself::
+
+    import scraper
+
+    response = scraper.get(url)
+    document = scraper.parse_document(response.text)
+    with scraper.open_sink('jsonl', 'articles.jsonl') as sink:
+        sink.write(scraper.make_record(url, title, 'News', 1, text))
+"""
+
+from scraper.lazy import lazy_exports
+
+# Public name -> submodule defining it
+_EXPORTS = {
+    'HttpClient': 'http_client',
+    'get': 'http_client',
+    'get_head': 'http_client',
+    'get_client': 'http_client',
+    'set_client': 'http_client',
+    'AsyncHttpClient': 'async_client',
+    'parse_document': 'parsing',
+    'make_soup': 'parsing',
+    'ExtractionRules': 'rules',
+    'load_rules': 'rules',
+    'open_sink': 'sinks',
+    'make_record': 'sinks',
+    'Archive': 'archive',
+    'Manifest': 'manifest',
+    'Checkpoint': 'checkpoint',
+    'open_frontier': 'frontier',
+    'get_metrics': 'metrics',
+}
+
+__all__ = sorted(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -0,0 +1,171 @@
+"""
+Content-addressed, compressed storage for article texts and pages.
+
+An archive directory holds
+
+* ``objects/ab/abcdef...<ext>`` - one compressed blob per distinct content,
+  named by the SHA-256 of the uncompressed bytes, so an article reached from
+  several listing pages (or unchanged between runs) is stored only once,
+* ``index.jsonl`` - an append-only index from a key (usually the URL) to the
+  blob digest plus metadata; the last record for a key wins, like the
+  incremental crawl manifest.
+
+Blobs are compressed with zstd when the optional ``zstandard`` package is
+installed and with gzip otherwise. The codec is part of the file name, so
+archives written with either codec stay readable.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from scraper.jsonl import read_lines
+from scraper.lazy import lazy_import
+
+# None when zstandard is not installed
+zstandard = lazy_import('zstandard', optional=True)
+
+CODECS = ('zstd', 'gzip')
+EXTENSIONS = {'zstd': '.zst', 'gzip': '.gz'}
+DEFAULT_CODEC = 'zstd' if zstandard is not None else 'gzip'
+DEFAULT_LEVELS = {'zstd': 3, 'gzip': 6}
+INDEX_NAME = 'index.jsonl'
+
+
+def compress(data, codec, level=None):
+    level = DEFAULT_LEVELS[codec] if level is None else level
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    # mtime=0 keeps the output a pure function of the content
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def decompress(data, codec):
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ImportError("Reading zstd blobs requires zstandard (pip install zstandard)")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+class BlobStore:
+    """Compressed blobs keyed by the SHA-256 of their content."""
+
+    def __init__(self, root, codec=None, level=None):
+        codec = codec or DEFAULT_CODEC
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec {codec!r}; choose from {', '.join(CODECS)}")
+        if codec == 'zstd' and zstandard is None:
+            raise ImportError("The zstd codec requires zstandard (pip install zstandard)")
+        self.root = str(root)
+        self.codec = codec
+        self.level = level
+        self.bytes_written = 0
+
+    def _path(self, digest, codec):
+        return os.path.join(self.root, digest[:2], digest + EXTENSIONS[codec])
+
+    def find(self, digest):
+        """``(path, codec)`` of the stored blob, or ``(None, None)``."""
+        for codec in (self.codec,) + tuple(c for c in CODECS if c != self.codec):
+            path = self._path(digest, codec)
+            if os.path.exists(path):
+                return path, codec
+        return None, None
+
+    def __contains__(self, digest):
+        return self.find(digest)[0] is not None
+
+    def put(self, data):
+        """Store ``data`` unless an identical blob exists; returns its digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        if digest in self:
+            return digest
+        path = self._path(digest, self.codec)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        blob = compress(data, self.codec, self.level)
+        # write next to the target and rename, so readers never see half a blob
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(blob)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        self.bytes_written += len(blob)
+        return digest
+
+    def get(self, digest):
+        path, codec = self.find(digest)
+        if path is None:
+            raise KeyError(digest)
+        with open(path, 'rb') as file:
+            return decompress(file.read(), codec)
+
+
+class Archive:
+    """A ``BlobStore`` plus the index from keys (URLs, file names) to blobs."""
+
+    def __init__(self, root, codec=None, level=None):
+        self.root = str(root)
+        os.makedirs(self.root, exist_ok=True)
+        self.blobs = BlobStore(os.path.join(self.root, 'objects'), codec, level)
+        self.index_path = os.path.join(self.root, INDEX_NAME)
+        self.entries = {}
+        self._lock = threading.Lock()
+        self._load()
+        self._index = open(self.index_path, 'a', encoding='utf-8')
+
+    def _load(self):
+        for entry in read_lines(self.index_path, missing_ok=True):
+            self.entries[entry['key']] = entry
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def put(self, key, data, **metadata):
+        """
+        Store ``data`` (bytes or text) under ``key`` with optional metadata.
+        Only new content is compressed and written; an unchanged key does not
+        even grow the index.
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        with self._lock:
+            digest = self.blobs.put(data)
+            entry = {'key': key, 'sha256': digest, 'size': len(data), **metadata}
+            previous = self.entries.get(key)
+            if previous is not None and {k: v for k, v in previous.items() if k != 'stored_at'} == entry:
+                return previous
+            entry['stored_at'] = time.time()
+            self.entries[key] = entry
+            self._index.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            return entry
+
+    def get(self, key):
+        return self.blobs.get(self.entries[key]['sha256'])
+
+    def get_text(self, key):
+        return self.get(key).decode('utf-8')
+
+    def flush(self):
+        with self._lock:
+            self._index.flush()
+
+    def close(self):
+        with self._lock:
+            self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
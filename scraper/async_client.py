@@ -0,0 +1,104 @@
+"""
+Asyncio counterpart of ``http_client`` built on aiohttp.
+
+One ``aiohttp.ClientSession`` with a shared ``TCPConnector`` gives the same
+keep-alive pooling as ``HttpClient``; the connector limits double as the
+global and per-host concurrency caps. Rate limiting and retries use the
+same ``AdaptiveRateLimiter``/``RetryPolicy`` objects as the blocking client,
+but wait with ``asyncio.sleep``. aiohttp is optional and only needed for the
+async crawl engine. Requests are timed in ``scraper.metrics`` under the
+same phases as the blocking client.
+"""
+
+import asyncio
+import time
+
+from scraper import metrics
+from scraper.http_client import DEFAULT_HEADERS
+from scraper.lazy import lazy_import
+from scraper.retry import parse_retry_after
+
+# None when aiohttp is not installed
+aiohttp = lazy_import('aiohttp', optional=True)
+
+DEFAULT_LIMIT = 100
+DEFAULT_LIMIT_PER_HOST = 8
+# (connect timeout, read timeout) in seconds, same as the blocking client
+DEFAULT_TIMEOUT = (5, 30)
+
+
+class AsyncHttpClient:
+    """Pooled aiohttp session; use as ``async with AsyncHttpClient() as client``."""
+
+    def __init__(self, headers=None, timeout=DEFAULT_TIMEOUT,
+                 limit=DEFAULT_LIMIT, limit_per_host=DEFAULT_LIMIT_PER_HOST,
+                 rate_limiter=None, retry=None):
+        if aiohttp is None:
+            raise ImportError("The async client requires aiohttp (pip install aiohttp)")
+        self.headers = dict(DEFAULT_HEADERS)
+        if headers:
+            self.headers.update(headers)
+        self.timeout = timeout
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.rate_limiter = rate_limiter
+        self.retry = retry
+        self.session = None
+
+    async def open(self):
+        connect_timeout, read_timeout = self.timeout
+        connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host)
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout),
+        )
+        return self
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def get_text(self, url, headers=None):
+        """GET ``url`` and return the decoded body, raising on HTTP errors."""
+        with metrics.timer('fetch') as span:
+            body, encoding = await self._get(url, headers)
+            span.nbytes = len(body)
+        # like requests' Response.text: bytes that don't fit the charset become U+FFFD
+        return body.decode(encoding, errors='replace')
+
+    async def _get(self, url, headers):
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.rate_limiter is not None:
+                delay = self.rate_limiter.reserve(url)
+                metrics.observe('throttle', delay)
+                await asyncio.sleep(delay)
+            try:
+                start = time.perf_counter()
+                async with self.session.get(url, headers=headers) as response:
+                    metrics.observe('ttfb', time.perf_counter() - start)
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.feedback(url, response.status, retry_after)
+                    if self.retry is None or not self.retry.should_retry(attempt, response.status):
+                        response.raise_for_status()
+                        # the raw body, so fetch counts bytes like the blocking client does
+                        return await response.read(), response.get_encoding()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if self.rate_limiter is not None:
+                    self.rate_limiter.feedback(url)
+                if self.retry is None or not self.retry.should_retry(attempt):
+                    raise
+                retry_after = None
+            delay = self.retry.delay(attempt, retry_after)
+            metrics.observe('backoff', delay)
+            await asyncio.sleep(delay)
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
@@ -0,0 +1,87 @@
+"""
+Append-only crawl checkpoints.
+
+A long crawl logs its frontier as it goes, one JSON line per event:
+
+* ``start``    - the crawl parameters (number of pages, article type),
+* ``page``     - a listing page was read; its matching ``[url, title]`` cards,
+* ``article``  - an article was stored,
+* ``finished`` - the crawl ran to the end.
+
+Pages without a ``page`` record still need their listing fetched; articles
+listed but not stored are the ones pending or in flight when the run
+stopped. Loading the log restores exactly that, so a resumed crawl fetches
+neither a listing nor an article twice. Writes only append to a buffered
+file; ``flush()`` hands them to the OS and is called once per page.
+"""
+
+import json
+import threading
+
+from scraper.jsonl import read_lines
+
+
+class Checkpoint:
+
+    def __init__(self, path, resume=False):
+        self.path = str(path)
+        self.params = None
+        self.pages = {}
+        self.done = set()
+        self.finished = False
+        self._lock = threading.Lock()
+        if resume:
+            self._load()
+        self._file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+
+    def _load(self):
+        for entry in read_lines(self.path, missing_ok=True):
+            self._apply(entry)
+
+    def _apply(self, entry):
+        event = entry.get('event')
+        if event == 'start':
+            self.params = {'pages': entry['pages'], 'type': entry['type']}
+        elif event == 'page':
+            self.pages[entry['page']] = [tuple(card) for card in entry['cards']]
+        elif event == 'article':
+            self.done.add(entry['url'])
+        elif event == 'finished':
+            self.finished = True
+
+    def _append(self, entry):
+        with self._lock:
+            self._apply(entry)
+            self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def start(self, pages, article_type):
+        self._append({'event': 'start', 'pages': pages, 'type': article_type})
+
+    def record_page(self, page, cards):
+        """Log listing ``page`` with its ``(url, title)`` cards of the crawled type."""
+        self._append({'event': 'page', 'page': page, 'cards': [list(card) for card in cards]})
+
+    def record_article(self, url):
+        self._append({'event': 'article', 'url': url})
+
+    def record_finished(self):
+        self._append({'event': 'finished'})
+        self.flush()
+
+    def pending(self, page):
+        """Links of a logged listing page that are not stored yet."""
+        return [url for url, _ in self.pages.get(page, []) if url not in self.done]
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,109 @@
+"""
+Streaming downloads straight to disk.
+
+The body is read in ``chunk_size`` pieces and written to ``<path>.part``,
+which is renamed over ``path`` only once the whole body has arrived, so
+``path`` never holds a half-written file and memory use does not grow with
+the size of the page.
+
+With ``resume=True`` an existing ``.part`` file is continued with a
+``Range`` request. The validator (``ETag``/``Last-Modified``) of the
+original response is kept in ``<path>.part.json`` and sent as ``If-Range``,
+so a page that changed in the meantime is downloaded again from the start
+instead of being spliced together from two versions.
+"""
+
+import json
+import os
+import re
+from http import HTTPStatus
+
+from scraper import http_client
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_CONTENT_RANGE = re.compile(r'bytes (\d+)-\d+/(\d+|\*)')
+
+
+def _read_validator(meta_path):
+    try:
+        with open(meta_path, encoding='utf-8') as file:
+            return json.load(file).get('validator')
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_validator(meta_path, response):
+    validator = response.headers.get('ETag') or response.headers.get('Last-Modified')
+    if validator is None:
+        return
+    with open(meta_path, 'w', encoding='utf-8') as file:
+        json.dump({'url': response.url, 'validator': validator}, file)
+
+
+def _resume_offset(response, requested):
+    """Offset the 206 response starts at, or None if it can't be appended."""
+    match = _CONTENT_RANGE.match(response.headers.get('Content-Range', ''))
+    if match is None or int(match.group(1)) != requested:
+        return None
+    return requested
+
+
+def download(url, path, chunk_size=DEFAULT_CHUNK_SIZE, resume=False, headers=None, client=None):
+    """
+    Stream ``url`` into ``path`` and return the number of bytes in the file.
+
+    Raises ``requests.HTTPError`` for error responses; ``path`` is left
+    untouched in that case. A connection dropped mid-body leaves the
+    ``.part`` file behind for a later ``resume=True`` call.
+    """
+    client = client or http_client.get_client()
+    path = os.fspath(path)
+    part_path = path + '.part'
+    meta_path = part_path + '.json'
+    request_headers = dict(headers or {})
+    # byte ranges refer to the encoded body; keep it unencoded so they line up with the file
+    request_headers.setdefault('Accept-Encoding', 'identity')
+
+    offset = 0
+    if resume and os.path.exists(part_path):
+        offset = os.path.getsize(part_path)
+    if offset:
+        request_headers['Range'] = f'bytes={offset}-'
+        validator = _read_validator(meta_path)
+        if validator:
+            request_headers['If-Range'] = validator
+
+    response = client.get(url, headers=request_headers, stream=True)
+    try:
+        if offset and response.status_code == HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE:
+            # the part file already holds the whole body (or is garbage); start over
+            response.close()
+            os.remove(part_path)
+            return download(url, path, chunk_size, resume, headers, client)
+        response.raise_for_status()
+
+        mode = 'wb'
+        if offset and response.status_code == HTTPStatus.PARTIAL_CONTENT:
+            if _resume_offset(response, offset) is None:
+                response.close()
+                os.remove(part_path)
+                return download(url, path, chunk_size, resume, headers, client)
+            mode = 'ab'
+        else:
+            offset = 0
+            _write_validator(meta_path, response)
+
+        with open(part_path, mode) as file:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                file.write(chunk)
+                offset += len(chunk)
+            file.flush()
+            os.fsync(file.fileno())
+    finally:
+        response.close()
+
+    os.replace(part_path, path)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+    return offset
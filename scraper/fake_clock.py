@@ -0,0 +1,26 @@
+"""
+Manually driven clock for tests.
+
+Rate limiters, retry queues, caches and metrics take a ``clock`` (and
+sometimes a ``sleep``) argument; tests pass a ``FakeClock`` so time only
+moves when the test says so.
+"""
+
+
+class FakeClock:
+    """
+    ``clock()`` returns ``now`` and ``clock.sleep(seconds)`` advances it.
+    Given ``readings``, each call first moves ``now`` to the next one in turn.
+    """
+
+    def __init__(self, *readings):
+        self.readings = list(readings)
+        self.now = 0.0
+
+    def __call__(self):
+        if self.readings:
+            self.now = self.readings.pop(0)
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
@@ -0,0 +1,50 @@
+"""
+Hand-written pages shared by the parser tests and benchmarks.
+
+Unlike ``synthetic_site``, which generates large realistic pages, these are
+small and packed with the edge cases every parser backend has to agree on.
+"""
+
+import os
+
+# Path of a saved copy of a real page, chrome and all
+SOURCE_HTML = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'stage3', 'source.html')
+
+# Entities, comments, inline markup, an empty paragraph and non-ASCII text
+RICH_ARTICLE_HTML = """
+<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="utf-8"><title>Rich | Nature</title></head>
+<body>
+    <header><p>Site navigation text</p></header>
+    <h1>  Caf\u00e9 <em>science</em> &amp; the 2023 \u201cbreakthrough\u201d | Nature News </h1>
+    <div class="c-article-body u-clearfix">
+        <p>First <a href="/x">linked</a> paragraph with <b>bold</b>   text.</p>
+        <p>
+            Second paragraph <!-- a comment --> spanning
+            several lines &lt;escaped&gt;.
+        </p>
+        <p></p>
+        <p>Unicode: \u03b1\u03b2\u03b3 \u2014 \u00fc\u00f1\u00ee\u00e7\u00f8d\u00e9</p>
+    </div>
+    <p>Footer paragraph.</p>
+</body>
+</html>
+"""
+
+# Cards with and without the type span and the tracking attribute, one with two links
+RICH_LISTING_HTML = """
+<html><body>
+    <article><div><span data-test="article.type"> News </span></div>
+        <h3><a data-track-action="view article" href="/articles/n1">One</a></h3></article>
+    <article><span data-test="article.type">News &amp; Views</span>
+        <a data-track-action="view article" href="/articles/nv1">Two</a></article>
+    <article><span data-test="article.type">Research</span>
+        <a href="/articles/untracked">No tracking attribute</a></article>
+    <article><a data-track-action="view article" href="/articles/untyped">No type</a></article>
+    <article><span data-test="article.type">News</span>
+        <a data-track-action="view article" href="/articles/n2">Three</a>
+        <a data-track-action="view article" href="/articles/n2-dup">Second link</a></article>
+</body></html>
+"""
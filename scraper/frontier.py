@@ -0,0 +1,396 @@
+"""
+Crawl frontier: the URLs still to fetch, shared by any number of workers.
+
+A frontier is a deduplicating priority queue with leases:
+
+* ``push``  - adds a URL once; pushing a URL it has ever seen is a no-op,
+* ``lease`` - hands out the queued task with the lowest priority value
+  (then the oldest) for ``lease_seconds``. A lease that runs out puts the
+  task back in the queue, so work held by a crashed worker is not lost,
+* ``ack``   - marks a leased task done; ``retry`` puts it back after a
+  delay and ``fail`` gives up on it. Each only applies while the caller
+  still holds the lease, and returns False otherwise.
+
+Three backends share that interface:
+
+* ``MemoryFrontier``  - one process, any number of threads,
+* ``SQLiteFrontier``  - a database file shared by the processes of one host,
+* ``RedisFrontier``   - a Redis server shared by many hosts; needs the
+  optional ``redis`` package, or any client with the same commands (such
+  as ``scraper.local_redis.LocalRedis`` in tests).
+
+``open_frontier`` picks one from a spec: ``memory``, ``redis://...`` or a
+SQLite file name. Leases use the wall clock, since workers on different
+hosts compare them.
+"""
+
+import heapq
+import itertools
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+from scraper.lazy import lazy_import
+
+# None when redis is not installed
+redis = lazy_import('redis', optional=True)
+
+DEFAULT_LEASE_SECONDS = 60.0
+DEFAULT_PREFIX = 'frontier'
+# Redis sorts the queue by a single score: priority, then push order
+PRIORITY_SPAN = 2 ** 32
+
+
+class Task:
+    """A leased URL. ``lease`` identifies this lease for ``ack``, ``retry`` and ``fail``."""
+
+    def __init__(self, url, kind, priority=0, data=None, attempts=0, lease=None):
+        self.url = url
+        self.kind = kind
+        self.priority = priority
+        self.data = data
+        self.attempts = attempts
+        self.lease = lease
+
+    def __repr__(self):
+        return f"Task({self.url!r}, kind={self.kind!r}, priority={self.priority}, attempts={self.attempts})"
+
+
+def new_lease():
+    return uuid.uuid4().hex
+
+
+class Frontier:
+
+    def __init__(self, lease_seconds=DEFAULT_LEASE_SECONDS, clock=time.time):
+        self.lease_seconds = lease_seconds
+        self.clock = clock
+
+    def push(self, url, kind='article', priority=0, data=None):
+        """Queue ``url`` unless it was pushed before; True if it is new."""
+        raise NotImplementedError
+
+    def lease(self, lease_seconds=None):
+        """The next due task, leased to the caller, or None if nothing is queued."""
+        raise NotImplementedError
+
+    def ack(self, task):
+        raise NotImplementedError
+
+    def retry(self, task, delay=0.0):
+        """Queue ``task`` again once ``delay`` seconds have passed, with one more attempt counted."""
+        raise NotImplementedError
+
+    def fail(self, task):
+        raise NotImplementedError
+
+    def counts(self):
+        """Number of tasks per state: queued, leased (including retries waiting out their delay), done, failed."""
+        raise NotImplementedError
+
+    @property
+    def finished(self):
+        """True once every task pushed is done or failed."""
+        counts = self.counts()
+        return counts['queued'] == 0 and counts['leased'] == 0
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class MemoryFrontier(Frontier):
+
+    def __init__(self, lease_seconds=DEFAULT_LEASE_SECONDS, clock=time.time):
+        super().__init__(lease_seconds, clock)
+        self._tasks = {}
+        self._queue = []
+        # url -> current lease, plus a heap of (deadline, lease, url); entries
+        # of acked or renewed leases are skipped when they come up
+        self._leases = {}
+        self._deadlines = []
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+
+    def push(self, url, kind='article', priority=0, data=None):
+        with self._lock:
+            if url in self._tasks:
+                return False
+            self._tasks[url] = {'kind': kind, 'priority': priority, 'data': data, 'attempts': 0,
+                                'order': next(self._order), 'state': 'queued'}
+            self._enqueue(url)
+            return True
+
+    def _enqueue(self, url):
+        entry = self._tasks[url]
+        entry['state'] = 'queued'
+        heapq.heappush(self._queue, (entry['priority'], entry['order'], url))
+
+    def _hold(self, url, seconds):
+        lease = new_lease()
+        self._leases[url] = lease
+        self._tasks[url]['state'] = 'leased'
+        heapq.heappush(self._deadlines, (self.clock() + seconds, lease, url))
+        return lease
+
+    def _requeue_expired(self):
+        now = self.clock()
+        while self._deadlines and self._deadlines[0][0] <= now:
+            _, lease, url = heapq.heappop(self._deadlines)
+            if self._leases.get(url) == lease:
+                del self._leases[url]
+                self._enqueue(url)
+
+    def lease(self, lease_seconds=None):
+        with self._lock:
+            self._requeue_expired()
+            if not self._queue:
+                return None
+            _, _, url = heapq.heappop(self._queue)
+            lease = self._hold(url, lease_seconds or self.lease_seconds)
+            entry = self._tasks[url]
+            return Task(url, entry['kind'], entry['priority'], entry['data'], entry['attempts'], lease)
+
+    def _release(self, task, state):
+        if self._leases.get(task.url) != task.lease:
+            return False
+        del self._leases[task.url]
+        self._tasks[task.url]['state'] = state
+        return True
+
+    def ack(self, task):
+        with self._lock:
+            return self._release(task, 'done')
+
+    def retry(self, task, delay=0.0):
+        with self._lock:
+            if self._leases.get(task.url) != task.lease:
+                return False
+            # held by nobody until the delay runs out, then queued again
+            self._tasks[task.url]['attempts'] += 1
+            self._hold(task.url, delay)
+            return True
+
+    def fail(self, task):
+        with self._lock:
+            return self._release(task, 'failed')
+
+    def counts(self):
+        with self._lock:
+            counts = dict.fromkeys(('queued', 'leased', 'done', 'failed'), 0)
+            for entry in self._tasks.values():
+                counts[entry['state']] += 1
+            return counts
+
+
+class SQLiteFrontier(Frontier):
+    # One row per URL ever pushed. Every process opens its own connection;
+    # BEGIN IMMEDIATE makes a lease a single writer transaction, so two
+    # processes never lease the same row.
+
+    def __init__(self, path, lease_seconds=DEFAULT_LEASE_SECONDS, clock=time.time, timeout=30.0):
+        super().__init__(lease_seconds, clock)
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, timeout=timeout, isolation_level=None,
+                                   check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS frontier ("
+            " url TEXT PRIMARY KEY, kind TEXT, priority INTEGER, data TEXT,"
+            " state TEXT DEFAULT 'queued', attempts INTEGER DEFAULT 0, lease TEXT, lease_until REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS frontier_queue ON frontier (state, priority)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS frontier_leases ON frontier (state, lease_until)")
+
+    def push(self, url, kind='article', priority=0, data=None):
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT OR IGNORE INTO frontier (url, kind, priority, data) VALUES (?, ?, ?, ?)",
+                (url, kind, priority, json.dumps(data)))
+            return cursor.rowcount == 1
+
+    def lease(self, lease_seconds=None):
+        with self._lock:
+            now = self.clock()
+            lease = new_lease()
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute("UPDATE frontier SET state = 'queued', lease = NULL"
+                                 " WHERE state = 'leased' AND lease_until <= ?", (now,))
+                row = self._db.execute(
+                    "SELECT rowid, url, kind, priority, data, attempts FROM frontier"
+                    " WHERE state = 'queued' ORDER BY priority, rowid LIMIT 1").fetchone()
+                if row is not None:
+                    self._db.execute("UPDATE frontier SET state = 'leased', lease = ?, lease_until = ?"
+                                     " WHERE rowid = ?", (lease, now + (lease_seconds or self.lease_seconds), row[0]))
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+        if row is None:
+            return None
+        _, url, kind, priority, data, attempts = row
+        return Task(url, kind, priority, json.loads(data), attempts, lease)
+
+    def _update(self, task, assignments, *values):
+        with self._lock:
+            cursor = self._db.execute(
+                f"UPDATE frontier SET {assignments} WHERE url = ? AND state = 'leased' AND lease = ?",
+                (*values, task.url, task.lease))
+            return cursor.rowcount == 1
+
+    def ack(self, task):
+        return self._update(task, "state = 'done', lease = NULL")
+
+    def retry(self, task, delay=0.0):
+        return self._update(task, "attempts = attempts + 1, lease = ?, lease_until = ?",
+                            new_lease(), self.clock() + delay)
+
+    def fail(self, task):
+        return self._update(task, "state = 'failed', lease = NULL")
+
+    def counts(self):
+        with self._lock:
+            counts = dict.fromkeys(('queued', 'leased', 'done', 'failed'), 0)
+            counts.update(self._db.execute("SELECT state, COUNT(*) FROM frontier GROUP BY state"))
+            return counts
+
+    def close(self):
+        self._db.close()
+
+
+def _text(value):
+    # redis-py returns bytes unless the client decodes responses
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+
+class RedisFrontier(Frontier):
+    # Keys, all under one prefix:
+    #   tasks    hash  url -> {kind, priority, data, order} (every URL ever pushed)
+    #   queue    zset  url, scored by priority then push order
+    #   leases   zset  "<lease> <url>", scored by deadline
+    #   attempts hash  url -> retries so far
+    #   done, failed   sets of urls
+    # Every change that moves a URL between keys is one optimistic
+    # transaction (WATCH/MULTI/EXEC through client.transaction, run again if
+    # another client touched a watched key first), so a URL is never in two
+    # places at once and a worker dying half way can't lose it.
+
+    def __init__(self, client, prefix=DEFAULT_PREFIX, lease_seconds=DEFAULT_LEASE_SECONDS, clock=time.time):
+        super().__init__(lease_seconds, clock)
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        if redis is None:
+            raise ImportError("The Redis frontier requires redis (pip install redis)")
+        return cls(redis.Redis.from_url(url, decode_responses=True), **kwargs)
+
+    def _key(self, name):
+        return f"{self.prefix}:{name}"
+
+    def _atomically(self, change, *keys):
+        # change(pipe) reads with ``keys`` watched, then calls pipe.multi()
+        # and queues its writes; returns what change returned
+        return self.client.transaction(change, *map(self._key, keys), value_from_callable=True)
+
+    def push(self, url, kind='article', priority=0, data=None):
+        order = self.client.incr(self._key('order'))
+        entry = json.dumps({'kind': kind, 'priority': priority, 'data': data, 'order': order})
+
+        def add(pipe):
+            if pipe.hexists(self._key('tasks'), url):
+                return False
+            pipe.multi()
+            pipe.hset(self._key('tasks'), url, entry)
+            pipe.zadd(self._key('queue'), {url: priority * PRIORITY_SPAN + order})
+            return True
+        return self._atomically(add, 'tasks')
+
+    def _entry(self, client, url):
+        return json.loads(_text(client.hget(self._key('tasks'), url)))
+
+    def lease(self, lease_seconds=None):
+        now = self.clock()
+        lease = new_lease()
+        deadline = now + (lease_seconds or self.lease_seconds)
+
+        def take(pipe):
+            # expired leases go back to the queue in the same transaction
+            # that leases the first URL of the queue
+            expired = [_text(member) for member in pipe.zrangebyscore(self._key('leases'), '-inf', now)]
+            requeued = {}
+            for member in expired:
+                url = member.split(' ', 1)[1]
+                entry = self._entry(pipe, url)
+                requeued[url] = entry['priority'] * PRIORITY_SPAN + entry['order']
+            candidates = [(score, url) for url, score in requeued.items()]
+            candidates += [(score, _text(url)) for url, score in pipe.zrange(self._key('queue'), 0, 0, withscores=True)]
+            if not candidates:
+                return None
+            url = min(candidates)[1]
+            pipe.multi()
+            if expired:
+                pipe.zrem(self._key('leases'), *expired)
+            requeued.pop(url, None)
+            if requeued:
+                pipe.zadd(self._key('queue'), requeued)
+            pipe.zrem(self._key('queue'), url)
+            pipe.zadd(self._key('leases'), {f"{lease} {url}": deadline})
+            return url
+        url = self._atomically(take, 'queue', 'leases')
+        if url is None:
+            return None
+        entry = self._entry(self.client, url)
+        attempts = int(self.client.hget(self._key('attempts'), url) or 0)
+        return Task(url, entry['kind'], entry['priority'], entry['data'], attempts, lease)
+
+    def _release(self, task, then):
+        # then(pipe) queues what happens to the URL once its lease is dropped
+        member = f"{task.lease} {task.url}"
+
+        def release(pipe):
+            if pipe.zscore(self._key('leases'), member) is None:
+                return False
+            pipe.multi()
+            pipe.zrem(self._key('leases'), member)
+            then(pipe)
+            return True
+        return self._atomically(release, 'leases')
+
+    def ack(self, task):
+        return self._release(task, lambda pipe: pipe.sadd(self._key('done'), task.url))
+
+    def retry(self, task, delay=0.0):
+        # held by a lease nobody has until the delay runs out, then queued again
+        def hold(pipe):
+            pipe.hincrby(self._key('attempts'), task.url, 1)
+            pipe.zadd(self._key('leases'), {f"{new_lease()} {task.url}": self.clock() + delay})
+        return self._release(task, hold)
+
+    def fail(self, task):
+        return self._release(task, lambda pipe: pipe.sadd(self._key('failed'), task.url))
+
+    def counts(self):
+        return {'queued': self.client.zcard(self._key('queue')),
+                'leased': self.client.zcard(self._key('leases')),
+                'done': self.client.scard(self._key('done')),
+                'failed': self.client.scard(self._key('failed'))}
+
+
+def open_frontier(spec, lease_seconds=DEFAULT_LEASE_SECONDS):
+    """Open the frontier ``spec`` names: ``memory``, a ``redis://`` URL or a SQLite file."""
+    if spec == 'memory':
+        return MemoryFrontier(lease_seconds)
+    if spec.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisFrontier.from_url(spec, lease_seconds=lease_seconds)
+    return SQLiteFrontier(spec, lease_seconds)
@@ -0,0 +1,229 @@
+"""
+Persistent on-disk cache for HTTP responses.
+
+Bodies are stored as files, metadata lives in a small SQLite index next to
+them. ``HttpClient`` consults the cache before every plain GET:
+
+* fresh entries (``Cache-Control: max-age`` / ``Expires``) are served locally,
+* stale entries are revalidated with ``If-None-Match``/``If-Modified-Since``
+  and a ``304 Not Modified`` refreshes them without downloading the body,
+* ``no-store`` responses are never written, ``no-cache`` ones always
+  revalidate,
+* the total body size is bounded; least recently used entries are evicted.
+
+In cache-only mode the network is never touched and a miss raises
+``CacheMissError``, a ``requests`` ``ConnectionError``. It is defined on
+first use, so importing this module does not import ``requests``.
+"""
+
+import email.utils
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from scraper.lazy import lazy_import
+
+requests = lazy_import('requests')
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Request headers that change what the server sends back
+VARY_HEADERS = ('Accept', 'Accept-Language')
+# Response headers kept with the cached body
+STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified',
+                  'Cache-Control', 'Expires', 'Date')
+
+_error_lock = threading.Lock()
+
+
+def __getattr__(name):
+    # CacheMissError subclasses a requests exception, so the class is only
+    # created (once) when something asks for it
+    if name != 'CacheMissError':
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _error_lock:
+        if 'CacheMissError' not in globals():
+            class CacheMissError(requests.exceptions.ConnectionError):
+                """Raised in cache-only mode when a URL is not in the cache."""
+
+            CacheMissError.__qualname__ = 'CacheMissError'
+            globals()['CacheMissError'] = CacheMissError
+    return globals()['CacheMissError']
+
+
+def parse_cache_control(value):
+    directives = {}
+    for part in (value or '').split(','):
+        name, _, argument = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+def _http_date(value):
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class CacheEntry:
+
+    def __init__(self, key, url, status, headers, body, stored_at):
+        self.key = key
+        self.url = url
+        self.status = status
+        self.headers = requests.structures.CaseInsensitiveDict(headers)
+        self.body = body
+        self.stored_at = stored_at
+
+    def is_fresh(self, now=None):
+        now = time.time() if now is None else now
+        directives = parse_cache_control(self.headers.get('Cache-Control'))
+        if 'no-cache' in directives:
+            return False
+        if 'max-age' in directives:
+            try:
+                return now - self.stored_at < int(directives['max-age'])
+            except (TypeError, ValueError):
+                return False
+        expires = _http_date(self.headers.get('Expires'))
+        return expires is not None and now < expires
+
+    def validators(self):
+        """Conditional request headers for revalidating this entry."""
+        headers = {}
+        if 'ETag' in self.headers:
+            headers['If-None-Match'] = self.headers['ETag']
+        if 'Last-Modified' in self.headers:
+            headers['If-Modified-Since'] = self.headers['Last-Modified']
+        return headers
+
+    def to_response(self):
+        response = requests.Response()
+        response.status_code = self.status
+        response.reason = 'OK'
+        response.url = self.url
+        response.headers = requests.structures.CaseInsensitiveDict(self.headers)
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response._content = self.body
+        response.from_cache = True
+        return response
+
+
+class ResponseCache:
+    """Size-bounded LRU cache of GET responses stored under ``directory``."""
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(self.directory, 'index.sqlite3'),
+                                   check_same_thread=False)
+        # last_used is updated on every hit; don't fsync for each of them
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, url TEXT, status INTEGER, headers TEXT,"
+            " size INTEGER, stored_at REAL, last_used REAL)"
+        )
+        self._db.commit()
+
+    @staticmethod
+    def key(url, headers=None):
+        headers = requests.structures.CaseInsensitiveDict(headers or {})
+        parts = [url] + [f"{name}:{headers.get(name, '')}" for name in VARY_HEADERS]
+        return hashlib.sha256("\n".join(parts).encode('utf-8')).hexdigest()
+
+    def _body_path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.body')
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url, status, headers, stored_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            try:
+                with open(self._body_path(key), 'rb') as file:
+                    body = file.read()
+            except FileNotFoundError:
+                self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+            self._db.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+        url, status, headers, stored_at = row
+        return CacheEntry(key, url, status, json.loads(headers), body, stored_at)
+
+    def store(self, key, response):
+        """Store a 200 response unless it forbids caching; returns True if stored."""
+        if response.status_code != 200:
+            return False
+        if 'no-store' in parse_cache_control(response.headers.get('Cache-Control')):
+            return False
+        headers = {name: response.headers[name] for name in STORED_HEADERS if name in response.headers}
+        body = response.content
+        path = self._body_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as file:
+            file.write(body)
+        os.replace(temp_path, path)
+
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, response.url, response.status_code, json.dumps(headers), len(body), now, now)
+            )
+            self._db.commit()
+            self._evict()
+        return True
+
+    def refresh(self, key, entry, not_modified):
+        """Apply the headers of a 304 response to ``entry`` and restart its freshness."""
+        for name in STORED_HEADERS:
+            if name in not_modified.headers:
+                entry.headers[name] = not_modified.headers[name]
+        entry.stored_at = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE entries SET headers = ?, stored_at = ?, last_used = ? WHERE key = ?",
+                (json.dumps(dict(entry.headers)), entry.stored_at, entry.stored_at, key)
+            )
+            self._db.commit()
+        return entry
+
+    def total_size(self):
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._db.execute("SELECT key, size FROM entries ORDER BY last_used, rowid").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            try:
+                os.remove(self._body_path(key))
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,283 @@
+"""
+Pooled HTTP client shared by all stages.
+
+Calling the bare ``requests.get`` opens a new TCP (and TLS) connection for
+every request. ``HttpClient`` keeps a single ``requests.Session`` with a
+keep-alive connection pool, so consecutive pages from the same host reuse
+the already established socket.
+
+``get_head`` streams a page only until ``</head>`` and then stops, for
+callers that just need the title and ``<meta>`` tags.
+
+The shared client retries 429/5xx responses and connection errors with
+backoff (``retry.RetryPolicy``) and paces requests per host with an
+``rate_limit.AdaptiveRateLimiter``.
+
+Every GET is timed in ``scraper.metrics``: ``fetch`` (the whole call, with
+body bytes), ``ttfb`` (connect and time to first byte of each attempt),
+``throttle`` and ``backoff`` (time spent waiting on the rate limiter and
+between retries).
+"""
+
+import re
+import threading
+import time
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from scraper import http_cache, metrics
+from scraper.lazy import lazy_import
+from scraper.rate_limit import AdaptiveRateLimiter
+from scraper.retry import RetryPolicy, parse_retry_after
+
+requests = lazy_import('requests')
+
+DEFAULT_HEADERS = {'Accept-Language': 'en-US,en;q=0.5'}
+# (connect timeout, read timeout) in seconds
+DEFAULT_TIMEOUT = (5, 30)
+DEFAULT_POOL_SIZE = 10
+# Hosts we fetch many pages from get a bigger pool of their own
+HOST_POOL_SIZES = {
+    'https://www.nature.com': 20,
+}
+HEAD_CHUNK_SIZE = 4096
+HEAD_END = re.compile(rb'</head\s*>', re.IGNORECASE)
+# bytes re-scanned from the previous chunk, so a tag split across chunks is found
+_HEAD_END_OVERLAP = 32
+
+
+def __getattr__(name):
+    # http_cache.CacheMissError is created on first use
+    if name == 'CacheMissError':
+        return http_cache.CacheMissError
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def head_markup(content):
+    """``content`` up to and including ``</head>`` (all of it if there is none)."""
+    match = HEAD_END.search(content)
+    return content[:match.end()] if match else content
+
+
+class HttpClient:
+    """
+    A keep-alive ``requests.Session`` with per-host pool sizing and timeouts.
+
+    ``max_per_host`` optionally caps how many requests may be in flight to
+    the same host at once, which keeps concurrent crawls polite. With a
+    ``cache`` (``http_cache.ResponseCache``) plain GETs are answered from
+    disk or revalidated; ``cache_only`` never touches the network. A
+    ``rate_limiter`` paces requests per host and a ``retry`` policy retries
+    throttled, failed and dropped requests.
+    """
+
+    def __init__(self, headers=None, timeout=DEFAULT_TIMEOUT,
+                 pool_size=DEFAULT_POOL_SIZE, host_pool_sizes=None, max_per_host=None,
+                 cache=None, cache_only=False, rate_limiter=None, retry=None):
+        self.timeout = timeout
+        self.max_per_host = max_per_host
+        self.cache = cache
+        self.cache_only = cache_only
+        self.rate_limiter = rate_limiter
+        self.retry = retry
+        self._host_slots = {}
+        self._host_slots_lock = threading.Lock()
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        if headers:
+            self.session.headers.update(headers)
+
+        default_adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', default_adapter)
+        self.session.mount('https://', default_adapter)
+
+        # requests picks the adapter with the longest matching prefix,
+        # so these override the default pool for their host only
+        for prefix, size in (host_pool_sizes or {}).items():
+            self.session.mount(prefix, requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=size))
+
+    def get(self, url, headers=None, retry=True, **kwargs):
+        """
+        Send a GET request through the pooled session (and the cache, if any).
+
+        ``retry=False`` sends it once, without the retry policy, for callers
+        that retry failed requests themselves (e.g. from a ``RetryQueue``).
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        if kwargs.get('stream'):
+            return self._get(url, headers, retry, **kwargs)
+        with metrics.timer('fetch') as span:
+            response = self._get(url, headers, retry, **kwargs)
+            span.nbytes = len(response.content)
+        return response
+
+    def _get(self, url, headers, retry=True, **kwargs):
+        if self.cache is None or kwargs.get('stream'):
+            return self._send(url, headers, retry, **kwargs)
+
+        if kwargs.get('params'):
+            # the query string is part of the cache key; send the URL that was keyed
+            url = requests.Request('GET', url, params=kwargs.pop('params')).prepare().url
+        request_headers = dict(self.session.headers)
+        request_headers.update(headers or {})
+        key = self.cache.key(url, request_headers)
+        entry = self.cache.get(key)
+        if entry is not None and (self.cache_only or entry.is_fresh()):
+            return entry.to_response()
+        if self.cache_only:
+            raise http_cache.CacheMissError(f"{url} is not in the cache")
+
+        if entry is not None:
+            headers = dict(headers or {})
+            headers.update(entry.validators())
+        response = self._send(url, headers, retry, **kwargs)
+        if entry is not None and response.status_code == 304:
+            return self.cache.refresh(key, entry, response).to_response()
+        self.cache.store(key, response)
+        return response
+
+    def get_head(self, url, headers=None, chunk_size=HEAD_CHUNK_SIZE, **kwargs):
+        """
+        GET ``url`` but download the body only up to ``</head>``.
+
+        The response's ``content`` is the markup up to and including
+        ``</head>``; ``bytes_read`` is how many body bytes came off the wire.
+        Stopping early closes the connection instead of returning it to the
+        pool, so this pays off for pages much larger than their ``<head>``.
+        With a cache attached the page goes through ``get`` instead, so
+        cached pages are reused and cache-only mode stays offline.
+        """
+        if self.cache is not None:
+            response = self.get(url, headers=headers, **kwargs)
+            response.bytes_read = 0 if getattr(response, 'from_cache', False) else len(response.content)
+            response._content = head_markup(response.content)
+            return response
+
+        kwargs.setdefault('timeout', self.timeout)
+        response = self._send(url, headers, stream=True, **kwargs)
+        head = bytearray()
+        try:
+            if response.status_code == 200:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    start = max(0, len(head) - _HEAD_END_OVERLAP)
+                    head += chunk
+                    match = HEAD_END.search(head, start)
+                    if match:
+                        del head[match.end():]
+                        break
+        finally:
+            response.bytes_read = response.raw.tell()
+            response.close()
+        response._content = bytes(head)
+        return response
+
+    def set_cache(self, cache, cache_only=False):
+        """Attach a response cache (``None`` detaches it)."""
+        self.cache = cache
+        self.cache_only = cache_only
+
+    def set_throttling(self, rate_limiter=None, retry=None):
+        """Replace the rate limiter and retry policy (``None`` disables them)."""
+        self.rate_limiter = rate_limiter
+        self.retry = retry
+
+    def _send(self, url, headers, retry=True, **kwargs):
+        # Only GETs go through here, so every request is safe to repeat
+        attempt = 0
+        while True:
+            attempt += 1
+            limiter, policy = self.rate_limiter, self.retry if retry else None
+            if limiter is not None:
+                with metrics.timer('throttle'):
+                    limiter.acquire(url)
+            try:
+                response = self._send_once(url, headers, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if limiter is not None:
+                    limiter.feedback(url)
+                if policy is None or not policy.should_retry(attempt):
+                    raise
+                with metrics.timer('backoff'):
+                    time.sleep(policy.delay(attempt))
+                continue
+
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if limiter is not None:
+                limiter.feedback(url, response.status_code, retry_after)
+            if policy is None or not policy.should_retry(attempt, response.status_code):
+                return response
+            response.close()
+            with metrics.timer('backoff'):
+                time.sleep(policy.delay(attempt, retry_after))
+
+    def _send_once(self, url, headers, **kwargs):
+        slot = self._host_slot(url)
+        if slot is None:
+            response = self.session.get(url, headers=headers, **kwargs)
+        else:
+            with slot:
+                response = self.session.get(url, headers=headers, **kwargs)
+        # requests' elapsed ends once the headers are parsed: connect + time to
+        # first byte. Custom adapters may not set it.
+        if isinstance(response.elapsed, timedelta):
+            metrics.observe('ttfb', response.elapsed.total_seconds())
+        return response
+
+    def set_max_per_host(self, max_per_host):
+        """Change the per-host concurrency cap (``None`` disables it)."""
+        with self._host_slots_lock:
+            self.max_per_host = max_per_host
+            self._host_slots.clear()
+
+    def _host_slot(self, url):
+        if not self.max_per_host:
+            return None
+        host = urlsplit(url).netloc
+        with self._host_slots_lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.max_per_host)
+                self._host_slots[host] = slot
+            return slot
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide client, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient(host_pool_sizes=HOST_POOL_SIZES,
+                                 rate_limiter=AdaptiveRateLimiter(), retry=RetryPolicy())
+        return _client
+
+
+def set_client(client):
+    """Replace the process-wide client (e.g. with different pool sizes)."""
+    global _client
+    with _client_lock:
+        old_client, _client = _client, client
+    if old_client is not None and old_client is not client:
+        old_client.close()
+
+
+def get(url, headers=None, **kwargs):
+    """Drop-in replacement for ``requests.get`` that uses the shared client."""
+    return get_client().get(url, headers=headers, **kwargs)
+
+
+def get_head(url, headers=None, **kwargs):
+    """``HttpClient.get_head`` on the shared client."""
+    return get_client().get_head(url, headers=headers, **kwargs)
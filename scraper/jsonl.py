@@ -0,0 +1,30 @@
+"""
+Reading the append-only JSON Lines files of the crawl.
+
+Manifests, checkpoints, archive indexes and the jsonl sink only ever append
+to their files, so a crash can leave at most the last record cut short.
+``read_lines`` skips such a record; everything before it is valid.
+"""
+
+import json
+
+
+def read_lines(path, missing_ok=False):
+    """
+    Yield the records of the JSON Lines file at ``path``, skipping lines
+    that do not parse. With ``missing_ok`` a file that does not exist
+    yields nothing instead of raising ``FileNotFoundError``.
+    """
+    try:
+        file = open(path, encoding='utf-8')
+    except FileNotFoundError:
+        if missing_ok:
+            return
+        raise
+    with file:
+        for line in file:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # a record cut short by a crash
+                continue
@@ -0,0 +1,90 @@
+"""
+Lazy imports for the heavy third-party dependencies.
+
+Importing ``requests``, ``bs4``, ``aiohttp`` or ``pyarrow`` takes tens to
+hundreds of milliseconds each. ``lazy_import`` returns a stand-in that
+imports the real module on its first attribute access::
+
+    requests = lazy_import('requests')
+    ...
+    except requests.exceptions.RequestException:  # imported here, if not before
+
+so importing the scraper modules and the stages costs next to nothing until
+a page is actually fetched or parsed: ``--help`` answers at once and parse
+pool workers start quickly. ``optional=True`` returns None for a module
+that is not installed, like the ``try: import ... except ImportError``
+blocks it replaces.
+
+``lazy_exports`` does the same for a package's own names: the package
+re-exports functions from its submodules, which are imported when one of
+their names is first used.
+
+Unlike ``importlib.util.LazyLoader`` the stand-in never goes into
+``sys.modules``, so a plain ``import requests`` elsewhere is not affected,
+and the deferred import runs under the import system's own locks, so
+threads racing to it are safe.
+"""
+
+import importlib
+import importlib.util
+import sys
+
+
+class LazyModule:
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            module = self._module = importlib.import_module(self._name)
+        return module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attribute):
+        # only called for names not set on the stand-in itself
+        return getattr(self._load(), attribute)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        return f"<lazy module {self._name!r} ({'loaded' if self.loaded else 'not loaded'})>"
+
+
+def lazy_import(name, optional=False):
+    """Stand-in for module ``name``, imported on first use; None if ``optional`` and missing."""
+    if optional:
+        try:
+            if importlib.util.find_spec(name) is None:
+                return None
+        except ModuleNotFoundError:
+            # a missing parent package of a dotted name
+            return None
+    return LazyModule(name)
+
+
+def lazy_exports(package, exports):
+    """
+    Module ``__getattr__`` and ``__dir__`` for ``package``, re-exporting
+    ``exports`` (public name -> submodule) on first use::
+
+        __getattr__, __dir__ = lazy_exports(__name__, {'get': 'http_client'})
+    """
+    def __getattr__(name):
+        module = exports.get(name)
+        if module is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(f'{package}.{module}'), name)
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__():
+        return sorted(set(vars(sys.modules[package])) | set(exports))
+
+    return __getattr__, __dir__
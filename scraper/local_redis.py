@@ -0,0 +1,127 @@
+"""
+In-process stand-in for a Redis server.
+
+``LocalRedis`` implements the few commands ``scraper.frontier.RedisFrontier``
+uses, with the return values of a ``redis.Redis(decode_responses=True)``
+client, so the Redis frontier can be tested without a server or the
+``redis`` package. Every command is atomic, like on a real server; several
+threads can share one instance as if it were one server. ``transaction``
+runs the whole WATCH/MULTI/EXEC callable under the server's lock, so it
+never has to be retried.
+"""
+
+import threading
+
+
+class LocalPipeline:
+    # Commands run at once until multi(), then are queued for execute()
+
+    def __init__(self, server):
+        self._server = server
+        self._queued = None
+
+    def multi(self):
+        self._queued = []
+
+    def execute(self):
+        queued, self._queued = self._queued or [], None
+        return [getattr(self._server, name)(*args, **kwargs) for name, args, kwargs in queued]
+
+    def __getattr__(self, name):
+        command = getattr(self._server, name)
+        if self._queued is None:
+            return command
+
+        def queue(*args, **kwargs):
+            self._queued.append((name, args, kwargs))
+        return queue
+
+
+class LocalRedis:
+
+    def __init__(self):
+        self._data = {}
+        # reentrant: a transaction holds it while its commands run
+        self._lock = threading.RLock()
+
+    def transaction(self, func, *watches, value_from_callable=False):
+        with self._lock:
+            pipe = LocalPipeline(self)
+            value = func(pipe)
+            results = pipe.execute()
+        return value if value_from_callable else results
+
+    def _get(self, key, kind):
+        return self._data.setdefault(key, kind())
+
+    def incr(self, key):
+        with self._lock:
+            self._data[key] = int(self._data.get(key, 0)) + 1
+            return self._data[key]
+
+    def hexists(self, key, field):
+        with self._lock:
+            return field in self._data.get(key, {})
+
+    def hset(self, key, field, value):
+        with self._lock:
+            values = self._get(key, dict)
+            added = field not in values
+            values[field] = str(value)
+            return int(added)
+
+    def hget(self, key, field):
+        with self._lock:
+            return self._data.get(key, {}).get(field)
+
+    def hincrby(self, key, field, amount=1):
+        with self._lock:
+            values = self._get(key, dict)
+            values[field] = str(int(values.get(field, 0)) + amount)
+            return int(values[field])
+
+    def sadd(self, key, *members):
+        with self._lock:
+            values = self._get(key, set)
+            added = len(set(members) - values)
+            values.update(members)
+            return added
+
+    def scard(self, key):
+        with self._lock:
+            return len(self._data.get(key, ()))
+
+    def zadd(self, key, mapping):
+        with self._lock:
+            scores = self._get(key, dict)
+            added = len(set(mapping) - set(scores))
+            scores.update((member, float(score)) for member, score in mapping.items())
+            return added
+
+    def zrem(self, key, *members):
+        with self._lock:
+            scores = self._data.get(key, {})
+            return sum(scores.pop(member, None) is not None for member in members)
+
+    def zcard(self, key):
+        with self._lock:
+            return len(self._data.get(key, ()))
+
+    def _sorted(self, key):
+        # members in Redis order: by score, ties by member
+        return sorted(self._data.get(key, {}).items(), key=lambda item: (item[1], item[0]))
+
+    def zscore(self, key, member):
+        with self._lock:
+            return self._data.get(key, {}).get(member)
+
+    def zrange(self, key, start, end, withscores=False):
+        with self._lock:
+            items = self._sorted(key)
+            items = items[start:end + 1 if end != -1 else None]
+            return items if withscores else [member for member, _ in items]
+
+    def zrangebyscore(self, key, min, max):
+        with self._lock:
+            low, high = float(min), float(max)
+            return [member for member, score in self._sorted(key) if low <= score <= high]
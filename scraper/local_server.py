@@ -0,0 +1,139 @@
+"""
+Small local HTTP server used as a stand-in for remote sites.
+
+Tests and benchmarks use it to serve canned pages over a real socket, so
+connection reuse and request counts can be observed without internet access.
+``latency`` delays every response and ``bandwidth`` caps how fast a body
+is sent, to mimic a remote server.
+"""
+
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BANDWIDTH_CHUNK_SIZE = 16 * 1024
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps the connection open between requests
+    protocol_version = 'HTTP/1.1'
+    # headers and body are written separately; don't let Nagle delay the body
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.owner._count_connection()
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            # the client hung up without reading everything (e.g. a head-only fetch)
+            pass
+
+    def do_GET(self):
+        owner = self.server.owner
+        owner._record_request(self)
+        if owner.latency:
+            time.sleep(owner.latency)
+
+        status, headers, body = owner._resolve(self)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if not owner.bandwidth:
+            self.wfile.write(body)
+            return
+        for start in range(0, len(body), BANDWIDTH_CHUNK_SIZE):
+            chunk = body[start:start + BANDWIDTH_CHUNK_SIZE]
+            # a chunk arrives once it could have crossed the link
+            time.sleep(len(chunk) / owner.bandwidth)
+            self.wfile.write(chunk)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalServer:
+    """
+    Serve ``routes`` on 127.0.0.1 from a background thread.
+
+    A route maps a request path (with or without the query string) to either
+    the response body, a ``(status, headers, body)`` tuple, or a callable that
+    receives the request handler and returns such a tuple. ``latency`` is in
+    seconds per response, ``bandwidth`` in bytes per second per response.
+    """
+
+    def __init__(self, routes=None, latency=0.0, bandwidth=None):
+        self.routes = dict(routes or {})
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.hits = Counter()
+        self.connections = 0
+        self.requests = []
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.owner = self
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        kwargs={'poll_interval': 0.05}, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, path='/'):
+        return self.base_url + path
+
+    def reset_counters(self):
+        with self._lock:
+            self.hits.clear()
+            self.connections = 0
+            self.requests.clear()
+
+    def _count_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    def _record_request(self, handler):
+        with self._lock:
+            self.hits[handler.path] += 1
+            self.requests.append((handler.path, dict(handler.headers)))
+
+    def _resolve(self, handler):
+        route = self.routes.get(handler.path)
+        if route is None:
+            route = self.routes.get(handler.path.split('?', 1)[0])
+        if route is None:
+            return 404, {'Content-Type': 'text/plain'}, b'Not Found'
+        if callable(route):
+            route = route(handler)
+        if isinstance(route, tuple):
+            status, headers, body = route
+        else:
+            status, headers, body = 200, {'Content-Type': 'text/html; charset=utf-8'}, route
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        return status, headers, body
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
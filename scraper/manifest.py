@@ -0,0 +1,111 @@
+"""
+Persistent manifest of saved articles for incremental crawls.
+
+The manifest is an append-only JSON Lines file; every saved (or re-checked)
+article appends one record ``{url, path, sha256, fetched_at}`` and the last
+record for a URL wins when the file is loaded. It answers two questions:
+
+* has this URL already been saved (and is the file still there)?
+* does a file with exactly this content already exist at this path?
+
+``merge_manifests`` combines the manifests of a sharded crawl.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from scraper.jsonl import read_lines
+
+
+def content_digest(content):
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def read_entries(path):
+    """Yield the records of the manifest at ``path`` (none if it does not exist)."""
+    return read_lines(path, missing_ok=True)
+
+
+def merge_manifests(path, sources):
+    """
+    Merge the manifests ``sources`` into the one at ``path`` (which may not
+    exist yet); per URL the most recent entry wins. Returns the number of
+    URLs in the result.
+    """
+    for source in sources:
+        if not os.path.exists(source):
+            raise FileNotFoundError(source)
+    entries = {}
+    for source in [path, *sources]:
+        for entry in read_entries(source):
+            current = entries.get(entry['url'])
+            if current is None or entry['fetched_at'] >= current['fetched_at']:
+                entries[entry['url']] = entry
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        for entry in entries.values():
+            file.write(json.dumps(entry) + '\n')
+    os.replace(temp_path, path)
+    return len(entries)
+
+
+class Manifest:
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.entries = {}
+        self._digests = {}
+        self._lock = threading.Lock()
+        lines = self._load()
+        if lines > 2 * len(self.entries) + 100:
+            self._compact()
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _load(self):
+        lines = 0
+        for entry in read_entries(self.path):
+            lines += 1
+            self._remember(entry)
+        return lines
+
+    def _compact(self):
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            for entry in self.entries.values():
+                file.write(json.dumps(entry) + '\n')
+        os.replace(temp_path, self.path)
+
+    def _remember(self, entry):
+        self.entries[entry['url']] = entry
+        self._digests[entry['path']] = entry['sha256']
+
+    def __contains__(self, url):
+        entry = self.entries.get(url)
+        return entry is not None and os.path.exists(entry['path'])
+
+    def __len__(self):
+        return len(self.entries)
+
+    def is_current(self, path, digest):
+        """True if ``path`` exists and was last written with content ``digest``."""
+        return self._digests.get(path) == digest and os.path.exists(path)
+
+    def record(self, url, path, digest):
+        entry = {'url': url, 'path': path, 'sha256': digest, 'fetched_at': time.time()}
+        with self._lock:
+            self._remember(entry)
+            self._file.write(json.dumps(entry) + '\n')
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,173 @@
+"""
+Configurable HTML parser backends.
+
+BeautifulSoup can sit on top of several parsers; the pure Python
+``html.parser`` is the slowest of them. The default here is ``lxml`` when it
+is installed. On top of the BeautifulSoup backends there is an optional
+``lxml.html`` fast path that skips BeautifulSoup entirely and returns an
+lxml element tree, which the stage functions query with XPath.
+
+bs4 and lxml are imported on the first parse, not with this module.
+"""
+
+import os
+import threading
+
+from scraper.lazy import lazy_import
+
+bs4 = lazy_import('bs4')
+# the lxml.html module, None when lxml is not installed
+lxml_html = lazy_import('lxml.html', optional=True)
+
+LXML_FAST_PATH = 'lxml.html'
+SOUP_BACKENDS = ('lxml', 'html.parser', 'html5lib')
+BACKENDS = SOUP_BACKENDS + (LXML_FAST_PATH,)
+DEFAULT_BACKEND = 'lxml' if lxml_html is not None else 'html.parser'
+
+_backend = os.environ.get('SCRAPER_PARSER', DEFAULT_BACKEND)
+_thread_local = threading.local()
+
+
+def get_backend():
+    return _backend
+
+
+def set_backend(backend):
+    """Select the backend used by ``parse_document``/``make_soup``."""
+    global _backend
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown parser backend {backend!r}, expected one of {BACKENDS}")
+    if backend in ('lxml', LXML_FAST_PATH) and lxml_html is None:
+        raise ValueError(f"Parser backend {backend!r} requires lxml to be installed")
+    _backend = backend
+
+
+def soup_backend(backend=None):
+    """BeautifulSoup parser name for ``backend`` (the fast path maps to ``lxml``)."""
+    backend = backend or _backend
+    return 'lxml' if backend == LXML_FAST_PATH else backend
+
+
+def make_soup(markup, backend=None, parse_only=None):
+    """Parse ``markup`` into a BeautifulSoup object with the configured parser."""
+    if isinstance(parse_only, TagStrainer):
+        parse_only = parse_only.soup_strainer()
+    return bs4.BeautifulSoup(markup, soup_backend(backend), parse_only=parse_only)
+
+
+def parse_document(markup, backend=None, parse_only=None):
+    """
+    Parse ``markup`` with the configured backend.
+
+    Returns an lxml element for the ``lxml.html`` fast path and a
+    BeautifulSoup object otherwise. ``parse_only`` is a SoupStrainer that
+    limits which parts of the page are turned into soup objects; the lxml
+    fast path builds the whole (cheap) C tree and ignores it.
+    """
+    backend = backend or _backend
+    if backend == LXML_FAST_PATH:
+        if isinstance(markup, str):
+            # lxml refuses str input that carries an encoding declaration,
+            # so hand it UTF-8 bytes and tell it so
+            return lxml_html.document_fromstring(markup.encode('utf-8'),
+                                                 parser=_utf8_html_parser())
+        return lxml_html.document_fromstring(markup)
+    return make_soup(markup, backend, parse_only)
+
+
+class TagStrainer:
+    """
+    SoupStrainer driven by a ``keep(name, attrs)`` predicate.
+
+    A plain SoupStrainer can only AND its rules together and compares the
+    raw ``class`` attribute as a whole string while parsing, so it cannot
+    express "an h1, or a div with one of these classes". Kept elements are
+    retained with their complete subtree; everything else is dropped.
+
+    Creating one does not import bs4: ``make_soup`` turns it into the actual
+    SoupStrainer (``soup_strainer()``) on the first parse.
+    """
+
+    def __init__(self, keep):
+        self.keep = keep
+        self._soup_strainer = None
+
+    def soup_strainer(self):
+        strainer = self._soup_strainer
+        if strainer is None:
+            strainer = self._soup_strainer = _soup_tag_strainer_class()(self.keep)
+        return strainer
+
+
+_strainer_class = None
+_strainer_class_lock = threading.Lock()
+
+
+def _soup_tag_strainer_class():
+    # The SoupStrainer subclass behind TagStrainer; defined on first use,
+    # since subclassing imports bs4
+    global _strainer_class
+    with _strainer_class_lock:
+        if _strainer_class is None:
+            _strainer_class = _define_soup_tag_strainer()
+        return _strainer_class
+
+
+def _define_soup_tag_strainer():
+
+    class SoupTagStrainer(bs4.SoupStrainer):
+
+        def __init__(self, keep):
+            super().__init__()
+            self.keep = keep
+
+        @property
+        def includes_everything(self):
+            return False
+
+        @property
+        def excludes_everything(self):
+            return False
+
+        # Used while parsing by beautifulsoup4 >= 4.13
+        def allow_tag_creation(self, nsprefix, name, attrs):
+            return bool(self.keep(name, attrs or {}))
+
+        def allow_string_creation(self, string):
+            return False
+
+        # Used while parsing by older beautifulsoup4 releases
+        def search_tag(self, markup_name=None, markup_attrs={}):
+            if isinstance(markup_name, bs4.Tag):
+                markup_name, markup_attrs = markup_name.name, markup_name.attrs
+            return markup_name if self.keep(markup_name, markup_attrs or {}) else None
+
+    return SoupTagStrainer
+
+
+def class_tokens(attrs):
+    """Class names from a raw or already split ``class`` attribute."""
+    value = attrs.get('class') or ''
+    return value.split() if isinstance(value, str) else list(value)
+
+
+def _utf8_html_parser():
+    # lxml parser objects must not be shared between threads
+    parser = getattr(_thread_local, 'utf8_parser', None)
+    if parser is None:
+        parser = _thread_local.utf8_parser = lxml_html.HTMLParser(encoding='utf-8')
+    return parser
+
+
+def is_lxml_tree(document):
+    return lxml_html is not None and isinstance(document, lxml_html.HtmlElement)
+
+
+def has_class_xpath(tag, cls):
+    """XPath matching ``tag`` elements whose class list contains ``cls``."""
+    return f'//{tag}[contains(concat(" ", normalize-space(@class), " "), " {cls} ")]'
+
+
+def element_text(element):
+    """lxml equivalent of BeautifulSoup's ``get_text(strip=True)``."""
+    return "".join(text.strip() for text in element.itertext())
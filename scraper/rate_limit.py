@@ -0,0 +1,115 @@
+"""
+Adaptive per-host rate limiting.
+
+Every host gets a token bucket: requests spend a token and tokens refill at
+``rate`` per second, up to ``burst``. The rate adapts to how the server
+reacts (additive increase, multiplicative decrease):
+
+* every successful response raises the host's rate by ``increase``,
+* a ``429``/``503``, another 5xx or a connection error cuts it by
+  ``decrease``,
+* a ``Retry-After`` header pauses the host for that long.
+
+So a crawl settles near the highest rate the server tolerates.
+"""
+
+import threading
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_RATE = 10.0
+DEFAULT_BURST = 10
+MIN_RATE = 0.2
+MAX_RATE = 100.0
+# requests/second added per successful response
+DEFAULT_INCREASE = 0.5
+# factor applied to the rate when the server pushes back
+DEFAULT_DECREASE = 0.5
+THROTTLE_STATUSES = frozenset({429, 503})
+
+
+class TokenBucket:
+    """Thread-safe token bucket; ``reserve`` books a token and says how long to wait for it."""
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = float(burst)
+        self.paused_until = 0.0
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self):
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            # tokens may go negative: later callers queue up behind this one
+            self.tokens -= 1
+            wait = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+            return max(wait, self.paused_until - now)
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill(self.clock())
+            self.rate = rate
+
+    def pause(self, seconds):
+        with self._lock:
+            self.paused_until = max(self.paused_until, self.clock() + seconds)
+
+
+class AdaptiveRateLimiter:
+    """Per-host token buckets whose rate follows the server's responses."""
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, min_rate=MIN_RATE,
+                 max_rate=MAX_RATE, increase=DEFAULT_INCREASE, decrease=DEFAULT_DECREASE,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.clock = clock
+        self.sleep = sleep
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.burst, self.clock)
+            return bucket
+
+    def reserve(self, url):
+        """Book a request to ``url``'s host; returns the seconds to wait before sending."""
+        return self.bucket(url).reserve()
+
+    def acquire(self, url):
+        """Block until a request to ``url``'s host may be sent."""
+        wait = self.reserve(url)
+        if wait > 0:
+            self.sleep(wait)
+
+    def feedback(self, url, status=None, retry_after=None):
+        """
+        Adapt the host's rate to a response ``status`` (``None`` for a
+        connection error) and honour its ``Retry-After`` (seconds).
+        """
+        bucket = self.bucket(url)
+        if retry_after:
+            bucket.pause(retry_after)
+        if status is None or status in THROTTLE_STATUSES or status >= 500:
+            bucket.set_rate(max(self.min_rate, bucket.rate * self.decrease))
+        elif status < 400:
+            bucket.set_rate(min(self.max_rate, bucket.rate + self.increase))
+
+    def host_rate(self, url):
+        return self.bucket(url).rate
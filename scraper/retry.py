@@ -0,0 +1,119 @@
+"""
+Retry policy and retry queue for idempotent GETs.
+
+``RetryPolicy`` decides which failures are worth another attempt (429, 5xx
+and connection errors) and how long to wait: exponential backoff with full
+jitter, but never less than the server's ``Retry-After``.
+
+``RetryQueue`` holds work items that failed so the caller can move on and
+come back to them once their backoff has passed, instead of one failing
+article holding up the rest of a crawl.
+"""
+
+import email.utils
+import heapq
+import itertools
+import random
+import time
+
+from scraper.lazy import lazy_import
+
+requests = lazy_import('requests')
+
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+DEFAULT_MAX_BACKOFF = 30.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def parse_retry_after(value, now=None):
+    """Seconds to wait from a ``Retry-After`` header (delay-seconds or HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+    return max(0.0, when - (time.time() if now is None else now))
+
+
+def retry_after_of(error):
+    """``Retry-After`` of the response behind a ``requests`` exception, if any."""
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    return parse_retry_after(response.headers.get('Retry-After'))
+
+
+def is_retryable(error):
+    """True for connection problems and HTTP errors with a retryable status."""
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    response = getattr(error, 'response', None)
+    return response is not None and response.status_code in RETRY_STATUSES
+
+
+class RetryPolicy:
+
+    def __init__(self, max_retries=DEFAULT_MAX_RETRIES, backoff=DEFAULT_BACKOFF,
+                 max_backoff=DEFAULT_MAX_BACKOFF, statuses=RETRY_STATUSES, random=random.random):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = statuses
+        self.random = random
+
+    def should_retry(self, attempt, status=None):
+        """Whether failed attempt number ``attempt`` (1-based) gets another try."""
+        return attempt <= self.max_retries and (status is None or status in self.statuses)
+
+    def delay(self, attempt, retry_after=None):
+        """Full-jitter exponential backoff before retrying after ``attempt``."""
+        ceiling = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        delay = self.random() * ceiling
+        return max(delay, retry_after or 0.0)
+
+
+class RetryQueue:
+    """Failed items ordered by when they may be tried again."""
+
+    def __init__(self, policy=None, clock=time.monotonic, sleep=time.sleep):
+        # without a policy nothing is retried: every push fails the item
+        self.policy = policy
+        self.clock = clock
+        self.sleep = sleep
+        self.failed = []
+        self._heap = []
+        self._order = itertools.count()
+
+    def push(self, item, attempt, error=None, retry_after=None):
+        """
+        Schedule ``item`` after its ``attempt``-th failure. Returns False and
+        records it in ``failed`` once the policy gives up on it.
+        """
+        if self.policy is None or not self.policy.should_retry(attempt):
+            self.failed.append((item, error))
+            return False
+        due = self.clock() + self.policy.delay(attempt, retry_after)
+        heapq.heappush(self._heap, (due, next(self._order), item, attempt))
+        return True
+
+    def pop_due(self):
+        """Wait for the earliest item and return every ``(item, attempt)`` due by then."""
+        if not self._heap:
+            return []
+        wait = self._heap[0][0] - self.clock()
+        if wait > 0:
+            self.sleep(wait)
+        now = self.clock()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, _, item, attempt = heapq.heappop(self._heap)
+            due.append((item, attempt))
+        return due
+
+    def __len__(self):
+        return len(self._heap)
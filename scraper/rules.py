@@ -0,0 +1,213 @@
+"""
+Declarative extraction rules, compiled into a single-pass matcher.
+
+A rule set is a plain dict (or JSON file) of selectors::
+
+    {
+        "title":     {"tag": "h1", "split": "|"},
+        "body":      [{"tag": "div", "class": "c-article-body"}, ...],
+        "paragraph": {"tag": "p"},
+        "card":      {"tag": "article"},
+        "type":      {"tag": "span", "attrs": {"data-test": "article.type"}},
+        "link":      {"tag": "a", "attrs": {"data-track-action": "view article"}}
+    }
+
+A selector matches elements by tag, optionally by one class name and by
+exact attribute values. ``body`` lists the article body containers by
+priority: the first one present on a page wins and its paragraphs are the
+article text; without one (or if it holds no paragraphs) every paragraph of
+the page is used. ``title`` takes the text before ``split``. Listing pages
+are read card by card: the first ``type`` and ``link`` element in each card.
+
+``ExtractionRules`` turns the selectors into tag/class lookup tables once,
+so an article page is scanned in one pass for its title, every body
+candidate and the fallback paragraphs, instead of one full-tree search per
+body container. Both BeautifulSoup documents and the lxml fast path work.
+It also counts which body rule matched on which site (``hits``), which shows
+the layouts a site really uses and the rules that never match. Another
+process's counts are carried over with ``pop_hits`` and ``merge_hits``.
+"""
+
+import json
+import threading
+
+from scraper import parsing
+
+RULE_KEYS = ('title', 'body', 'paragraph', 'card', 'type', 'link')
+FALLBACK = 'fallback'
+
+
+class Selector:
+
+    def __init__(self, tag, cls=None, attrs=None, name=None):
+        self.tag = tag
+        self.cls = cls
+        self.attrs = dict(attrs or {})
+        self.name = name or (f"{tag}.{cls}" if cls else tag)
+
+    @classmethod
+    def from_spec(cls, spec):
+        if 'tag' not in spec:
+            raise ValueError(f"Selector {spec!r} needs a 'tag'")
+        return cls(spec['tag'], spec.get('class'), spec.get('attrs'), spec.get('name'))
+
+    def matches(self, tag, attrs):
+        if tag != self.tag:
+            return False
+        if self.cls is not None and self.cls not in parsing.class_tokens(attrs):
+            return False
+        return all(attrs.get(key) == value for key, value in self.attrs.items())
+
+
+def _descendants(element, lxml_tree, tags):
+    # the tag filter runs inside lxml/BeautifulSoup, so only candidate
+    # elements reach the Python-level selector checks
+    if lxml_tree:
+        return element.iterdescendants(*tags)
+    return element.find_all(list(tags))
+
+
+def _tag_and_attrs(element, lxml_tree):
+    return (element.tag, element.attrib) if lxml_tree else (element.name, element.attrs)
+
+
+def _find_first(element, selector, lxml_tree):
+    if not lxml_tree:
+        # find() stops at the first match instead of listing every candidate
+        return element.find(lambda tag: tag.name == selector.tag and selector.matches(tag.name, tag.attrs))
+    for child in element.iterdescendants(selector.tag):
+        if selector.matches(child.tag, child.attrib):
+            return child
+    return None
+
+
+def _stripped_text(element, lxml_tree):
+    return parsing.element_text(element) if lxml_tree else element.get_text(strip=True)
+
+
+def _full_text(element, lxml_tree):
+    return element.text_content() if lxml_tree else element.text
+
+
+class ExtractionRules:
+
+    def __init__(self, spec):
+        missing = [key for key in RULE_KEYS if key not in spec]
+        if missing:
+            raise ValueError(f"Extraction rules lack {', '.join(missing)}")
+        self.spec = spec
+        self.title = Selector.from_spec(spec['title'])
+        self.title_split = spec['title'].get('split')
+        self.bodies = [Selector.from_spec(body) for body in spec['body']]
+        self.paragraph = Selector.from_spec(spec['paragraph'])
+        self.card = Selector.from_spec(spec['card'])
+        self.type = Selector.from_spec(spec['type'])
+        self.link = Selector.from_spec(spec['link'])
+        # (tag, class) -> body rule indexes, and tag -> indexes of class-less rules
+        self._bodies_by_class = {}
+        self._bodies_by_tag = {}
+        for index, body in enumerate(self.bodies):
+            if body.cls is not None:
+                self._bodies_by_class.setdefault((body.tag, body.cls), []).append(index)
+            else:
+                self._bodies_by_tag.setdefault(body.tag, []).append(index)
+        self._body_tags = {body.tag for body in self.bodies}
+        self._article_tags = sorted({self.title.tag, self.paragraph.tag} | self._body_tags)
+        self.hits = {}
+        self._lock = threading.Lock()
+
+    def _matching_bodies(self, tag, attrs):
+        if tag not in self._body_tags:
+            return []
+        indexes = list(self._bodies_by_tag.get(tag, ()))
+        for token in parsing.class_tokens(attrs):
+            indexes.extend(self._bodies_by_class.get((tag, token), ()))
+        return [index for index in indexes if self.bodies[index].matches(tag, attrs)]
+
+    def is_article_part(self, tag, attrs):
+        """Strainer predicate: title, paragraphs and body containers."""
+        return (self.title.matches(tag, attrs) or self.paragraph.matches(tag, attrs)
+                or bool(self._matching_bodies(tag, attrs)))
+
+    def is_listing_part(self, tag, attrs):
+        """Strainer predicate: listing cards."""
+        return self.card.matches(tag, attrs)
+
+    def extract_article(self, document, site=None):
+        """``(title, paragraph texts)`` of an article page; title is None without one."""
+        lxml_tree = parsing.is_lxml_tree(document)
+        title = None
+        found = [None] * len(self.bodies)
+        paragraphs = []
+        for element in _descendants(document, lxml_tree, self._article_tags):
+            tag, attrs = _tag_and_attrs(element, lxml_tree)
+            if title is None and self.title.matches(tag, attrs):
+                title = element
+            if self.paragraph.matches(tag, attrs):
+                paragraphs.append(element)
+            for index in self._matching_bodies(tag, attrs):
+                if found[index] is None:
+                    found[index] = element
+
+        rule = FALLBACK
+        for body, container in zip(self.bodies, found):
+            if container is not None:
+                rule = body.name
+                # only this container's subtree is searched again
+                in_body = [element for element in _descendants(container, lxml_tree, (self.paragraph.tag,))
+                           if self.paragraph.matches(*_tag_and_attrs(element, lxml_tree))]
+                paragraphs = in_body or paragraphs
+                break
+        self.record_hit(site, rule)
+
+        texts = [_stripped_text(paragraph, lxml_tree) for paragraph in paragraphs]
+        if title is None:
+            return None, texts
+        title_text = _stripped_text(title, lxml_tree)
+        if self.title_split:
+            title_text = title_text.split(self.title_split)[0].strip()
+        return title_text, texts
+
+    def extract_cards(self, document):
+        """``(type, href, link text)`` per listing card, ``None`` for missing parts."""
+        lxml_tree = parsing.is_lxml_tree(document)
+        cards = []
+        for card in _descendants(document, lxml_tree, (self.card.tag,)):
+            if not self.card.matches(*_tag_and_attrs(card, lxml_tree)):
+                continue
+            type_tag = _find_first(card, self.type, lxml_tree)
+            article_type = _full_text(type_tag, lxml_tree).strip() if type_tag is not None else None
+            href = title = None
+            link = _find_first(card, self.link, lxml_tree)
+            if link is not None:
+                href = link.get('href')
+                title = _stripped_text(link, lxml_tree)
+            cards.append((article_type, href, title))
+        return cards
+
+    def record_hit(self, site, rule, count=1):
+        with self._lock:
+            counts = self.hits.setdefault(site, {})
+            counts[rule] = counts.get(rule, 0) + count
+
+    def pop_hits(self):
+        """The hits counted so far, starting a fresh count."""
+        with self._lock:
+            hits, self.hits = self.hits, {}
+        return hits
+
+    def merge_hits(self, hits):
+        """Add hits counted elsewhere, e.g. by another process's rules."""
+        for site, counts in hits.items():
+            for rule, count in counts.items():
+                self.record_hit(site, rule, count)
+
+
+def load_rules(path, defaults=None):
+    """
+    Rules from a JSON file. Keys missing from the file are taken from
+    ``defaults``, so a file can, for example, override only ``body``.
+    """
+    with open(path, encoding='utf-8') as file:
+        spec = json.load(file)
+    return ExtractionRules({**(defaults or {}), **spec})
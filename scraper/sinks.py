@@ -0,0 +1,238 @@
+"""
+Structured output sinks for scraped articles.
+
+Instead of one small ``.txt`` file per article, a sink appends records
+``{url, title, type, page, text, fetched_at}`` to a single output:
+
+* ``jsonl``   - buffered, append-only JSON Lines,
+* ``sqlite``  - batched inserts, one transaction per batch (re-scraped URLs
+  replace their old row),
+* ``parquet`` - columnar row groups; needs the optional ``pyarrow``. A
+  Parquet file cannot be appended to, so each run rewrites it (stage5
+  rejects it for incremental and resumed crawls).
+* ``archive`` - a content-addressed, compressed archive directory
+  (``scraper.archive``); identical texts are stored once.
+
+Sinks are not thread-safe; the crawls write from a single thread.
+
+``read_records`` reads any of them back, and ``merge_sinks`` combines
+several outputs of one kind (e.g. those of a sharded crawl) into one.
+"""
+
+import json
+import os
+import sqlite3
+import time
+
+from scraper.archive import Archive
+from scraper.jsonl import read_lines
+from scraper.lazy import lazy_import
+
+# None when pyarrow is not installed
+pyarrow = lazy_import('pyarrow', optional=True)
+pyarrow_parquet = lazy_import('pyarrow.parquet')
+
+SINKS = ('jsonl', 'sqlite', 'parquet', 'archive')
+DEFAULT_PATHS = {
+    'jsonl': 'articles.jsonl',
+    'sqlite': 'articles.sqlite3',
+    'parquet': 'articles.parquet',
+    'archive': 'articles-archive',
+}
+FIELDS = ('url', 'title', 'type', 'page', 'text', 'fetched_at')
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_ROW_GROUP_SIZE = 10000
+
+
+def make_record(url, title, article_type, page, text):
+    return {'url': url, 'title': title, 'type': article_type, 'page': page,
+            'text': text, 'fetched_at': time.time()}
+
+
+class Sink:
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.count = 0
+
+    def write(self, record):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class JsonLinesSink(Sink):
+
+    def __init__(self, path, buffer_size=DEFAULT_BUFFER_SIZE):
+        super().__init__(path)
+        self._file = open(self.path, 'a', encoding='utf-8', buffering=buffer_size)
+
+    def write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.count += 1
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class SQLiteSink(Sink):
+
+    def __init__(self, path, batch_size=DEFAULT_BATCH_SIZE):
+        super().__init__(path)
+        self.batch_size = batch_size
+        self._pending = []
+        self._db = sqlite3.connect(self.path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            " url TEXT PRIMARY KEY, title TEXT, type TEXT, page INTEGER,"
+            " text TEXT, fetched_at REAL)"
+        )
+        self._db.commit()
+
+    def write(self, record):
+        self._pending.append(tuple(record.get(field) for field in FIELDS))
+        self.count += 1
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        with self._db:
+            self._db.executemany(
+                f"INSERT OR REPLACE INTO articles ({', '.join(FIELDS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                self._pending
+            )
+        self._pending.clear()
+
+    def close(self):
+        self.flush()
+        self._db.close()
+
+
+class ParquetSink(Sink):
+
+    def __init__(self, path, row_group_size=DEFAULT_ROW_GROUP_SIZE):
+        if pyarrow is None:
+            raise ImportError("The parquet sink requires pyarrow (pip install pyarrow)")
+        super().__init__(path)
+        self.row_group_size = row_group_size
+        self.schema = pyarrow.schema([
+            ('url', pyarrow.string()), ('title', pyarrow.string()), ('type', pyarrow.string()),
+            ('page', pyarrow.int32()), ('text', pyarrow.string()), ('fetched_at', pyarrow.float64()),
+        ])
+        self._pending = []
+        self._writer = pyarrow_parquet.ParquetWriter(self.path, self.schema)
+
+    def write(self, record):
+        self._pending.append(record)
+        self.count += 1
+        if len(self._pending) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        columns = {field: [record.get(field) for record in self._pending] for field in FIELDS}
+        self._writer.write_table(pyarrow.table(columns, schema=self.schema))
+        self._pending.clear()
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+
+
+class ArchiveSink(Sink):
+    """Texts go to compressed blobs; url, title, type and page to the archive index."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.archive = Archive(self.path)
+
+    def write(self, record):
+        self.archive.put(record['url'], record['text'], title=record.get('title'),
+                         type=record.get('type'), page=record.get('page'))
+        self.count += 1
+
+    def flush(self):
+        self.archive.flush()
+
+    def close(self):
+        self.archive.close()
+
+
+def read_records(kind, path):
+    """Yield the records stored by the ``kind`` sink at ``path``, in write order."""
+    if kind == 'jsonl':
+        yield from read_lines(path)
+    elif kind == 'sqlite':
+        db = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+        try:
+            for row in db.execute(f"SELECT {', '.join(FIELDS)} FROM articles ORDER BY rowid"):
+                yield dict(zip(FIELDS, row))
+        finally:
+            db.close()
+    elif kind == 'parquet':
+        if pyarrow is None:
+            raise ImportError("The parquet sink requires pyarrow (pip install pyarrow)")
+        for batch in pyarrow_parquet.ParquetFile(path).iter_batches():
+            yield from batch.to_pylist()
+    elif kind == 'archive':
+        if not os.path.isdir(path):
+            raise FileNotFoundError(path)
+        with Archive(path) as archive:
+            for url, entry in list(archive.entries.items()):
+                yield {'url': url, 'title': entry.get('title'), 'type': entry.get('type'),
+                       'page': entry.get('page'), 'text': archive.get_text(url),
+                       'fetched_at': entry.get('stored_at')}
+    else:
+        raise ValueError(f"Unknown sink {kind!r}; choose from {', '.join(SINKS)}")
+
+
+def merge_sinks(kind, sources, path=None):
+    """
+    Write the records of the ``kind`` outputs ``sources`` into one ``kind``
+    sink at ``path``. A URL found in several sources is written once, from
+    its latest fetch. Returns the number of records written.
+    """
+    # First pass: where the latest record of every URL is; texts stay on disk
+    latest = {}
+    for source_index, source in enumerate(sources):
+        for position, record in enumerate(read_records(kind, source)):
+            fetched_at = record.get('fetched_at') or 0
+            current = latest.get(record['url'])
+            if current is None or fetched_at >= current[0]:
+                latest[record['url']] = (fetched_at, source_index, position)
+
+    with open_sink(kind, path) as sink:
+        for source_index, source in enumerate(sources):
+            for position, record in enumerate(read_records(kind, source)):
+                if latest[record['url']][1:] == (source_index, position):
+                    sink.write(record)
+        return sink.count
+
+
+def open_sink(kind, path=None):
+    """Open the sink named ``kind`` at ``path`` (or its default file name)."""
+    if kind not in SINKS:
+        raise ValueError(f"Unknown sink {kind!r}; choose from {', '.join(SINKS)}")
+    path = path or DEFAULT_PATHS[kind]
+    directory = os.path.dirname(str(path))
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return {'jsonl': JsonLinesSink, 'sqlite': SQLiteSink, 'parquet': ParquetSink,
+            'archive': ArchiveSink}[kind](path)
@@ -0,0 +1,87 @@
+"""
+Synthetic Nature.com stand-in site for offline benchmarks.
+
+``SyntheticSite`` generates listing pages (``/nature/articles?page=N``) and
+article pages (``/articles/<id>``) shaped like the real site and the test
+fixtures. Listing cards carry the ``article.type`` span and the ``view
+article`` link. Article pages have an ``<h1>`` title and a
+``c-article-body`` container with a teaser (what stage4 extracts) and
+body paragraphs (what stage5 extracts). Both are wrapped in navigation and
+footer chrome of a configurable size, so parsers do realistic work.
+
+All pages are generated once from a seed, so every run serves the same
+bytes. ``routes()`` plugs them into ``local_server.LocalServer``.
+"""
+
+import html
+import random
+
+LISTING_PATH = '/nature/articles?page='
+OTHER_TYPES = ('Research', 'News & Views', 'Editorial', 'Comment')
+WORDS = ('cell', 'climate', 'data', 'gene', 'model', 'ocean', 'protein', 'quantum', 'signal',
+         'star', 'survey', 'virus', 'brain', 'carbon', 'energy', 'field', 'growth', 'light',
+         'network', 'particle', 'pressure', 'sample', 'structure', 'temperature', 'water')
+
+
+def _sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def _chrome(rng, size):
+    # navigation links and footer text, about ``size`` bytes in total
+    links, footer = [], []
+    while sum(map(len, links)) < size // 2:
+        links.append(f'<li><a href="/subjects/{rng.choice(WORDS)}">{_sentence(rng, 2)}</a></li>')
+    while sum(map(len, footer)) < size // 2:
+        footer.append(f'<p class="c-footer__text">{_sentence(rng, 12)}.</p>')
+    return (f'<header><nav><ul>{"".join(links)}</ul></nav></header>',
+            f'<footer>{"".join(footer)}</footer>')
+
+
+class SyntheticSite:
+
+    def __init__(self, pages=5, articles_per_page=20, news_share=0.5, paragraphs=12,
+                 chrome_kib=40, seed=0):
+        rng = random.Random(seed)
+        self.pages = pages
+        self.listings = {}
+        self.articles = {}
+        self.news = []
+        header, footer = _chrome(rng, chrome_kib * 1024)
+        for page in range(1, pages + 1):
+            cards = []
+            for index in range(articles_per_page):
+                path = f'/articles/p{page}-{index}'
+                article_type = 'News' if rng.random() < news_share else rng.choice(OTHER_TYPES)
+                # unique titles, so no two articles share a file name
+                title = f'{_sentence(rng, 6)} {page} {index}'
+                cards.append(
+                    f'<article class="c-card"><div><span data-test="article.type">'
+                    f'{html.escape(article_type)}</span></div><h3><a data-track-action="view article" '
+                    f'href="{path}">{title}</a></h3><time>2020-01-{page % 28 + 1:02d}</time></article>'
+                )
+                self.articles[path] = self._article_page(rng, title, paragraphs, header, footer)
+                if article_type == 'News':
+                    self.news.append(path)
+            self.listings[page] = (f'<html><head><title>Articles | Nature</title></head><body>{header}'
+                                   f'<ul>{"".join(cards)}</ul>{footer}</body></html>')
+
+    @staticmethod
+    def _article_page(rng, title, paragraphs, header, footer):
+        body = ''.join(f'<p>{_sentence(rng, 40)}.</p>' for _ in range(paragraphs))
+        return (f'<html><head><title>{title} | Nature</title><meta name="dc.type" content="News"></head>'
+                f'<body>{header}<h1>{title} | Nature</h1><div class="c-article-body u-clearfix">'
+                f'<p class="article__teaser">{_sentence(rng, 25)}.</p>{body}</div>{footer}</body></html>')
+
+    def news_on(self, page):
+        """Paths of the News articles listed on ``page``."""
+        return [path for path in self.news if path.startswith(f'/articles/p{page}-')]
+
+    def routes(self):
+        routes = {f'{LISTING_PATH}{page}': listing for page, listing in self.listings.items()}
+        routes.update(self.articles)
+        return routes
+
+    def size(self):
+        """Total bytes of all pages."""
+        return sum(len(page.encode('utf-8')) for page in self.routes().values())
@@ -0,0 +1,121 @@
+import unittest
+from unittest.mock import patch
+import gzip
+import json
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraper import archive as archive_module
+from scraper.archive import Archive, BlobStore
+from scraper.sinks import open_sink, make_record
+
+TEXT = "Paragraph one.\nParagraph two. " * 200
+
+
+class TestArchive(unittest.TestCase):
+
+    def setUp(self):
+        """Keep the archive in a temporary directory."""
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        self.root = os.path.join(self.tempdir.name, 'archive')
+
+    def open_archive(self, **kwargs):
+        archive = Archive(self.root, **kwargs)
+        self.addCleanup(archive.close)
+        return archive
+
+    def blob_files(self):
+        return [name for _, _, files in os.walk(os.path.join(self.root, 'objects')) for name in files]
+
+    def test_round_trip_is_compressed(self):
+        """Test that content comes back unchanged and is stored compressed."""
+        archive = self.open_archive(codec='gzip')
+        entry = archive.put('https://example.com/a', TEXT, title="A")
+
+        self.assertEqual(archive.get_text('https://example.com/a'), TEXT)
+        self.assertEqual(entry['size'], len(TEXT.encode('utf-8')))
+        self.assertEqual(entry['title'], "A")
+        self.assertLess(archive.blobs.bytes_written, len(TEXT) // 10)
+
+    def test_identical_content_is_stored_once(self):
+        """Test that the same text under different keys shares one blob."""
+        archive = self.open_archive(codec='gzip')
+        first = archive.put('https://example.com/a', TEXT, page=1)
+        second = archive.put('https://example.com/b', TEXT, page=2)
+
+        self.assertEqual(first['sha256'], second['sha256'])
+        self.assertEqual(len(self.blob_files()), 1)
+        self.assertEqual(len(archive), 2)
+
+    def test_unchanged_key_does_not_grow_index(self):
+        """Test that re-storing identical content and metadata writes nothing."""
+        with Archive(self.root, codec='gzip') as archive:
+            archive.put('u', TEXT, page=1)
+        with Archive(self.root, codec='gzip') as archive:
+            archive.put('u', TEXT, page=1)
+            archive.put('u', TEXT + "more", page=1)
+
+        with open(os.path.join(self.root, 'index.jsonl'), encoding='utf-8') as file:
+            self.assertEqual(len(file.readlines()), 2)
+        archive = self.open_archive()
+        self.assertEqual(archive.get_text('u'), TEXT + "more")
+        self.assertEqual(len(self.blob_files()), 2)
+
+    def test_truncated_index_line_is_ignored(self):
+        """Test that a record cut short by a crash does not break loading."""
+        with Archive(self.root, codec='gzip') as archive:
+            archive.put('u', TEXT)
+        with open(os.path.join(self.root, 'index.jsonl'), 'a', encoding='utf-8') as file:
+            file.write('{"key": "v", "sha')
+
+        archive = self.open_archive()
+        self.assertEqual(list(archive.entries), ['u'])
+        self.assertEqual(archive.get_text('u'), TEXT)
+
+    def test_gzip_blobs_readable_with_other_default(self):
+        """Test that blobs written with gzip are found whatever codec the reader prefers."""
+        store = BlobStore(self.root, codec='gzip')
+        digest = store.put(b"data")
+        with open(store.find(digest)[0], 'rb') as file:
+            self.assertEqual(gzip.decompress(file.read()), b"data")
+
+        if archive_module.zstandard is not None:
+            self.assertEqual(BlobStore(self.root, codec='zstd').get(digest), b"data")
+
+    @unittest.skipUnless(archive_module.zstandard, "zstandard is not installed")
+    def test_zstd_round_trip(self):
+        """Test that the zstd codec stores .zst blobs."""
+        archive = self.open_archive(codec='zstd')
+        archive.put('u', TEXT)
+
+        self.assertTrue(self.blob_files()[0].endswith('.zst'))
+        self.assertEqual(archive.get_text('u'), TEXT)
+
+    def test_zstd_without_zstandard_is_an_error(self):
+        """Test that asking for zstd without the package fails clearly."""
+        with patch.object(archive_module, 'zstandard', None):
+            with self.assertRaises(ImportError):
+                BlobStore(self.root, codec='zstd')
+        with self.assertRaises(ValueError):
+            BlobStore(self.root, codec='bz2')
+
+    def test_archive_sink(self):
+        """Test that the archive sink indexes records by URL."""
+        with open_sink('archive', self.root) as sink:
+            sink.write(make_record('https://example.com/a', "A", "News", 1, TEXT))
+            sink.write(make_record('https://example.com/b', "B", "News", 2, TEXT))
+
+        archive = self.open_archive()
+        self.assertEqual(archive.get_text('https://example.com/b'), TEXT)
+        self.assertEqual({key: (entry['title'], entry['page']) for key, entry in archive.entries.items()},
+                         {'https://example.com/a': ("A", 1), 'https://example.com/b': ("B", 2)})
+        self.assertEqual(len(self.blob_files()), 1)
+        with open(os.path.join(self.root, 'index.jsonl'), encoding='utf-8') as file:
+            self.assertEqual(json.loads(file.readline())['type'], "News")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import json
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraper.checkpoint import Checkpoint
+
+
+class TestCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        """Keep the checkpoint log in a temporary directory."""
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        self.path = os.path.join(self.tempdir.name, 'checkpoint.jsonl')
+
+    def write_run(self):
+        with Checkpoint(self.path) as checkpoint:
+            checkpoint.start(3, "News")
+            checkpoint.record_page(1, [("u1", "One"), ("u2", "Two")])
+            checkpoint.record_article("u1")
+            checkpoint.record_page(2, [("u3", "Three")])
+
+    def test_resume_restores_frontier(self):
+        """Test that a resumed checkpoint knows the parameters, listed pages and stored articles."""
+        self.write_run()
+
+        with Checkpoint(self.path, resume=True) as checkpoint:
+            self.assertEqual(checkpoint.params, {'pages': 3, 'type': "News"})
+            self.assertEqual(checkpoint.pages, {1: [("u1", "One"), ("u2", "Two")], 2: [("u3", "Three")]})
+            self.assertEqual(checkpoint.done, {"u1"})
+            self.assertEqual(checkpoint.pending(1), ["u2"])
+            self.assertEqual(checkpoint.pending(3), [])
+            self.assertFalse(checkpoint.finished)
+
+    def test_resume_appends(self):
+        """Test that a resumed run adds to the log instead of replacing it."""
+        self.write_run()
+        with Checkpoint(self.path, resume=True) as checkpoint:
+            checkpoint.record_article("u2")
+            checkpoint.record_finished()
+
+        with Checkpoint(self.path, resume=True) as checkpoint:
+            self.assertEqual(checkpoint.done, {"u1", "u2"})
+            self.assertTrue(checkpoint.finished)
+            self.assertEqual(checkpoint.params['pages'], 3)
+
+    def test_new_run_starts_over(self):
+        """Test that without resume an old log is discarded."""
+        self.write_run()
+
+        with Checkpoint(self.path) as checkpoint:
+            self.assertIsNone(checkpoint.params)
+        with Checkpoint(self.path, resume=True) as checkpoint:
+            self.assertEqual((checkpoint.pages, checkpoint.done), ({}, set()))
+
+    def test_truncated_last_record_is_ignored(self):
+        """Test that a line cut short by a crash does not stop the rest from loading."""
+        self.write_run()
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write('{"event": "article", "ur')
+
+        with Checkpoint(self.path, resume=True) as checkpoint:
+            self.assertEqual(checkpoint.done, {"u1"})
+            self.assertEqual(len(checkpoint.pages), 2)
+
+    def test_resume_without_log(self):
+        """Test that resuming from a missing file starts an empty checkpoint."""
+        with Checkpoint(self.path, resume=True) as checkpoint:
+            self.assertIsNone(checkpoint.params)
+            checkpoint.start(1, "News")
+
+        with open(self.path, encoding='utf-8') as file:
+            self.assertEqual([json.loads(line) for line in file],
+                             [{'event': 'start', 'pages': 1, 'type': "News"}])
+
+
+if __name__ == '__main__':
+    unittest.main()
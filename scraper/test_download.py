@@ -0,0 +1,125 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import requests
+from scraper import http_client
+from scraper.download import download
+from scraper.local_server import LocalServer
+
+BODY = bytes(range(256)) * 1024
+
+
+def range_route(body=BODY, etag='"v1"'):
+    """Route serving ``body`` with support for Range/If-Range requests."""
+    def route(handler):
+        headers = {'Content-Type': 'application/octet-stream', 'ETag': etag}
+        requested = handler.headers.get('Range')
+        if_range = handler.headers.get('If-Range')
+        if requested is None or (if_range is not None and if_range != etag):
+            return 200, headers, body
+        start = int(requested.split('=')[1].rstrip('-'))
+        if start >= len(body):
+            return 416, {'Content-Range': f'bytes */{len(body)}'}, b''
+        headers['Content-Range'] = f'bytes {start}-{len(body) - 1}/{len(body)}'
+        return 206, headers, body[start:]
+    return route
+
+
+class TestDownload(unittest.TestCase):
+
+    def setUp(self):
+        """Start a stand-in server and work in a temporary directory."""
+        self.server = LocalServer({
+            '/file': range_route(),
+            '/no-ranges': (200, {'Content-Type': 'application/octet-stream'}, BODY),
+        }).start()
+        self.addCleanup(self.server.stop)
+        self.client = http_client.HttpClient()
+        self.addCleanup(self.client.close)
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        self.path = os.path.join(self.tempdir.name, 'file.bin')
+
+    def read(self):
+        with open(self.path, 'rb') as file:
+            return file.read()
+
+    def write_part(self, data, validator=None):
+        with open(self.path + '.part', 'wb') as file:
+            file.write(data)
+        if validator is not None:
+            with open(self.path + '.part.json', 'w', encoding='utf-8') as file:
+                json.dump({'validator': validator}, file)
+
+    def range_header(self):
+        _, headers = self.server.requests[-1]
+        return headers.get('Range')
+
+    def test_streams_body_to_file(self):
+        """Test that the body is written in chunks and renamed into place."""
+        size = download(self.server.url('/file'), self.path, chunk_size=1000, client=self.client)
+
+        self.assertEqual(size, len(BODY))
+        self.assertEqual(self.read(), BODY)
+        self.assertEqual(os.listdir(self.tempdir.name), ['file.bin'])
+
+    def test_error_leaves_no_file(self):
+        """Test that an error response raises and creates nothing."""
+        with self.assertRaises(requests.exceptions.HTTPError):
+            download(self.server.url('/missing'), self.path, client=self.client)
+
+        self.assertEqual(os.listdir(self.tempdir.name), [])
+
+    def test_resume_appends_to_partial_file(self):
+        """Test that resume requests only the missing bytes and completes the file."""
+        self.write_part(BODY[:1000], validator='"v1"')
+
+        download(self.server.url('/file'), self.path, resume=True, client=self.client)
+
+        self.assertEqual(self.range_header(), 'bytes=1000-')
+        _, headers = self.server.requests[-1]
+        self.assertEqual(headers['If-Range'], '"v1"')
+        self.assertEqual(self.read(), BODY)
+        self.assertEqual(os.listdir(self.tempdir.name), ['file.bin'])
+
+    def test_changed_resource_restarts_download(self):
+        """Test that a stale partial file is replaced when If-Range no longer matches."""
+        self.write_part(b'x' * 1000, validator='"old"')
+
+        download(self.server.url('/file'), self.path, resume=True, client=self.client)
+
+        self.assertEqual(self.read(), BODY)
+
+    def test_server_without_ranges_restarts_download(self):
+        """Test that a 200 answer to a Range request overwrites the partial file."""
+        self.write_part(BODY[:1000])
+
+        download(self.server.url('/no-ranges'), self.path, resume=True, client=self.client)
+
+        self.assertEqual(self.read(), BODY)
+
+    def test_complete_partial_file_is_fetched_again(self):
+        """Test that a 416 answer discards the partial file and downloads afresh."""
+        self.write_part(BODY)
+
+        download(self.server.url('/file'), self.path, resume=True, client=self.client)
+
+        self.assertIsNone(self.range_header())
+        self.assertEqual(self.read(), BODY)
+
+    def test_without_resume_partial_file_is_ignored(self):
+        """Test that an old partial file is overwritten unless resume is requested."""
+        self.write_part(b'x' * 1000)
+
+        download(self.server.url('/file'), self.path, client=self.client)
+
+        self.assertIsNone(self.range_header())
+        self.assertEqual(self.read(), BODY)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,242 @@
+import unittest
+import multiprocessing
+import sys
+import os
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraper import frontier
+from scraper.fake_clock import FakeClock
+from scraper.frontier import MemoryFrontier, RedisFrontier, SQLiteFrontier, open_frontier
+from scraper.local_redis import LocalPipeline, LocalRedis
+
+
+def drain(path, urls):
+    # Worker process: lease and ack until the shared SQLite frontier is empty
+    with SQLiteFrontier(path) as shared:
+        while True:
+            task = shared.lease()
+            if task is None:
+                return
+            urls.append(task.url)
+            shared.ack(task)
+
+
+class FrontierContract:
+    """Behaviour every frontier backend shares; mixed into one test case per backend."""
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        self.clock = FakeClock()
+        self.clock.now = 1000.0
+        self.frontier = self.make_frontier()
+        self.addCleanup(self.frontier.close)
+
+    def make_frontier(self):
+        raise NotImplementedError
+
+    def lease_all(self):
+        tasks = []
+        while True:
+            task = self.frontier.lease()
+            if task is None:
+                return tasks
+            tasks.append(task)
+
+    def test_push_deduplicates(self):
+        """Test that a URL is queued once, even after it is done."""
+        self.assertTrue(self.frontier.push('u1', data={'page': 1}))
+        self.assertFalse(self.frontier.push('u1', priority=-5))
+
+        task = self.frontier.lease()
+        self.frontier.ack(task)
+
+        self.assertFalse(self.frontier.push('u1'))
+        self.assertIsNone(self.frontier.lease())
+        self.assertEqual((task.url, task.kind, task.data), ('u1', 'article', {'page': 1}))
+
+    def test_lease_order_is_priority_then_push_order(self):
+        """Test that lower priority values come first, and equal ones first in, first out."""
+        for url, priority in (('l1', 1), ('a1', 0), ('l2', 1), ('a2', 0)):
+            self.frontier.push(url, kind='listing' if url[0] == 'l' else 'article', priority=priority)
+
+        self.assertEqual([task.url for task in self.lease_all()], ['a1', 'a2', 'l1', 'l2'])
+
+    def test_expired_lease_is_queued_again(self):
+        """Test that a task whose worker never acks goes to another worker once the lease runs out."""
+        self.frontier.push('u1')
+        first = self.frontier.lease(lease_seconds=10)
+        self.assertIsNone(self.frontier.lease())
+
+        self.clock.now += 10
+        second = self.frontier.lease()
+
+        self.assertEqual(second.url, 'u1')
+        self.assertFalse(self.frontier.ack(first))
+        self.assertTrue(self.frontier.ack(second))
+        self.assertEqual(self.frontier.counts(), {'queued': 0, 'leased': 0, 'done': 1, 'failed': 0})
+
+    def test_retry_waits_out_its_delay(self):
+        """Test that a retried task comes back after the delay with its attempt counted."""
+        self.frontier.push('u1')
+        task = self.frontier.lease()
+
+        self.assertTrue(self.frontier.retry(task, delay=5))
+        self.assertFalse(self.frontier.retry(task))
+        self.assertIsNone(self.frontier.lease())
+        self.assertFalse(self.frontier.finished)
+
+        self.clock.now += 5
+        again = self.frontier.lease()
+        self.assertEqual((again.url, again.attempts), ('u1', 1))
+        self.assertTrue(self.frontier.fail(again))
+        self.assertTrue(self.frontier.finished)
+        self.assertEqual(self.frontier.counts(), {'queued': 0, 'leased': 0, 'done': 0, 'failed': 1})
+
+    def test_counts_and_finished(self):
+        """Test that the counts follow tasks through their states."""
+        self.assertTrue(self.frontier.finished)
+        for url in ('u1', 'u2', 'u3'):
+            self.frontier.push(url)
+        task = self.frontier.lease()
+
+        self.assertEqual(self.frontier.counts(), {'queued': 2, 'leased': 1, 'done': 0, 'failed': 0})
+        self.frontier.ack(task)
+        for task in self.lease_all():
+            self.frontier.ack(task)
+        self.assertTrue(self.frontier.finished)
+
+    def test_concurrent_workers_lease_each_url_once(self):
+        """Test that threads leasing from one frontier never get the same URL."""
+        urls = [f'u{n}' for n in range(200)]
+        for url in urls:
+            self.frontier.push(url)
+        leased = []
+
+        def work():
+            while True:
+                task = self.frontier.lease()
+                if task is None:
+                    return
+                leased.append(task.url)
+                self.frontier.ack(task)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(leased), sorted(urls))
+
+
+class TestMemoryFrontier(FrontierContract, unittest.TestCase):
+
+    def make_frontier(self):
+        return MemoryFrontier(clock=self.clock)
+
+
+class TestSQLiteFrontier(FrontierContract, unittest.TestCase):
+
+    def make_frontier(self):
+        self.path = os.path.join(self.tempdir.name, 'frontier.sqlite3')
+        return SQLiteFrontier(self.path, clock=self.clock)
+
+    def test_state_survives_reopening(self):
+        """Test that a new connection sees the queue, leases and done URLs."""
+        for url in ('u1', 'u2'):
+            self.frontier.push(url)
+        self.frontier.ack(self.frontier.lease())
+
+        with SQLiteFrontier(self.path, clock=self.clock) as reopened:
+            self.assertFalse(reopened.push('u1'))
+            self.assertEqual(reopened.lease().url, 'u2')
+
+    def test_processes_share_one_file(self):
+        """Test that worker processes draining one file lease every URL exactly once."""
+        urls = [f'u{n}' for n in range(300)]
+        for url in urls:
+            self.frontier.push(url)
+        context = multiprocessing.get_context('spawn')
+        with context.Manager() as manager:
+            leased = manager.list()
+            workers = [context.Process(target=drain, args=(self.path, leased)) for _ in range(3)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join(60)
+            leased = list(leased)
+
+        self.assertEqual(sorted(leased), sorted(urls))
+        self.assertEqual(self.frontier.counts()['done'], 300)
+
+
+class TestRedisFrontier(FrontierContract, unittest.TestCase):
+
+    def make_frontier(self):
+        self.server = LocalRedis()
+        return RedisFrontier(self.server, prefix='test', clock=self.clock)
+
+    def test_frontiers_on_one_server_share_the_queue(self):
+        """Test that two clients (e.g. on two hosts) with one prefix share URLs, other prefixes don't."""
+        other = RedisFrontier(self.server, prefix='test', clock=self.clock)
+        self.frontier.push('u1')
+
+        self.assertFalse(other.push('u1'))
+        self.assertEqual(other.lease().url, 'u1')
+        self.assertIsNone(self.frontier.lease())
+        self.assertTrue(RedisFrontier(self.server, prefix='other').push('u1'))
+
+
+class DroppedConnection(LocalRedis):
+    """Once ``drop`` is set, loses the connection between a transaction's reads and its EXEC."""
+
+    drop = False
+
+    def transaction(self, func, *watches, value_from_callable=False):
+        if not self.drop:
+            return super().transaction(func, *watches, value_from_callable=value_from_callable)
+        with self._lock:
+            func(LocalPipeline(self))
+            raise ConnectionError("connection lost before EXEC")
+
+
+class TestRedisTransactions(unittest.TestCase):
+
+    def test_lease_cut_short_loses_nothing(self):
+        """Test that a worker dropping out mid-lease leaves the URL queued for the next one."""
+        server = DroppedConnection()
+        frontier = RedisFrontier(server, prefix='test')
+        frontier.push('u1')
+
+        server.drop = True
+        with self.assertRaises(ConnectionError):
+            frontier.lease()
+        server.drop = False
+
+        self.assertEqual(frontier.counts(), {'queued': 1, 'leased': 0, 'done': 0, 'failed': 0})
+        self.assertEqual(frontier.lease().url, 'u1')
+
+
+class TestOpenFrontier(unittest.TestCase):
+
+    def test_spec_selects_backend(self):
+        """Test that open_frontier maps memory, file names and redis:// URLs to backends."""
+        with tempfile.TemporaryDirectory() as tempdir:
+            with open_frontier('memory') as memory, \
+                    open_frontier(os.path.join(tempdir, 'f.sqlite3'), lease_seconds=5) as sqlite:
+                self.assertIsInstance(memory, MemoryFrontier)
+                self.assertIsInstance(sqlite, SQLiteFrontier)
+                self.assertEqual(sqlite.lease_seconds, 5)
+
+    @unittest.skipIf(frontier.redis, "redis is installed")
+    def test_redis_requires_package(self):
+        """Test that a redis:// frontier without the redis package raises ImportError."""
+        with self.assertRaises(ImportError):
+            open_frontier('redis://localhost:6379/0')
+
+
+if __name__ == '__main__':
+    unittest.main()
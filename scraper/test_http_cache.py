@@ -0,0 +1,169 @@
+import unittest
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraper import http_client
+from scraper.http_cache import CacheMissError, ResponseCache, parse_cache_control
+from scraper.local_server import LocalServer
+
+PAGE = "<html><body><h1>Cached page</h1></body></html>"
+
+
+def etag_route(etag='"v1"', body=PAGE, cache_control='no-cache'):
+    """Route answering 304 when the client already holds ``etag``."""
+    def route(handler):
+        if handler.headers.get('If-None-Match') == etag:
+            return 304, {'ETag': etag}, b''
+        return 200, {'Content-Type': 'text/html; charset=utf-8', 'ETag': etag,
+                     'Cache-Control': cache_control}, body
+    return route
+
+
+def last_modified_route(last_modified='Wed, 01 Jan 2020 00:00:00 GMT'):
+    """Route answering 304 when If-Modified-Since matches Last-Modified."""
+    def route(handler):
+        if handler.headers.get('If-Modified-Since') == last_modified:
+            return 304, {}, b''
+        return 200, {'Content-Type': 'text/html', 'Last-Modified': last_modified}, PAGE
+    return route
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        """Start a stand-in server and a client with an empty cache."""
+        self.server = LocalServer({
+            '/fresh': (200, {'Content-Type': 'text/html', 'Cache-Control': 'max-age=3600'}, PAGE),
+            '/etag': etag_route(),
+            '/last-modified': last_modified_route(),
+            '/no-store': (200, {'Cache-Control': 'no-store'}, PAGE),
+            '/plain': PAGE,
+        }).start()
+        self.addCleanup(self.server.stop)
+
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        self.cache = ResponseCache(self.tempdir.name)
+        self.addCleanup(self.cache.close)
+        self.client = http_client.HttpClient(cache=self.cache)
+        self.addCleanup(self.client.close)
+
+    def test_fresh_entry_served_without_request(self):
+        """Test that a response within max-age is served from disk."""
+        first = self.client.get(self.server.url('/fresh'))
+        second = self.client.get(self.server.url('/fresh'))
+
+        self.assertEqual(self.server.hits['/fresh'], 1)
+        self.assertEqual(second.text, first.text)
+        self.assertTrue(second.from_cache)
+        second.raise_for_status()
+
+    def test_etag_revalidation(self):
+        """Test that a stale entry is revalidated with If-None-Match and a 304 reuses the body."""
+        self.client.get(self.server.url('/etag'))
+        response = self.client.get(self.server.url('/etag'))
+
+        self.assertEqual(self.server.hits['/etag'], 2)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.text, PAGE)
+        self.assertTrue(response.from_cache)
+        _, second_headers = self.server.requests[1]
+        self.assertEqual(second_headers['If-None-Match'], '"v1"')
+
+    def test_changed_etag_replaces_entry(self):
+        """Test that a 200 answer to a conditional request updates the cache."""
+        self.client.get(self.server.url('/etag'))
+        self.server.routes['/etag'] = etag_route(etag='"v2"', body="<p>new</p>")
+
+        response = self.client.get(self.server.url('/etag'))
+
+        self.assertEqual(response.text, "<p>new</p>")
+        self.assertEqual(self.cache.get(self.cache.key(self.server.url('/etag'),
+                                                       self.client.session.headers)).body,
+                         b"<p>new</p>")
+
+    def test_last_modified_revalidation(self):
+        """Test revalidation with If-Modified-Since."""
+        self.client.get(self.server.url('/last-modified'))
+        response = self.client.get(self.server.url('/last-modified'))
+
+        self.assertTrue(response.from_cache)
+        _, second_headers = self.server.requests[1]
+        self.assertEqual(second_headers['If-Modified-Since'], 'Wed, 01 Jan 2020 00:00:00 GMT')
+
+    def test_no_store_is_not_cached(self):
+        """Test that Cache-Control: no-store responses are never written."""
+        self.client.get(self.server.url('/no-store'))
+        self.client.get(self.server.url('/no-store'))
+
+        self.assertEqual(self.server.hits['/no-store'], 2)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_key_depends_on_relevant_headers(self):
+        """Test that Accept-Language is part of the cache key."""
+        self.client.get(self.server.url('/fresh'))
+        self.client.get(self.server.url('/fresh'), headers={'Accept-Language': 'de-DE'})
+
+        self.assertEqual(self.server.hits['/fresh'], 2)
+        self.assertEqual(len(self.cache), 2)
+
+    def test_key_depends_on_query_params(self):
+        """Test that requests differing only in params are cached separately."""
+        first = self.client.get(self.server.url('/fresh'), params={'page': 1})
+        second = self.client.get(self.server.url('/fresh'), params={'page': 2})
+        again = self.client.get(self.server.url('/fresh?page=1'))
+
+        self.assertEqual((self.server.hits['/fresh?page=1'], self.server.hits['/fresh?page=2']), (1, 1))
+        self.assertEqual(second.url, self.server.url('/fresh?page=2'))
+        self.assertFalse(getattr(second, 'from_cache', False))
+        self.assertTrue(again.from_cache)
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(first.text, again.text)
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entries are evicted past max_bytes."""
+        self.cache.max_bytes = len(PAGE) * 2
+        for path in ('/fresh', '/etag'):
+            self.client.get(self.server.url(path))
+        # Touch /fresh so /etag becomes the least recently used entry
+        self.client.get(self.server.url('/fresh'))
+        self.client.get(self.server.url('/last-modified'))
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertLessEqual(self.cache.total_size(), self.cache.max_bytes)
+        key = lambda path: self.cache.key(self.server.url(path), self.client.session.headers)
+        self.assertIsNone(self.cache.get(key('/etag')))
+        self.assertIsNotNone(self.cache.get(key('/fresh')))
+
+    def test_cache_only_mode(self):
+        """Test that cache-only mode serves stale entries offline and raises on misses."""
+        cached_url, missing_url = self.server.url('/plain'), self.server.url('/fresh')
+        self.client.get(cached_url)
+        self.client.set_cache(self.cache, cache_only=True)
+        self.server.stop()
+
+        response = self.client.get(cached_url)
+        self.assertEqual(response.text, PAGE)
+        with self.assertRaises(CacheMissError):
+            self.client.get(missing_url)
+
+    def test_cache_persists_across_instances(self):
+        """Test that a new cache over the same directory sees earlier entries."""
+        self.client.get(self.server.url('/fresh'))
+
+        with http_client.HttpClient(cache=ResponseCache(self.tempdir.name)) as client:
+            client.get(self.server.url('/fresh'))
+
+        self.assertEqual(self.server.hits['/fresh'], 1)
+
+    def test_parse_cache_control(self):
+        """Test parsing of Cache-Control directives."""
+        self.assertEqual(parse_cache_control('public, max-age=60, no-cache'),
+                         {'public': None, 'max-age': '60', 'no-cache': None})
+        self.assertEqual(parse_cache_control(None), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
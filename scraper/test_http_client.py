@@ -0,0 +1,240 @@
+import unittest
+from unittest.mock import patch
+from concurrent.futures import ThreadPoolExecutor
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import tempfile
+from scraper import http_client
+from scraper.http_cache import ResponseCache
+from scraper.local_server import LocalServer
+from scraper.rate_limit import AdaptiveRateLimiter
+from scraper.retry import RetryPolicy
+
+HEAD = '<html><head><title>Large page</title><meta name="description" content="Big"></head>'
+LARGE_PAGE = HEAD + "<body>" + "<p>Lorem ipsum dolor sit amet.</p>" * 100000 + "</body></html>"
+
+
+class TestHttpClient(unittest.TestCase):
+
+    def setUp(self):
+        """Start a local stand-in server with a couple of pages."""
+        self.server = LocalServer({
+            '/page1': "<html><body>Page 1</body></html>",
+            '/page2': "<html><body>Page 2</body></html>",
+        }).start()
+        self.addCleanup(self.server.stop)
+
+    def test_connection_is_reused(self):
+        """Test that consecutive requests share one keep-alive connection."""
+        with http_client.HttpClient() as client:
+            for _ in range(5):
+                response = client.get(self.server.url('/page1'))
+                self.assertEqual(response.status_code, 200)
+            client.get(self.server.url('/page2'))
+
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(self.server.hits['/page1'], 5)
+        self.assertEqual(self.server.hits['/page2'], 1)
+
+    def test_default_and_extra_headers_are_sent(self):
+        """Test that default headers are merged with client and request headers."""
+        with http_client.HttpClient(headers={'X-Client': 'yes'}) as client:
+            client.get(self.server.url('/page1'), headers={'Accept': 'application/json'})
+
+        _, sent_headers = self.server.requests[0]
+        self.assertEqual(sent_headers['Accept-Language'], 'en-US,en;q=0.5')
+        self.assertEqual(sent_headers['X-Client'], 'yes')
+        self.assertEqual(sent_headers['Accept'], 'application/json')
+
+    def test_default_timeout_applied(self):
+        """Test that the client timeout is used unless one is given explicitly."""
+        client = http_client.HttpClient(timeout=3)
+        with patch.object(client.session, 'get') as mock_get:
+            client.get("https://test.com")
+            client.get("https://test.com", timeout=1)
+        client.close()
+
+        self.assertEqual(mock_get.call_args_list[0].kwargs['timeout'], 3)
+        self.assertEqual(mock_get.call_args_list[1].kwargs['timeout'], 1)
+
+    def test_host_pool_sizes(self):
+        """Test that hosts with their own pool size get a dedicated adapter."""
+        with http_client.HttpClient(pool_size=4,
+                                    host_pool_sizes={'https://www.nature.com': 16}) as client:
+            nature_adapter = client.session.get_adapter('https://www.nature.com/articles/x')
+            other_adapter = client.session.get_adapter('https://example.com/')
+
+        self.assertEqual(nature_adapter._pool_maxsize, 16)
+        self.assertEqual(other_adapter._pool_maxsize, 4)
+
+    def test_max_per_host_limits_concurrency(self):
+        """Test that max_per_host caps the number of in-flight requests to a host."""
+        self.server.latency = 0.1
+        with http_client.HttpClient(max_per_host=2) as client:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=6) as executor:
+                responses = list(executor.map(client.get, [self.server.url('/page1')] * 6))
+            elapsed = time.perf_counter() - start
+
+        self.assertTrue(all(r.status_code == 200 for r in responses))
+        # 6 requests, 2 at a time, 0.1s each -> at least 3 rounds
+        self.assertGreaterEqual(elapsed, 0.3)
+        self.assertLessEqual(self.server.connections, 2)
+
+    def test_module_get_uses_shared_client(self):
+        """Test that the module-level get goes through one shared client."""
+        client = http_client.HttpClient()
+        http_client.set_client(client)
+        self.addCleanup(http_client.set_client, None)
+
+        self.assertIs(http_client.get_client(), client)
+        http_client.get(self.server.url('/page1'))
+        http_client.get(self.server.url('/page2'))
+
+        self.assertEqual(self.server.connections, 1)
+
+    def test_missing_route_returns_404(self):
+        """Test that unknown paths on the stand-in server return 404."""
+        with http_client.HttpClient() as client:
+            response = client.get(self.server.url('/missing'))
+
+        self.assertEqual(response.status_code, 404)
+
+
+def flaky_route(failures, status=503, headers=None):
+    """Route answering ``status`` for the first ``failures`` requests, then 200."""
+    calls = []
+
+    def route(handler):
+        calls.append(handler.path)
+        if len(calls) <= failures:
+            return status, dict(headers or {}), b'busy'
+        return "<html><body>OK</body></html>"
+    return route
+
+
+class TestRetries(unittest.TestCase):
+
+    def setUp(self):
+        """Start a stand-in server and a client that retries without real waiting."""
+        self.server = LocalServer({
+            '/flaky': flaky_route(2),
+            '/throttled': flaky_route(1, 429, {'Retry-After': '0'}),
+            '/down': flaky_route(10),
+        }).start()
+        self.addCleanup(self.server.stop)
+        self.limiter = AdaptiveRateLimiter(rate=50.0, burst=50)
+        self.client = http_client.HttpClient(rate_limiter=self.limiter,
+                                             retry=RetryPolicy(max_retries=3, backoff=0.001))
+        self.addCleanup(self.client.close)
+
+    def test_retries_until_success(self):
+        """Test that 503 responses are retried and the final 200 is returned."""
+        response = self.client.get(self.server.url('/flaky'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.server.hits['/flaky'], 3)
+
+    def test_gives_up_after_max_retries(self):
+        """Test that the last error response is returned once retries run out."""
+        response = self.client.get(self.server.url('/down'))
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.server.hits['/down'], 4)
+
+    def test_retry_false_sends_once(self):
+        """Test that a caller retrying on its own gets the first error response."""
+        response = self.client.get(self.server.url('/flaky'), retry=False)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.server.hits['/flaky'], 1)
+
+    def test_client_errors_are_not_retried(self):
+        """Test that a 404 is returned straight away."""
+        self.assertEqual(self.client.get(self.server.url('/missing')).status_code, 404)
+        self.assertEqual(self.server.hits['/missing'], 1)
+
+    def test_throttling_slows_the_host_down(self):
+        """Test that a 429 lowers the host's rate before the retry succeeds."""
+        response = self.client.get(self.server.url('/throttled'))
+
+        self.assertEqual(response.status_code, 200)
+        # halved by the 429, then raised again by the successful retry
+        self.assertEqual(self.limiter.host_rate(self.server.base_url), 25.5)
+
+    def test_connection_errors_are_retried(self):
+        """Test that a refused connection is retried before the error is raised."""
+        url = self.server.url('/flaky')
+        self.server.stop()
+
+        with patch('scraper.http_client.time.sleep') as mock_sleep, \
+                self.assertRaises(http_client.requests.exceptions.ConnectionError):
+            self.client.get(url)
+
+        self.assertEqual(mock_sleep.call_count, 3)
+
+
+class TestGetHead(unittest.TestCase):
+
+    def setUp(self):
+        """Serve a page whose body is much larger than its head."""
+        self.server = LocalServer({
+            '/large': (200, {'Content-Type': 'text/html; charset=utf-8',
+                             'Cache-Control': 'max-age=3600'}, LARGE_PAGE),
+            '/headless': "<p>No head here</p>",
+        }).start()
+        self.addCleanup(self.server.stop)
+        self.client = http_client.HttpClient()
+        self.addCleanup(self.client.close)
+
+    def test_stops_reading_after_head(self):
+        """Test that only the head is returned and the body is not downloaded."""
+        response = self.client.get_head(self.server.url('/large'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.text, HEAD)
+        self.assertLess(response.bytes_read, len(LARGE_PAGE) // 10)
+
+    def test_finds_head_end_split_across_chunks(self):
+        """Test that a </head> tag spanning two chunks is still found."""
+        response = self.client.get_head(self.server.url('/large'), chunk_size=5)
+
+        self.assertEqual(response.text, HEAD)
+
+    def test_page_without_head_is_read_whole(self):
+        """Test that a page without </head> is returned in full."""
+        response = self.client.get_head(self.server.url('/headless'))
+
+        self.assertEqual(response.text, "<p>No head here</p>")
+
+    def test_error_response_has_no_body(self):
+        """Test that error responses are returned without reading the body."""
+        response = self.client.get_head(self.server.url('/missing'))
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.content, b'')
+
+    def test_client_still_usable_after_early_stop(self):
+        """Test that abandoning a body doesn't break later requests."""
+        self.client.get_head(self.server.url('/large'))
+
+        self.assertEqual(self.client.get(self.server.url('/headless')).text, "<p>No head here</p>")
+
+    def test_goes_through_cache(self):
+        """Test that with a cache attached, cached pages are reused."""
+        with tempfile.TemporaryDirectory() as tempdir:
+            with http_client.HttpClient(cache=ResponseCache(tempdir)) as client:
+                client.get_head(self.server.url('/large'))
+                response = client.get_head(self.server.url('/large'))
+                client.cache.close()
+
+        self.assertEqual(self.server.hits['/large'], 1)
+        self.assertEqual(response.text, HEAD)
+        self.assertEqual(response.bytes_read, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
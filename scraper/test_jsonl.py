@@ -0,0 +1,40 @@
+import unittest
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraper.jsonl import read_lines
+
+
+class TestReadLines(unittest.TestCase):
+
+    def setUp(self):
+        """Work in a temporary directory."""
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        self.path = os.path.join(self.tempdir.name, 'log.jsonl')
+
+    def write(self, text):
+        with open(self.path, 'w', encoding='utf-8') as file:
+            file.write(text)
+
+    def test_reads_records_in_order(self):
+        """Test that every line is parsed, in file order."""
+        self.write('{"a": 1}\n{"a": 2}\n[3]\n')
+        self.assertEqual(list(read_lines(self.path)), [{'a': 1}, {'a': 2}, [3]])
+
+    def test_truncated_last_line_is_skipped(self):
+        """Test that a record cut short by a crash is skipped and the ones before it are kept."""
+        self.write('{"a": 1}\n{"a": 2}\n{"a": 3, "b": "unfini')
+        self.assertEqual(list(read_lines(self.path)), [{'a': 1}, {'a': 2}])
+
+    def test_missing_file(self):
+        """Test that a missing file raises unless missing_ok is set."""
+        with self.assertRaises(FileNotFoundError):
+            list(read_lines(self.path))
+        self.assertEqual(list(read_lines(self.path, missing_ok=True)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
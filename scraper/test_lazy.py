@@ -0,0 +1,117 @@
+import unittest
+import importlib
+import json
+import subprocess
+import sys
+import os
+import tempfile
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import scraper
+from scraper.lazy import LazyModule, lazy_import
+
+HEAVY = ('requests', 'bs4', 'lxml.html', 'aiohttp', 'pyarrow', 'zstandard')
+# Imports a module in a fresh interpreter, with no stdin to prompt from, and
+# reports which heavy dependencies that pulled in and whether sys.path changed
+IMPORT_PROBE = """
+import json, sys
+sys.path.insert(0, {root!r})
+path = list(sys.path)
+import {module}
+print(json.dumps([[name for name in {heavy!r} if name in sys.modules], sys.path == path]))
+"""
+
+
+class TestLazyImport(unittest.TestCase):
+
+    def setUp(self):
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+        with open(os.path.join(tempdir.name, 'lazy_probe.py'), 'w', encoding='utf-8') as file:
+            file.write("import sys, time\n"
+                       "time.sleep(0.05)\n"
+                       "sys.lazy_probe_runs = getattr(sys, 'lazy_probe_runs', 0) + 1\n"
+                       "VALUE = 42\n")
+        sys.path.insert(0, tempdir.name)
+        self.addCleanup(sys.path.remove, tempdir.name)
+        self.addCleanup(sys.modules.pop, 'lazy_probe', None)
+        self.addCleanup(lambda: vars(sys).pop('lazy_probe_runs', None))
+
+    def test_imports_on_first_attribute_access(self):
+        """Test that the module is only imported when an attribute is used."""
+        probe = lazy_import('lazy_probe')
+
+        self.assertIsInstance(probe, LazyModule)
+        self.assertFalse(probe.loaded)
+        self.assertNotIn('lazy_probe', sys.modules)
+        self.assertEqual(probe.VALUE, 42)
+        self.assertTrue(probe.loaded)
+        self.assertIs(probe._load(), sys.modules['lazy_probe'])
+
+    def test_concurrent_first_use_imports_once(self):
+        """Test that threads racing on the first access run the module once."""
+        probe = lazy_import('lazy_probe')
+        values = []
+        threads = [threading.Thread(target=lambda: values.append(probe.VALUE)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(values, [42] * 8)
+        self.assertEqual(sys.lazy_probe_runs, 1)
+
+    def test_optional_missing_module_is_none(self):
+        """Test that optional modules that are not installed come back as None."""
+        self.assertIsNone(lazy_import('no_such_module_here', optional=True))
+        self.assertIsNone(lazy_import('no_such_package_here.child', optional=True))
+        self.assertIsInstance(lazy_import('lazy_probe', optional=True), LazyModule)
+
+    def test_missing_module_fails_on_use(self):
+        """Test that a required module that is missing raises on first use."""
+        missing = lazy_import('no_such_module_here')
+
+        with self.assertRaises(ModuleNotFoundError):
+            missing.anything
+
+
+class TestPackage(unittest.TestCase):
+
+    def test_exports_resolve(self):
+        """Test that every name in scraper.__all__ resolves to its submodule's object."""
+        for name in scraper.__all__:
+            with self.subTest(name=name):
+                module = importlib.import_module(f"scraper.{scraper._EXPORTS[name]}")
+                self.assertIs(getattr(scraper, name), getattr(module, name))
+        with self.assertRaises(AttributeError):
+            scraper.no_such_name
+
+    def test_imports_have_no_side_effects(self):
+        """Test that the package and every stage import without prompting, fetching, heavy imports
+        or changes to sys.path."""
+        targets = ['scraper'] + [f'stage{n}.stage{n}' for n in range(1, 6)] + ['stage1.joke_client']
+        for module in targets:
+            with self.subTest(module=module):
+                code = IMPORT_PROBE.format(root=ROOT, module=module, heavy=HEAVY)
+                process = subprocess.run([sys.executable, '-c', code], stdin=subprocess.DEVNULL,
+                                         capture_output=True, text=True, timeout=60)
+
+                self.assertEqual(process.returncode, 0, process.stderr)
+                # nothing printed but the probe's own line, no heavy package imported
+                # and sys.path as it was
+                self.assertEqual(json.loads(process.stdout), [[], True])
+
+    def test_stage_exports_resolve(self):
+        """Test that every name a stage package exports resolves to its module's object."""
+        for n in range(1, 6):
+            package = importlib.import_module(f'stage{n}')
+            for name in package.__all__:
+                with self.subTest(package=package.__name__, name=name):
+                    module = importlib.import_module(f"stage{n}.{package._EXPORTS[name]}")
+                    self.assertIs(getattr(package, name), getattr(module, name))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraper.manifest import Manifest, content_digest, merge_manifests
+
+
+class TestManifest(unittest.TestCase):
+
+    def setUp(self):
+        """Work in a temporary directory with a saved article file."""
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        self.manifest_path = os.path.join(self.tempdir.name, 'manifest.jsonl')
+        self.article_path = self.write_article('a.txt', "Text")
+
+    def write_article(self, name, content):
+        path = os.path.join(self.tempdir.name, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def open_manifest(self):
+        manifest = Manifest(self.manifest_path)
+        self.addCleanup(manifest.close)
+        return manifest
+
+    def test_recorded_url_is_known_while_file_exists(self):
+        """Test that a URL counts as saved only while its file is on disk."""
+        manifest = self.open_manifest()
+        self.assertNotIn('https://example.com/a', manifest)
+
+        manifest.record('https://example.com/a', self.article_path, content_digest("Text"))
+        self.assertIn('https://example.com/a', manifest)
+
+        os.remove(self.article_path)
+        self.assertNotIn('https://example.com/a', manifest)
+
+    def test_entries_persist_and_last_record_wins(self):
+        """Test that reopening the manifest restores the latest record per URL."""
+        with Manifest(self.manifest_path) as manifest:
+            manifest.record('u', self.article_path, content_digest("old"))
+            manifest.record('u', self.article_path, content_digest("Text"))
+
+        manifest = self.open_manifest()
+        self.assertEqual(len(manifest), 1)
+        self.assertIn('u', manifest)
+        self.assertTrue(manifest.is_current(self.article_path, content_digest("Text")))
+        self.assertFalse(manifest.is_current(self.article_path, content_digest("old")))
+
+    def test_truncated_last_line_is_ignored(self):
+        """Test that a record cut short by a crash does not break loading."""
+        with Manifest(self.manifest_path) as manifest:
+            manifest.record('u', self.article_path, content_digest("Text"))
+        with open(self.manifest_path, 'a', encoding='utf-8') as file:
+            file.write('{"url": "v", "pa')
+
+        manifest = self.open_manifest()
+        self.assertEqual(len(manifest), 1)
+        self.assertIn('u', manifest)
+
+    def test_is_current_requires_existing_file(self):
+        """Test that is_current is False once the recorded file is gone."""
+        manifest = self.open_manifest()
+        manifest.record('u', self.article_path, content_digest("Text"))
+        os.remove(self.article_path)
+
+        self.assertFalse(manifest.is_current(self.article_path, content_digest("Text")))
+
+    def test_compacts_superseded_records(self):
+        """Test that a log dominated by superseded records is rewritten on load."""
+        with Manifest(self.manifest_path) as manifest:
+            for i in range(300):
+                manifest.record('u', self.article_path, content_digest(str(i)))
+
+        manifest = self.open_manifest()
+        with open(self.manifest_path, encoding='utf-8') as file:
+            self.assertEqual(len(file.readlines()), 1)
+        self.assertTrue(manifest.is_current(self.article_path, content_digest("299")))
+
+    def test_merge_manifests_newest_entry_wins(self):
+        """Test that merged shard manifests know every URL, with its most recent entry."""
+        shard_paths = [os.path.join(self.tempdir.name, f'manifest.shard-{i}.jsonl') for i in (1, 2)]
+        with Manifest(shard_paths[0]) as manifest:
+            manifest.record('u1', self.article_path, content_digest("Old"))
+            manifest.record('u2', self.write_article('b.txt', "Two"), content_digest("Two"))
+        with Manifest(shard_paths[1]) as manifest:
+            manifest.record('u1', self.article_path, content_digest("Text"))
+
+        self.assertEqual(merge_manifests(self.manifest_path, shard_paths), 2)
+
+        manifest = self.open_manifest()
+        self.assertEqual(set(manifest.entries), {'u1', 'u2'})
+        self.assertTrue(manifest.is_current(self.article_path, content_digest("Text")))
+        with self.assertRaises(FileNotFoundError):
+            merge_manifests(self.manifest_path, [os.path.join(self.tempdir.name, 'missing.jsonl')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+from unittest.mock import patch
+import io
+import json
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraper import http_client, metrics
+from scraper.fake_clock import FakeClock
+from scraper.local_server import LocalServer
+from scraper.metrics import Histogram, Metrics
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_histogram_buckets_and_quantiles(self):
+        """Test that observations land in their bucket and quantiles come from the buckets."""
+        histogram = Histogram(buckets=(0.1, 1.0))
+        for seconds in (0.05, 0.1, 0.5, 0.7, 3.0):
+            histogram.observe(seconds, nbytes=10)
+
+        self.assertEqual(histogram.counts, [2, 2, 1])
+        self.assertEqual(histogram.quantile(0.4), 0.1)
+        self.assertEqual(histogram.quantile(0.5), 1.0)
+        # the +Inf bucket reports the largest observation
+        self.assertEqual(histogram.quantile(0.99), 3.0)
+        summary = histogram.summary()
+        self.assertEqual((summary['count'], summary['bytes'], summary['max']), (5, 50, 3.0))
+        self.assertAlmostEqual(summary['mean'], 0.87)
+        self.assertAlmostEqual(summary['bytes_per_second'], 50 / 4.35)
+
+    def test_quantile_capped_at_max(self):
+        """Test that a quantile never exceeds the slowest observation."""
+        histogram = Histogram(buckets=(1.0,))
+        histogram.observe(0.2)
+
+        self.assertEqual(histogram.quantile(0.5), 0.2)
+        self.assertEqual(Histogram().quantile(0.5), 0.0)
+
+    def test_timer_records_time_bytes_and_errors(self):
+        """Test that a timed block is recorded, also when it raises."""
+        registry = Metrics(clock=FakeClock(1.0, 1.25, 2.0, 2.5))
+        with registry.timer('save') as span:
+            span.nbytes = 100
+        with self.assertRaises(ValueError), registry.timer('save'):
+            raise ValueError
+
+        summary = registry.summary()['save']
+        self.assertEqual((summary['count'], summary['errors'], summary['bytes']), (2, 1, 100))
+        self.assertEqual((summary['seconds'], summary['max']), (0.75, 0.5))
+
+    def test_prometheus_text(self):
+        """Test the cumulative buckets, sums and counters of the Prometheus export."""
+        registry = Metrics(buckets=(0.1, 1.0))
+        registry.observe('fetch', 0.05, nbytes=2048)
+        registry.observe('fetch', 0.5, error=True)
+
+        lines = registry.to_prometheus().splitlines()
+
+        self.assertIn('# TYPE scraper_phase_seconds histogram', lines)
+        self.assertIn('scraper_phase_seconds_bucket{phase="fetch",le="0.1"} 1', lines)
+        self.assertIn('scraper_phase_seconds_bucket{phase="fetch",le="1.0"} 2', lines)
+        self.assertIn('scraper_phase_seconds_bucket{phase="fetch",le="+Inf"} 2', lines)
+        self.assertIn('scraper_phase_seconds_sum{phase="fetch"} 0.55', lines)
+        self.assertIn('scraper_phase_seconds_count{phase="fetch"} 2', lines)
+        self.assertIn('scraper_phase_bytes_total{phase="fetch"} 2048', lines)
+        self.assertIn('scraper_phase_errors_total{phase="fetch"} 1', lines)
+
+    def test_export(self):
+        """Test that export writes JSON and Prometheus files, and '-' prints."""
+        registry = Metrics()
+        registry.observe('parse', 0.01)
+        with tempfile.TemporaryDirectory() as tempdir:
+            json_path = os.path.join(tempdir, 'metrics.json')
+            prometheus_path = os.path.join(tempdir, 'metrics.prom')
+            registry.export(json_path, prometheus_path)
+            with open(json_path, encoding='utf-8') as file:
+                self.assertEqual(json.load(file)['parse']['count'], 1)
+            with open(prometheus_path, encoding='utf-8') as file:
+                self.assertIn('scraper_phase_seconds_count{phase="parse"} 1', file.read())
+
+        with patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            registry.export('-')
+        self.assertEqual(json.loads(stdout.getvalue()), registry.summary())
+
+    def test_http_client_records_fetches(self):
+        """Test that the shared client times each GET and counts its body bytes."""
+        registry = Metrics()
+        self.addCleanup(metrics.set_metrics, metrics.get_metrics())
+        metrics.set_metrics(registry)
+        body = "<p>" + "x" * 1000 + "</p>"
+        with LocalServer({'/page': body}) as server, http_client.HttpClient() as client:
+            client.get(server.url('/page'))
+            client.get(server.url('/page'))
+
+        summary = registry.summary()
+        self.assertEqual(summary['fetch']['count'], 2)
+        self.assertEqual(summary['fetch']['bytes'], 2 * len(body))
+        self.assertEqual(summary['ttfb']['count'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bs4 import BeautifulSoup
+from scraper import parsing
+
+
+class TestParsing(unittest.TestCase):
+
+    def setUp(self):
+        """Restore the selected backend after each test."""
+        self.addCleanup(parsing.set_backend, parsing.get_backend())
+
+    @unittest.skipUnless(parsing.lxml_html, "lxml is not installed")
+    def test_default_backend_is_lxml(self):
+        """Test that lxml is the default backend when it is installed."""
+        self.assertEqual(parsing.DEFAULT_BACKEND, 'lxml')
+
+    def test_set_backend_rejects_unknown(self):
+        """Test that an unknown backend name raises ValueError."""
+        with self.assertRaises(ValueError):
+            parsing.set_backend('regex')
+
+    def test_make_soup_uses_selected_backend(self):
+        """Test that make_soup builds a BeautifulSoup with the selected parser."""
+        parsing.set_backend('html.parser')
+        soup = parsing.make_soup("<p>Hello</p>")
+
+        self.assertIsInstance(soup, BeautifulSoup)
+        self.assertEqual(soup.builder.NAME, 'html.parser')
+
+    @unittest.skipUnless(parsing.lxml_html, "lxml is not installed")
+    def test_make_soup_with_fast_path_selected_still_returns_soup(self):
+        """Test that make_soup falls back to BeautifulSoup+lxml for the fast path."""
+        parsing.set_backend(parsing.LXML_FAST_PATH)
+        soup = parsing.make_soup("<p>Hello</p>")
+
+        self.assertIsInstance(soup, BeautifulSoup)
+        self.assertEqual(soup.builder.NAME, 'lxml')
+
+    @unittest.skipUnless(parsing.lxml_html, "lxml is not installed")
+    def test_fast_path_accepts_str_with_encoding_declaration(self):
+        """Test that str input with a charset declaration parses and keeps unicode."""
+        html = '<html><head><meta charset="utf-8"></head><body><h1>Café</h1></body></html>'
+        tree = parsing.parse_document(html, parsing.LXML_FAST_PATH)
+
+        self.assertTrue(parsing.is_lxml_tree(tree))
+        self.assertEqual(parsing.element_text(tree.xpath('//h1')[0]), "Café")
+
+    @unittest.skipUnless(parsing.lxml_html, "lxml is not installed")
+    def test_element_text_matches_get_text_strip(self):
+        """Test that element_text mirrors BeautifulSoup's get_text(strip=True)."""
+        html = "<div><p> a <b> b </b><!-- c --> d <i></i>\n e </p></div>"
+        tree = parsing.parse_document(html, parsing.LXML_FAST_PATH)
+        soup = parsing.parse_document(html, 'html.parser')
+
+        self.assertEqual(parsing.element_text(tree.xpath('//p')[0]),
+                         soup.find('p').get_text(strip=True))
+
+    @unittest.skipUnless(parsing.lxml_html, "lxml is not installed")
+    def test_has_class_xpath_matches_class_tokens(self):
+        """Test that the class XPath matches whole class tokens only."""
+        html = ('<div class="a main-content b"></div><div class="main-content-x"></div>'
+                '<div class="main-content"></div>')
+        tree = parsing.parse_document(html, parsing.LXML_FAST_PATH)
+
+        self.assertEqual(len(tree.xpath(parsing.has_class_xpath('div', 'main-content'))), 2)
+
+    def test_tag_strainer_keeps_matching_subtrees(self):
+        """Test that TagStrainer keeps matching elements with all of their children."""
+        strainer = parsing.TagStrainer(
+            lambda name, attrs: name == 'section' and 'keep' in parsing.class_tokens(attrs))
+        html = ('<div><section class="a keep"><p>One <b>bold</b></p></section>'
+                '<section class="drop"><p>Two</p></section></div>')
+        backends = ['html.parser'] + (['lxml'] if parsing.lxml_html else [])
+
+        for backend in backends:
+            with self.subTest(backend=backend):
+                soup = parsing.make_soup(html, backend, parse_only=strainer)
+                self.assertEqual([tag.name for tag in soup.find_all(True)], ['section', 'p', 'b'])
+                self.assertEqual(soup.get_text(), "One bold")
+
+    def test_class_tokens(self):
+        """Test class splitting for raw and pre-split class attributes."""
+        self.assertEqual(parsing.class_tokens({'class': ' a  b '}), ['a', 'b'])
+        self.assertEqual(parsing.class_tokens({'class': ['a', 'b']}), ['a', 'b'])
+        self.assertEqual(parsing.class_tokens({}), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
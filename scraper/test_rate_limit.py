@@ -0,0 +1,85 @@
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraper.fake_clock import FakeClock
+from scraper.rate_limit import AdaptiveRateLimiter, TokenBucket
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst_then_rate(self):
+        """Test that a full bucket allows a burst and then paces requests at the rate."""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2.0, burst=2, clock=clock)
+
+        self.assertEqual([bucket.reserve() for _ in range(4)], [0.0, 0.0, 0.5, 1.0])
+
+    def test_tokens_refill_over_time(self):
+        """Test that idle time refills the bucket up to its burst size."""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1.0, burst=2, clock=clock)
+        bucket.reserve()
+        bucket.reserve()
+
+        clock.now = 10
+        self.assertEqual([bucket.reserve() for _ in range(3)], [0.0, 0.0, 1.0])
+
+    def test_pause_delays_requests(self):
+        """Test that a paused bucket makes callers wait until the pause is over."""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10.0, burst=10, clock=clock)
+        bucket.pause(30)
+
+        self.assertEqual(bucket.reserve(), 30)
+
+
+class TestAdaptiveRateLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limiter = AdaptiveRateLimiter(rate=4.0, burst=1, min_rate=1.0, max_rate=5.0,
+                                           increase=0.5, decrease=0.5,
+                                           clock=self.clock, sleep=self.clock.sleep)
+
+    def test_success_increases_rate_up_to_max(self):
+        """Test additive increase on successful responses."""
+        self.limiter.feedback("https://a.test/1", 200)
+        self.assertEqual(self.limiter.host_rate("https://a.test/"), 4.5)
+
+        for _ in range(5):
+            self.limiter.feedback("https://a.test/1", 200)
+        self.assertEqual(self.limiter.host_rate("https://a.test/"), 5.0)
+
+    def test_throttling_halves_rate_down_to_min(self):
+        """Test multiplicative decrease on 429/503, 5xx and connection errors."""
+        self.limiter.feedback("https://a.test/1", 429)
+        self.assertEqual(self.limiter.host_rate("https://a.test/"), 2.0)
+        self.limiter.feedback("https://a.test/1", 500)
+        self.limiter.feedback("https://a.test/1")
+        self.assertEqual(self.limiter.host_rate("https://a.test/"), 1.0)
+
+    def test_client_errors_leave_rate_alone(self):
+        """Test that a 404 says nothing about server load."""
+        self.limiter.feedback("https://a.test/1", 404)
+        self.assertEqual(self.limiter.host_rate("https://a.test/"), 4.0)
+
+    def test_retry_after_pauses_host(self):
+        """Test that Retry-After pauses only the host that sent it."""
+        self.limiter.feedback("https://a.test/1", 503, retry_after=20)
+
+        self.limiter.acquire("https://a.test/2")
+        self.assertEqual(self.clock.now, 20)
+        self.assertEqual(self.limiter.reserve("https://b.test/"), 0.0)
+
+    def test_acquire_paces_requests(self):
+        """Test that acquire sleeps once the burst is used up."""
+        for _ in range(3):
+            self.limiter.acquire("https://a.test/")
+
+        self.assertEqual(self.clock.now, 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
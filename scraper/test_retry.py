@@ -0,0 +1,98 @@
+import unittest
+from unittest.mock import Mock
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import requests
+from scraper.fake_clock import FakeClock
+from scraper.retry import RetryPolicy, RetryQueue, is_retryable, parse_retry_after
+
+
+def http_error(status, retry_after=None):
+    response = requests.Response()
+    response.status_code = status
+    if retry_after is not None:
+        response.headers['Retry-After'] = retry_after
+    return requests.exceptions.HTTPError(f"{status}", response=response)
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def test_parse_retry_after(self):
+        """Test Retry-After as delay-seconds, as an HTTP date and invalid."""
+        self.assertEqual(parse_retry_after("120"), 120.0)
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:30 GMT", now=1445412480.0), 30.0)
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertIsNone(parse_retry_after(None))
+
+    def test_backoff_is_exponential_with_jitter_and_cap(self):
+        """Test that the jitter ceiling doubles per attempt up to max_backoff."""
+        policy = RetryPolicy(backoff=1.0, max_backoff=5.0, random=lambda: 1.0)
+        self.assertEqual([policy.delay(attempt) for attempt in (1, 2, 3, 4)], [1.0, 2.0, 4.0, 5.0])
+
+        policy.random = lambda: 0.25
+        self.assertEqual(policy.delay(3), 1.0)
+
+    def test_retry_after_is_a_floor(self):
+        """Test that the delay is never shorter than the server's Retry-After."""
+        policy = RetryPolicy(backoff=1.0, random=lambda: 0.0)
+        self.assertEqual(policy.delay(1, retry_after=7.0), 7.0)
+
+    def test_should_retry(self):
+        """Test that only retryable statuses are retried, and only max_retries times."""
+        policy = RetryPolicy(max_retries=2)
+        self.assertTrue(policy.should_retry(1, 503))
+        self.assertTrue(policy.should_retry(2))
+        self.assertFalse(policy.should_retry(3, 503))
+        self.assertFalse(policy.should_retry(1, 404))
+        self.assertFalse(policy.should_retry(1, 200))
+
+    def test_is_retryable(self):
+        """Test which request exceptions are worth retrying."""
+        self.assertTrue(is_retryable(requests.exceptions.ConnectionError()))
+        self.assertTrue(is_retryable(requests.exceptions.Timeout()))
+        self.assertTrue(is_retryable(http_error(429)))
+        self.assertFalse(is_retryable(http_error(404)))
+        self.assertFalse(is_retryable(ValueError()))
+
+
+class TestRetryQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        policy = RetryPolicy(max_retries=2, backoff=1.0, random=lambda: 1.0)
+        self.queue = RetryQueue(policy, clock=self.clock, sleep=self.clock.sleep)
+
+    def test_items_come_back_in_due_order(self):
+        """Test that pop_due waits for the earliest item and returns all that are due."""
+        self.queue.push('slow', 2)
+        self.queue.push('a', 1)
+        self.queue.push('b', 1, retry_after=1.0)
+
+        self.assertEqual(self.queue.pop_due(), [('a', 1), ('b', 1)])
+        self.assertEqual(self.clock.now, 1.0)
+        self.assertEqual(self.queue.pop_due(), [('slow', 2)])
+        self.assertEqual(self.clock.now, 2.0)
+        self.assertEqual(len(self.queue), 0)
+
+    def test_gives_up_after_max_retries(self):
+        """Test that an item failing too often is recorded as failed."""
+        error = Mock()
+        self.assertTrue(self.queue.push('a', 2))
+        self.assertFalse(self.queue.push('a', 3, error))
+
+        self.assertEqual(self.queue.failed, [('a', error)])
+        self.assertEqual(len(self.queue), 1)
+
+    def test_no_policy_retries_nothing(self):
+        """Test that a queue without a policy (retries disabled) fails every item at once."""
+        queue = RetryQueue(None)
+        error = Mock()
+
+        self.assertFalse(queue.push('a', 1, error))
+        self.assertEqual((queue.failed, len(queue)), ([('a', error)], 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
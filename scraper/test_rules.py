@@ -0,0 +1,144 @@
+import unittest
+from unittest.mock import patch
+import json
+import os
+import sys
+import tempfile
+
+from bs4 import Tag
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraper import parsing
+from scraper.rules import ExtractionRules, Selector, load_rules
+
+RULES = {
+    'title': {'tag': 'h1', 'split': '|'},
+    'body': [{'tag': 'div', 'class': 'main'}, {'tag': 'section', 'name': 'section'}],
+    'paragraph': {'tag': 'p'},
+    'card': {'tag': 'li', 'class': 'card'},
+    'type': {'tag': 'span', 'attrs': {'data-kind': 'type'}},
+    'link': {'tag': 'a'},
+}
+
+ARTICLE = """<html><body>
+<h1>Big <em>news</em> | Site</h1><h1>Second heading</h1>
+<p>Intro outside</p>
+<section><p>Section text</p></section>
+<div class="wrapper main"><p>First</p><div><p>Nested <b>second</b></p></div></div>
+</body></html>"""
+
+LISTING = """<html><body><ul>
+<li class="card"><span data-kind="type"> News </span><a href="/a1">One</a></li>
+<li class="card"><span>ignored</span><a href="/a2">Two</a></li>
+<li class="other"><span data-kind="type">News</span><a href="/a3">Three</a></li>
+<li class="card"><span data-kind="type">Research</span></li>
+</ul></body></html>"""
+
+
+class TestExtractionRules(unittest.TestCase):
+
+    def setUp(self):
+        """Compile the test rule set and collect the available backends."""
+        self.rules = ExtractionRules(RULES)
+        self.backends = [backend for backend in ('html.parser', 'lxml', parsing.LXML_FAST_PATH)
+                         if parsing.lxml_html is not None or backend == 'html.parser']
+
+    def for_each_backend(self, html):
+        for backend in self.backends:
+            with self.subTest(backend=backend):
+                yield parsing.parse_document(html, backend)
+
+    def test_selector_matches_tag_class_and_attrs(self):
+        """Test that a selector needs the tag, the class token and exact attributes."""
+        selector = Selector('div', 'main', {'role': 'article'})
+
+        self.assertTrue(selector.matches('div', {'class': 'x main', 'role': 'article'}))
+        self.assertTrue(selector.matches('div', {'class': ['main'], 'role': 'article'}))
+        self.assertFalse(selector.matches('div', {'class': 'mainly', 'role': 'article'}))
+        self.assertFalse(selector.matches('div', {'class': 'main'}))
+        self.assertFalse(selector.matches('span', {'class': 'main', 'role': 'article'}))
+
+    def test_body_by_priority(self):
+        """Test that the first body rule present wins, with its nested paragraphs."""
+        for document in self.for_each_backend(ARTICLE):
+            self.assertEqual(self.rules.extract_article(document),
+                             ("Bignews", ["First", "Nestedsecond"]))
+
+    def test_second_body_rule_and_fallback(self):
+        """Test the next body rule, and all paragraphs when no container holds any."""
+        without_main = ARTICLE.replace('class="wrapper main"', 'class="wrapper"')
+        for document in self.for_each_backend(without_main):
+            self.assertEqual(self.rules.extract_article(document)[1], ["Section text"])
+
+        empty_body = "<h1>T</h1><p>Loose</p><div class='main'></div><p>Also</p>"
+        for document in self.for_each_backend(empty_body):
+            self.assertEqual(self.rules.extract_article(document), ("T", ["Loose", "Also"]))
+
+    def test_no_title(self):
+        """Test that a page without a title element has no title."""
+        for document in self.for_each_backend("<p>Only text</p>"):
+            self.assertEqual(self.rules.extract_article(document), (None, ["Only text"]))
+
+    def test_whole_page_is_scanned_once(self):
+        """Test that only the winning container is searched a second time."""
+        document = parsing.parse_document(ARTICLE, 'html.parser')
+        with patch.object(Tag, 'find_all', autospec=True, side_effect=Tag.find_all) as mock_find_all:
+            self.rules.extract_article(document)
+
+        searched = [call.args[0] for call in mock_find_all.call_args_list]
+        self.assertEqual(searched, [document, document.find('div', class_='main')])
+
+    def test_hits_are_recorded_per_site(self):
+        """Test that the matched body rule is counted per site."""
+        document = parsing.parse_document(ARTICLE, 'html.parser')
+        self.rules.extract_article(document, 'a.example')
+        self.rules.extract_article(document, 'a.example')
+        self.rules.extract_article(parsing.parse_document("<p>x</p>", 'html.parser'), 'b.example')
+
+        self.assertEqual(self.rules.hits, {'a.example': {'div.main': 2}, 'b.example': {'fallback': 1}})
+
+    def test_hits_carry_over_between_rule_sets(self):
+        """Test that popped hits start a fresh count and add up where they are merged."""
+        other = ExtractionRules(self.rules.spec)
+        other.record_hit('a.example', 'div.main')
+        self.rules.record_hit('a.example', 'div.main', 2)
+
+        self.rules.merge_hits(other.pop_hits())
+
+        self.assertEqual(other.hits, {})
+        self.assertEqual(self.rules.hits, {'a.example': {'div.main': 3}})
+
+    def test_extract_cards(self):
+        """Test that listing cards yield their type, link and link text."""
+        for document in self.for_each_backend(LISTING):
+            self.assertEqual(self.rules.extract_cards(document), [
+                ("News", "/a1", "One"),
+                (None, "/a2", "Two"),
+                ("Research", None, None),
+            ])
+
+    def test_strainer_predicates(self):
+        """Test the predicates used for partial parsing."""
+        self.assertTrue(self.rules.is_article_part('div', {'class': 'x main'}))
+        self.assertTrue(self.rules.is_article_part('section', {}))
+        self.assertTrue(self.rules.is_article_part('h1', {}))
+        self.assertFalse(self.rules.is_article_part('div', {'class': 'x'}))
+        self.assertTrue(self.rules.is_listing_part('li', {'class': 'card'}))
+        self.assertFalse(self.rules.is_listing_part('li', {}))
+
+    def test_load_rules_merges_defaults(self):
+        """Test that a rules file only needs the keys it changes."""
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = os.path.join(tempdir, 'rules.json')
+            with open(path, 'w', encoding='utf-8') as file:
+                json.dump({'body': [{'tag': 'article'}]}, file)
+            rules = load_rules(path, RULES)
+
+        self.assertEqual([body.tag for body in rules.bodies], ['article'])
+        self.assertEqual(rules.card.cls, 'card')
+        with self.assertRaises(ValueError):
+            ExtractionRules({'title': {'tag': 'h1'}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+import json
+import sqlite3
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraper import sinks
+from scraper.sinks import (JsonLinesSink, SQLiteSink, ParquetSink, make_record, merge_sinks, open_sink,
+                          read_records)
+
+
+def records(count, text="Text"):
+    return [make_record(f"https://example.com/{i}", f"Title {i}", "News", 1 + i // 2, f"{text} {i}")
+            for i in range(count)]
+
+
+class TestSinks(unittest.TestCase):
+
+    def setUp(self):
+        """Write sink files into a temporary directory."""
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.tempdir.name, name)
+
+    def test_jsonl_sink_appends_records(self):
+        """Test that JSON Lines output keeps every record across runs."""
+        with JsonLinesSink(self.path('a.jsonl')) as sink:
+            for record in records(2):
+                sink.write(record)
+        with JsonLinesSink(self.path('a.jsonl')) as sink:
+            sink.write(records(3)[2])
+
+        with open(self.path('a.jsonl'), encoding='utf-8') as file:
+            lines = [json.loads(line) for line in file]
+        self.assertEqual([line['text'] for line in lines], ["Text 0", "Text 1", "Text 2"])
+        self.assertEqual(set(lines[0]), set(sinks.FIELDS))
+
+    def test_sqlite_sink_writes_in_batches(self):
+        """Test that rows are committed once a batch fills up and the rest on close."""
+        sink = SQLiteSink(self.path('a.sqlite3'), batch_size=2)
+        for record in records(3):
+            sink.write(record)
+        db = sqlite3.connect(self.path('a.sqlite3'))
+        self.addCleanup(db.close)
+        self.assertEqual(db.execute("SELECT COUNT(*) FROM articles").fetchone()[0], 2)
+        sink.close()
+
+        self.assertEqual(db.execute("SELECT url, title, type, page, text FROM articles ORDER BY url").fetchall(),
+                         [(r['url'], r['title'], r['type'], r['page'], r['text']) for r in records(3)])
+
+    def test_sqlite_sink_replaces_rescraped_urls(self):
+        """Test that scraping a URL again replaces its row."""
+        with SQLiteSink(self.path('a.sqlite3')) as sink:
+            for record in records(2):
+                sink.write(record)
+        with SQLiteSink(self.path('a.sqlite3')) as sink:
+            sink.write(records(1, text="New")[0])
+
+        db = sqlite3.connect(self.path('a.sqlite3'))
+        self.addCleanup(db.close)
+        self.assertEqual(db.execute("SELECT text FROM articles ORDER BY url").fetchall(),
+                         [("New 0",), ("Text 1",)])
+
+    @unittest.skipUnless(sinks.pyarrow, "pyarrow is not installed")
+    def test_parquet_sink_writes_row_groups(self):
+        """Test that Parquet output holds every record, one row group per batch."""
+        with ParquetSink(self.path('a.parquet'), row_group_size=2) as sink:
+            for record in records(5):
+                sink.write(record)
+
+        parquet_file = sinks.pyarrow.parquet.ParquetFile(self.path('a.parquet'))
+        self.assertEqual(parquet_file.metadata.num_row_groups, 3)
+        table = parquet_file.read()
+        self.assertEqual(table.column('text').to_pylist(), [r['text'] for r in records(5)])
+        self.assertEqual(table.column('page').to_pylist(), [1, 1, 2, 2, 3])
+
+    def test_open_sink(self):
+        """Test that open_sink creates the output directory and rejects unknown kinds."""
+        with open_sink('jsonl', self.path(os.path.join('out', 'a.jsonl'))) as sink:
+            self.assertIsInstance(sink, JsonLinesSink)
+        self.assertTrue(os.path.exists(self.path(os.path.join('out', 'a.jsonl'))))
+
+        with self.assertRaises(ValueError):
+            open_sink('csv')
+
+    def test_read_records_round_trip(self):
+        """Test that every sink reads back the records written to it."""
+        kinds = ['jsonl', 'sqlite', 'archive'] + (['parquet'] if sinks.pyarrow else [])
+        for kind in kinds:
+            with self.subTest(kind=kind):
+                with open_sink(kind, self.path(f'round-trip.{kind}')) as sink:
+                    for record in records(3):
+                        sink.write(record)
+
+                read = list(read_records(kind, self.path(f'round-trip.{kind}')))
+
+                self.assertEqual([{field: record[field] for field in ('url', 'title', 'type', 'page', 'text')}
+                                  for record in read],
+                                 [{field: record[field] for field in ('url', 'title', 'type', 'page', 'text')}
+                                  for record in records(3)])
+                self.assertTrue(all(record['fetched_at'] for record in read))
+
+    def test_merge_sinks_keeps_latest_fetch_of_each_url(self):
+        """Test that merging shard outputs writes each URL once, from its latest fetch."""
+        first, second = records(3), records(2, text="New")
+        for record in second:
+            record['fetched_at'] += 10
+        for name, batch in (('1.jsonl', first), ('2.jsonl', second)):
+            with open_sink('jsonl', self.path(name)) as sink:
+                for record in batch:
+                    sink.write(record)
+
+        count = merge_sinks('jsonl', [self.path('1.jsonl'), self.path('2.jsonl')], self.path('all.jsonl'))
+
+        merged = list(read_records('jsonl', self.path('all.jsonl')))
+        self.assertEqual(count, 3)
+        self.assertEqual([record['text'] for record in merged], ["Text 2", "New 0", "New 1"])
+
+
+if __name__ == '__main__':
+    unittest.main()
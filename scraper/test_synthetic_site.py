@@ -0,0 +1,67 @@
+import unittest
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraper import http_client
+from scraper.local_server import LocalServer
+from scraper.synthetic_site import LISTING_PATH, SyntheticSite
+
+
+class TestSyntheticSite(unittest.TestCase):
+
+    def setUp(self):
+        """Generate a small site."""
+        self.site = SyntheticSite(pages=3, articles_per_page=10, chrome_kib=4)
+
+    def test_same_seed_same_pages(self):
+        """Test that a seed always generates the same site."""
+        self.assertEqual(SyntheticSite(pages=3, articles_per_page=10, chrome_kib=4).routes(),
+                         self.site.routes())
+        self.assertNotEqual(SyntheticSite(pages=3, articles_per_page=10, chrome_kib=4, seed=1).routes(),
+                            self.site.routes())
+
+    def test_listing_cards_link_to_articles(self):
+        """Test that every card has a type and a link to an existing article page."""
+        routes = self.site.routes()
+        self.assertEqual(len(routes), 3 + 30)
+        soup = BeautifulSoup(routes[f'{LISTING_PATH}2'], 'html.parser')
+        cards = soup.find_all('article')
+
+        self.assertEqual(len(cards), 10)
+        news = []
+        for card in cards:
+            link = card.find('a', {'data-track-action': 'view article'})
+            self.assertIn(link['href'], routes)
+            if card.find('span', {'data-test': 'article.type'}).text == 'News':
+                news.append(link['href'])
+        self.assertEqual(news, self.site.news_on(2))
+
+    def test_article_page_shape(self):
+        """Test that articles have a title, a teaser and body paragraphs inside page chrome."""
+        soup = BeautifulSoup(self.site.articles['/articles/p1-0'], 'html.parser')
+
+        self.assertTrue(soup.find('h1').text.endswith(' 1 0 | Nature'))
+        body = soup.find('div', class_='c-article-body')
+        self.assertEqual(len(body.find_all('p', class_='article__teaser')), 1)
+        self.assertEqual(len(body.find_all('p')), 13)
+        self.assertIsNotNone(soup.find('footer'))
+
+    def test_server_bandwidth_cap(self):
+        """Test that LocalServer sends bodies no faster than its bandwidth."""
+        body = b'x' * 64 * 1024
+        with LocalServer({'/big': body}, bandwidth=512 * 1024) as server, \
+                http_client.HttpClient() as client:
+            start = time.perf_counter()
+            response = client.get(server.url('/big'))
+            elapsed = time.perf_counter() - start
+
+        self.assertEqual(response.content, body)
+        self.assertGreaterEqual(elapsed, 0.12)
+
+
+if __name__ == '__main__':
+    unittest.main()
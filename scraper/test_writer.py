@@ -0,0 +1,101 @@
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraper.writer import BackgroundWriter
+
+
+class TestBackgroundWriter(unittest.TestCase):
+
+    def setUp(self):
+        """Write into a temporary directory."""
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+
+    def path(self, *parts):
+        return os.path.join(self.tempdir.name, *parts)
+
+    def read(self, *parts):
+        with open(self.path(*parts), 'rb') as file:
+            return file.read()
+
+    def hold(self, writer):
+        """Block the writer thread until the returned event is set."""
+        started, release = threading.Event(), threading.Event()
+        writer.call(lambda: started.set() or release.wait(5))
+        started.wait(5)
+        return release
+
+    def test_close_drains_queue(self):
+        """Test that every queued file is on disk once close() returns."""
+        writer = BackgroundWriter(batch_size=8)
+        for i in range(50):
+            writer.write(self.path(f"Page_{i % 3}", f"{i}.txt"), f"article {i}".encode())
+        writer.close()
+
+        self.assertEqual(self.read("Page_2", "47.txt"), b"article 47")
+        self.assertEqual(writer.files, 50)
+        self.assertEqual(writer.bytes, sum(len(f"article {i}") for i in range(50)))
+        self.assertIn("Wrote 50 files", writer.report())
+
+    def test_writes_in_batches_and_creates_directories_once(self):
+        """Test that queued writes are grouped and each directory is created once."""
+        writer = BackgroundWriter(batch_size=10)
+        self.addCleanup(writer.close)
+        # hold the writer thread so the next writes pile up in the queue
+        release = self.hold(writer)
+        for i in range(20):
+            writer.write(self.path("Page_1", f"{i}.txt"), b"x")
+
+        with patch('scraper.writer.os.makedirs', wraps=os.makedirs) as mock_makedirs:
+            release.set()
+            writer.flush()
+
+        self.assertEqual(writer.batches, 3)
+        mock_makedirs.assert_called_once_with(self.path("Page_1"), exist_ok=True)
+
+    def test_callback_runs_after_write(self):
+        """Test that then() sees the file already written."""
+        seen = []
+        path = self.path("a.txt")
+        with BackgroundWriter() as writer:
+            writer.write(path, b"data", then=lambda: seen.append(os.path.exists(path)))
+
+        self.assertEqual(seen, [True])
+
+    def test_fsync_once_per_batch(self):
+        """Test that fsync covers the files and their directory at the end of a batch."""
+        writer = BackgroundWriter(batch_size=10, fsync=True)
+        self.addCleanup(writer.close)
+        release = self.hold(writer)
+        for i in range(3):
+            writer.write(self.path(f"{i}.txt"), b"x")
+
+        with patch('scraper.writer.os.fsync', wraps=os.fsync) as mock_fsync:
+            release.set()
+            writer.flush()
+
+        # three files plus the shared directory
+        self.assertEqual(mock_fsync.call_count, 4)
+        self.assertEqual(self.read("2.txt"), b"x")
+
+    def test_write_error_is_raised(self):
+        """Test that a failed write surfaces on flush/close instead of being lost."""
+        writer = BackgroundWriter()
+        open(self.path("blocker"), 'w').close()
+        writer.write(self.path("blocker", "a.txt"), b"data")
+
+        with self.assertRaises(OSError):
+            writer.flush()
+        with self.assertRaises(OSError):
+            writer.write(self.path("b.txt"), b"data")
+        with self.assertRaises(OSError):
+            writer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
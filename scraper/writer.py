@@ -0,0 +1,166 @@
+"""
+Background writer thread for article files.
+
+Crawl threads hand finished files to ``BackgroundWriter`` and carry on; a
+single writer thread drains a bounded queue in batches. Directories are
+created once, and with ``fsync=True`` a batch is made durable together
+(files, then their directories) instead of syncing after every file.
+Callbacks such as manifest records run only after their file is written,
+so the manifest never points at an article that did not reach the disk.
+
+``close()`` drains the queue before returning, also when the crawl is
+interrupted, and re-raises the first write error.
+"""
+
+import os
+import queue
+import threading
+import time
+
+DEFAULT_QUEUE_SIZE = 1024
+DEFAULT_BATCH_SIZE = 64
+_STOP = ('stop',)
+
+
+class BackgroundWriter:
+
+    def __init__(self, queue_size=DEFAULT_QUEUE_SIZE, batch_size=DEFAULT_BATCH_SIZE, fsync=False,
+                 clock=time.perf_counter):
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self.clock = clock
+        self.files = 0
+        self.bytes = 0
+        self.batches = 0
+        self.busy_seconds = 0.0
+        self.error = None
+        self._directories = set()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='article-writer', daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        if self.error is not None:
+            raise self.error
+        if self._closed:
+            raise RuntimeError("BackgroundWriter is closed")
+        # blocks when the disk falls behind, which slows the crawl down
+        self._queue.put(item)
+
+    def makedirs(self, path):
+        self._put(('dir', path))
+
+    def write(self, path, data, then=None):
+        """Queue ``data`` (bytes) for ``path``; ``then()`` runs once it is written."""
+        self._put(('file', path, data, then))
+
+    def call(self, function, *args):
+        """Run ``function(*args)`` on the writer thread, in order with the writes."""
+        self._put(('call', function, args))
+
+    def flush(self):
+        """Wait until everything queued so far is written."""
+        self._queue.join()
+        if self.error is not None:
+            raise self.error
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_STOP)
+            self._thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def throughput(self):
+        """Bytes written per second of writer time."""
+        return self.bytes / self.busy_seconds if self.busy_seconds else 0.0
+
+    def report(self):
+        return (f"Wrote {self.files} files ({self.bytes / 2 ** 20:.1f} MiB) in {self.batches} batches, "
+                f"{self.throughput() / 2 ** 20:.1f} MiB/s")
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size and batch[-1] is not _STOP:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                if self.error is None:
+                    self._write_batch([item for item in batch if item is not _STOP])
+            except BaseException as error:
+                self.error = error
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if batch[-1] is _STOP:
+                return
+
+    def _makedirs(self, path):
+        if path and path not in self._directories:
+            os.makedirs(path, exist_ok=True)
+            self._directories.add(path)
+
+    def _write_batch(self, batch):
+        start = self.clock()
+        unsynced = []
+        callbacks = []
+        try:
+            for item in batch:
+                if item[0] == 'dir':
+                    self._makedirs(item[1])
+                elif item[0] == 'call':
+                    item[1](*item[2])
+                else:
+                    _, path, data, then = item
+                    self._makedirs(os.path.dirname(path))
+                    file = open(path, 'wb')
+                    try:
+                        file.write(data)
+                    finally:
+                        if self.fsync:
+                            unsynced.append(file)
+                        else:
+                            file.close()
+                    self.files += 1
+                    self.bytes += len(data)
+                    if then is not None:
+                        callbacks.append(then)
+        except BaseException:
+            for file in unsynced:
+                file.close()
+            raise
+        if self.fsync:
+            self._sync(unsynced)
+        for then in callbacks:
+            then()
+        self.batches += 1
+        self.busy_seconds += self.clock() - start
+
+    def _sync(self, files):
+        directories = set()
+        try:
+            for file in files:
+                file.flush()
+                os.fsync(file.fileno())
+                directories.add(os.path.dirname(os.path.abspath(file.name)))
+        finally:
+            for file in files:
+                file.close()
+        # new directory entries are only durable once the directory is synced
+        for directory in directories:
+            fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
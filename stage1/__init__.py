@@ -0,0 +1,25 @@
+"""
+Stage 1: jokes from the icanhazdadjoke.com API.
+
+Run it with ``python -m stage1`` from the repository root. Importing the
+package has no side effects; its functions are imported from their module
+on first use::
+
+    from stage1 import random_joke_request
+"""
+
+from scraper.lazy import lazy_exports
+
+# Public name -> module defining it
+_EXPORTS = {
+    'random_joke_request': 'stage1',
+    'id_joke_request': 'stage1',
+    'main': 'stage1',
+    'JokeClient': 'joke_client',
+    'JokeNotFoundError': 'joke_client',
+    'LRUCache': 'joke_client',
+}
+
+__all__ = sorted(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -0,0 +1,4 @@
+# python -m stage1: runs stage1/stage1.py as the main module
+import runpy
+
+runpy.run_module('stage1.stage1', run_name='__main__', alter_sys=True)
@@ -0,0 +1,143 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from scraper import http_client
+from scraper.lazy import lazy_import
+
+requests = lazy_import('requests')
+
+BASE_URL = "https://icanhazdadjoke.com"
+HEADERS = {'Accept': 'application/json'}
+DEFAULT_CACHE_SIZE = 1024
+DEFAULT_TTL = 3600
+DEFAULT_WORKERS = 8
+# the API serves at most 30 results per search page
+DEFAULT_PAGE_SIZE = 30
+
+class JokeNotFoundError(LookupError):
+    # status: 404, or 200 for a reply that holds no joke
+
+    def __init__(self, joke_id, status=None):
+        super().__init__(joke_id)
+        self.status = status
+
+class LRUCache:
+    # Least recently used entries are dropped once maxsize is reached;
+    # entries older than ttl seconds count as missing
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE, ttl=DEFAULT_TTL, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            value, stored_at = item
+            if self.ttl is not None and self.clock() - stored_at >= self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, self.clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+class JokeClient:
+    # Jokes are returned as the API sends them: {"id": ..., "joke": ...}
+
+    def __init__(self, base_url=BASE_URL, client=None, cache_size=DEFAULT_CACHE_SIZE,
+                 ttl=DEFAULT_TTL, workers=DEFAULT_WORKERS, clock=time.monotonic):
+        self.base_url = base_url.rstrip('/')
+        self.client = client
+        self.workers = workers
+        self.cache = LRUCache(cache_size, ttl, clock)
+
+    def _get(self, path, params=None):
+        client = self.client or http_client.get_client()
+        return client.get(self.base_url + path, headers=HEADERS, params=params)
+
+    def random_joke(self):
+        response = self._get("/")
+        response.raise_for_status()
+        joke = response.json()
+        self.cache.put(joke["id"], joke)
+        return joke
+
+    def joke(self, joke_id):
+        cached = self.cache.get(joke_id)
+        if cached is not None:
+            return cached
+        response = self._get(f"/j/{joke_id}")
+        if response.status_code == 404:
+            raise JokeNotFoundError(joke_id, 404)
+        response.raise_for_status()
+        joke = response.json()
+        if "joke" not in joke:
+            raise JokeNotFoundError(joke_id, response.status_code)
+        self.cache.put(joke_id, joke)
+        return joke
+
+    def _joke_or_error(self, joke_id):
+        try:
+            return self.joke(joke_id)
+        except JokeNotFoundError:
+            return None
+        except requests.exceptions.RequestException as error:
+            # one failed ID must not lose the others' results
+            return error
+
+    def jokes(self, joke_ids):
+        # Concurrent lookup of many IDs; the result lines up with joke_ids and
+        # holds None for unknown IDs and the exception (HTTPError,
+        # ConnectionError, ...) for IDs whose request failed. Duplicates and
+        # cached IDs cost no request.
+        joke_ids = list(joke_ids)
+        unique_ids = list(dict.fromkeys(joke_ids))
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+            found = dict(zip(unique_ids, executor.map(self._joke_or_error, unique_ids)))
+        return [found[joke_id] for joke_id in joke_ids]
+
+    def search_page(self, term="", page=1, limit=DEFAULT_PAGE_SIZE):
+        response = self._get("/search", params={'term': term, 'page': page, 'limit': limit})
+        response.raise_for_status()
+        return response.json()
+
+    def search(self, term="", limit=DEFAULT_PAGE_SIZE):
+        # Yields every matching joke. The next page is requested in the
+        # background while the current one is being consumed.
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(self.search_page, term, 1, limit)
+            try:
+                while future is not None:
+                    page = future.result()
+                    future = None
+                    # next_page repeats the current page on the last one
+                    if page["current_page"] < page["total_pages"]:
+                        future = executor.submit(self.search_page, term, page["current_page"] + 1, limit)
+                    for joke in page["results"]:
+                        self.cache.put(joke["id"], joke)
+                        yield joke
+            finally:
+                # the caller stopped early; don't wait for a page nobody reads
+                if future is not None:
+                    future.cancel()
@@ -1,4 +1,8 @@
-import requests
+from scraper.lazy import lazy_import
+
+from .joke_client import JokeClient, JokeNotFoundError
+
+requests = lazy_import('requests')
 
 
 headers = {
@@ -10,36 +14,39 @@ headers = {
 
 
 
+jokes = JokeClient()
+
+
 def random_joke_request():
-    response = requests.get(url="https://icanhazdadjoke.com", headers=headers)
-    data = response.json()
-    return data["joke"]
+    return jokes.random_joke()["joke"]
 
 
-def id_joke_request():
-        joke_id = input("Input id of joke:\n")
+def id_joke_request(joke_id=None):
+        if joke_id is None:
+            joke_id = input("Input id of joke:\n")
         try:
-            response = requests.get(url=f"https://icanhazdadjoke.com/j/{joke_id}", headers=headers)
-            if response.status_code == 200:
-                data = response.json()
-                if "joke" in data:
-                    return data["joke"]
-                else:
-                    return "Invalid resource"
-            else:
-                return "Invalid resource!"
+            return jokes.joke(joke_id)["joke"]
+        except JokeNotFoundError as error:
+            # a reply without a joke, as opposed to an error status
+            return "Invalid resource" if error.status == 200 else "Invalid resource!"
+        except requests.exceptions.HTTPError:
+            return "Invalid resource!"
         except requests.exceptions.RequestException:
             return "Invalid resource! "
 
 
+def main():
+    want_random = input("Do you want some random joke or you will try to hit id? yes/no ")
+    want_random = want_random.lower()
+
+    if want_random == "yes":
+        print(random_joke_request())
+    elif want_random == "no":
+        print(id_joke_request())
+    else:
+        print("Invalid input. Showing a random joke by default.")
+        print(random_joke_request())
 
-want_random = input("Do you want some random joke or you will try to hit id? yes/no ")
-want_random = want_random.lower()
 
-if want_random == "yes":
-    print(random_joke_request())
-elif want_random == "no":
-    print(id_joke_request())
-else:
-    print("Invalid input. Showing a random joke by default.")
-    print(random_joke_request())
\ No newline at end of file
+if __name__ == "__main__":
+    main()
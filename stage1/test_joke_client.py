@@ -0,0 +1,163 @@
+import unittest
+import json
+import sys
+import os
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import requests
+from stage1.joke_client import JokeClient, JokeNotFoundError, LRUCache
+from scraper import http_client
+from scraper.fake_clock import FakeClock
+from scraper.local_server import LocalServer
+
+JOKES = [{"id": f"j{i}", "joke": f"Joke number {i}"} for i in range(7)]
+
+
+def json_response(status, data):
+    return status, {'Content-Type': 'application/json'}, json.dumps(data)
+
+
+def search_route(jokes, on_request=None):
+    """Route paginating ``jokes`` the way the API's /search endpoint does."""
+    def route(handler):
+        query = parse_qs(urlsplit(handler.path).query)
+        page, limit = int(query.get('page', ['1'])[0]), int(query.get('limit', ['20'])[0])
+        matches = [joke for joke in jokes if query.get('term', [''])[0] in joke["joke"]]
+        total_pages = max(1, -(-len(matches) // limit))
+        if on_request:
+            on_request(page)
+        return json_response(200, {
+            "current_page": page, "limit": limit, "total_jokes": len(matches),
+            "total_pages": total_pages, "next_page": min(page + 1, total_pages),
+            "results": matches[(page - 1) * limit:page * limit], "status": 200,
+        })
+    return route
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_evicts_least_recently_used(self):
+        """Test that the least recently used key goes first."""
+        cache = LRUCache(maxsize=2, ttl=None)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+
+        self.assertEqual((cache.get('a'), cache.get('b'), cache.get('c')), (1, None, 3))
+
+    def test_entries_expire_after_ttl(self):
+        """Test that entries older than the TTL count as missing."""
+        clock = FakeClock()
+        cache = LRUCache(maxsize=10, ttl=60, clock=clock)
+        cache.put('a', 1)
+
+        clock.now = 59
+        self.assertEqual(cache.get('a'), 1)
+        clock.now = 60
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+
+class TestJokeClient(unittest.TestCase):
+
+    def setUp(self):
+        """Serve a small joke API from a local JSON server."""
+        routes = {f"/j/{joke['id']}": json_response(200, dict(joke, status=200)) for joke in JOKES}
+        routes["/"] = json_response(200, dict(JOKES[0], status=200))
+        routes["/j/broken"] = json_response(500, {"status": 500})
+        routes["/search"] = search_route(JOKES)
+        self.server = LocalServer(routes).start()
+        self.addCleanup(self.server.stop)
+        self.http = http_client.HttpClient()
+        self.addCleanup(self.http.close)
+        self.clock = FakeClock()
+        self.jokes = JokeClient(self.server.base_url, client=self.http, ttl=60, clock=self.clock)
+
+    def test_random_joke(self):
+        """Test that a random joke is returned and sent with the JSON Accept header."""
+        self.assertEqual(self.jokes.random_joke()["joke"], "Joke number 0")
+        _, headers = self.server.requests[0]
+        self.assertEqual(headers['Accept'], 'application/json')
+
+    def test_joke_lookup_is_memoized_until_ttl(self):
+        """Test that repeated lookups are served from memory until the TTL passes."""
+        self.jokes.joke("j1")
+        self.jokes.joke("j1")
+        self.assertEqual(self.server.hits["/j/j1"], 1)
+
+        self.clock.now = 61
+        self.assertEqual(self.jokes.joke("j1")["joke"], "Joke number 1")
+        self.assertEqual(self.server.hits["/j/j1"], 2)
+
+    def test_unknown_joke_raises(self):
+        """Test that a 404 raises JokeNotFoundError and other errors raise HTTPError."""
+        with self.assertRaises(JokeNotFoundError) as raised:
+            self.jokes.joke("nope")
+        self.assertEqual(raised.exception.status, 404)
+        with self.assertRaises(requests.exceptions.HTTPError):
+            self.jokes.joke("broken")
+
+    def test_bulk_lookup_runs_concurrently(self):
+        """Test that many IDs are fetched in parallel and returned in input order."""
+        barrier = threading.Barrier(3, timeout=5)
+
+        def slow_joke(joke):
+            def route(handler):
+                barrier.wait()
+                return json_response(200, joke)
+            return route
+
+        for joke in JOKES[:3]:
+            self.server.routes[f"/j/{joke['id']}"] = slow_joke(joke)
+
+        result = self.jokes.jokes(["j2", "missing", "j0", "j1", "j2"])
+
+        self.assertEqual([joke and joke["id"] for joke in result], ["j2", None, "j0", "j1", "j2"])
+        self.assertEqual(self.server.hits["/j/j2"], 1)
+
+    def test_bulk_lookup_reports_failed_ids(self):
+        """Test that a failing ID gets its exception and the other IDs still get their jokes."""
+        result = self.jokes.jokes(["j0", "broken", "missing", "j1"])
+
+        self.assertEqual([result[0]["id"], result[2], result[3]["id"]], ["j0", None, "j1"])
+        self.assertIsInstance(result[1], requests.exceptions.HTTPError)
+
+    def test_search_paginates_through_all_results(self):
+        """Test that the generator walks every page of the search results."""
+        result = list(self.jokes.search("Joke", limit=3))
+
+        self.assertEqual([joke["id"] for joke in result], [joke["id"] for joke in JOKES])
+        pages = sorted(path for path in self.server.hits if path.startswith("/search"))
+        self.assertEqual(len(pages), 3)
+
+    def test_search_prefetches_next_page(self):
+        """Test that the next page is requested before the current one is consumed."""
+        requested = []
+        next_page_requested = threading.Event()
+
+        def on_request(page):
+            requested.append(page)
+            if page == 2:
+                next_page_requested.set()
+
+        self.server.routes["/search"] = search_route(JOKES, on_request)
+        results = self.jokes.search("Joke", limit=3)
+        next(results)
+
+        self.assertTrue(next_page_requested.wait(5))
+        self.assertEqual(requested, [1, 2])
+        results.close()
+
+    def test_search_results_warm_the_cache(self):
+        """Test that jokes seen while searching need no further request."""
+        list(self.jokes.search("number 4"))
+        self.jokes.joke("j4")
+
+        self.assertEqual(self.server.hits["/j/j4"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
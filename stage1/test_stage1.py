@@ -4,6 +4,10 @@ import requests
 import sys
 import os
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stage1 import stage1
+from stage1.joke_client import JokeNotFoundError
+
 
 # Function definitions from stage1.py (copied for testing)
 def random_joke_request():
@@ -116,5 +120,41 @@ class TestStage1Functions(unittest.TestCase):
         self.assertEqual(result, "Invalid resource! ")
 
 
+class TestStage1Module(unittest.TestCase):
+    """The real stage1 functions, with the joke client mocked."""
+
+    def setUp(self):
+        patcher = patch.object(stage1, 'jokes')
+        self.jokes = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_id_joke_request_messages(self):
+        """Test that each kind of failure keeps its message from before the joke client."""
+        cases = [
+            ({"id": "j1", "joke": "A joke"}, "A joke"),
+            (JokeNotFoundError("j1", 404), "Invalid resource!"),
+            (JokeNotFoundError("j1", 200), "Invalid resource"),
+            (requests.exceptions.HTTPError("500 Server Error"), "Invalid resource!"),
+            (requests.exceptions.ConnectionError("refused"), "Invalid resource! "),
+        ]
+        for outcome, message in cases:
+            with self.subTest(outcome=outcome):
+                if isinstance(outcome, Exception):
+                    self.jokes.joke.side_effect = outcome
+                else:
+                    self.jokes.joke.side_effect = None
+                    self.jokes.joke.return_value = outcome
+                self.assertEqual(stage1.id_joke_request("j1"), message)
+        self.jokes.joke.assert_called_with("j1")
+
+    @patch('builtins.input', return_value="j1")
+    def test_id_joke_request_asks_for_id(self, mock_input):
+        """Test that without an ID the user is asked for one."""
+        self.jokes.joke.return_value = {"id": "j1", "joke": "A joke"}
+
+        self.assertEqual(stage1.id_joke_request(), "A joke")
+        mock_input.assert_called_once_with("Input id of joke:\n")
+
+
 if __name__ == '__main__':
     unittest.main()
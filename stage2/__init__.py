@@ -0,0 +1,27 @@
+"""
+Stage 2: title and description of Nature articles, many at a time.
+
+Run it with ``python -m stage2`` from the repository root. Importing the
+package has no side effects; its functions are imported from their module
+on first use::
+
+    from stage2 import InvalidPageError
+"""
+
+from scraper.lazy import lazy_exports
+
+# Public name -> module defining it
+_EXPORTS = {
+    'InvalidPageError': 'stage2',
+    'parse_metadata': 'stage2',
+    'extract_metadata': 'stage2',
+    'fetch_record': 'stage2',
+    'extract_many': 'stage2',
+    'write_jsonl': 'stage2',
+    'read_articles': 'stage2',
+    'main': 'stage2',
+}
+
+__all__ = sorted(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -0,0 +1,4 @@
+# python -m stage2: runs stage2/stage2.py as the main module
+import runpy
+
+runpy.run_module('stage2.stage2', run_name='__main__', alter_sys=True)
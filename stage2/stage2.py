@@ -1,31 +1,135 @@
-import requests
-from bs4 import BeautifulSoup
+import argparse
+import itertools
+import json
+import os.path
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from scraper import http_client, parsing
+from scraper.lazy import lazy_import
+
+requests = lazy_import('requests')
 
 headers = {'Accept-Language': 'en-US,en;q=0.5'}
 url = "https://www.natre.com/articles/d41586-023-00103-3"
 
-if "nature.com/articles/" not in url:
-    print("Invalid page!")
-    exit()
+ARTICLE_URL_MARKER = "nature.com/articles/"
+NATURE_ARTICLES_URL = "https://www.nature.com/articles/"
+# Nature DOIs map 1:1 onto article URLs: 10.1038/<id> -> nature.com/articles/<id>
+NATURE_DOI_PREFIX = "10.1038/"
+DEFAULT_WORKERS = 8
+
+class InvalidPageError(Exception):
+    pass
+
+def is_head_part(name, attrs):
+    # Title and description both live in <head>; the body is never downloaded
+    return name in ('title', 'meta')
+
+HEAD_STRAINER = parsing.TagStrainer(is_head_part)
+
+def article_url(value):
+    value = value.strip()
+    for prefix in ("https://doi.org/", "http://doi.org/", "doi:"):
+        if value.lower().startswith(prefix):
+            value = value[len(prefix):]
+            break
+    if value.startswith(NATURE_DOI_PREFIX):
+        return NATURE_ARTICLES_URL + value[len(NATURE_DOI_PREFIX):]
+    return value
+
+def parse_metadata(content):
+    soup = parsing.make_soup(http_client.head_markup(content), parse_only=HEAD_STRAINER)
+    title_tag = soup.find('title')
+    description_tag = soup.find('meta', attrs={'name': 'description'})
+    if title_tag is None or not title_tag.text.strip() or description_tag is None:
+        raise InvalidPageError("missing title or description")
+    return {"title": title_tag.text.strip(),
+            "description": description_tag.get('content', '').strip()}
 
-response = requests.get(url=url, headers=headers)
+def extract_metadata(article):
+    page_url = article_url(article)
+    if ARTICLE_URL_MARKER not in page_url:
+        raise InvalidPageError("not a nature.com article URL")
+    response = http_client.get_head(page_url, headers=headers)
+    if response.status_code != 200:
+        raise InvalidPageError(f"HTTP {response.status_code}")
+    return parse_metadata(response.content)
 
-if response.status_code != 200:
-    print("Invalid page!")
-    exit()
+def fetch_record(article):
+    # One JSON-serialisable record per input; failures are reported, not raised
+    record = {"url": article}
+    try:
+        record.update(extract_metadata(article))
+    except InvalidPageError as error:
+        record["error"] = str(error)
+    except requests.exceptions.RequestException as error:
+        record["error"] = f"{type(error).__name__}: {error}"
+    return record
 
-soup = BeautifulSoup(response.content, 'html.parser')
-title_text = soup.find('title').text
-description_tag = soup.find('meta', attrs={'name': 'description'})
+def extract_many(articles, workers=DEFAULT_WORKERS):
+    # Yields one record per input URL/DOI, in input order. Only a bounded
+    # window of fetches is in flight, so the input can be arbitrarily long.
+    window = max(1, workers) * 4
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        pending = deque()
+        for article in articles:
+            pending.append(executor.submit(fetch_record, article))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
 
-if not title_text or not description_tag:
-    print("Invalid page!")
-    exit()
+def write_jsonl(records, file):
+    count = 0
+    for record in records:
+        file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        file.flush()
+        count += 1
+    return count
 
+def read_articles(file):
+    for line in file:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            yield line
 
-title = title_text.strip()
-description = description_tag.get('content', '').strip()
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Nature.com article metadata extractor")
+    parser.add_argument('articles', nargs='*',
+                        help="article URLs or Nature DOIs (10.1038/...)")
+    parser.add_argument('--input', '-i',
+                        help="file with one URL or DOI per line ('-' for stdin)")
+    parser.add_argument('--output', '-o',
+                        help="write JSON Lines here instead of stdout")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help="number of concurrent fetches")
+    return parser.parse_args(argv)
 
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.articles and not args.input:
+        # Original single-page behaviour for the hardcoded URL
+        record = fetch_record(url)
+        if "error" in record:
+            print("Invalid page!")
+        else:
+            print({"title": record["title"], "description": record["description"]})
+        return
 
+    input_file = None
+    if args.input:
+        input_file = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        source = itertools.chain(args.articles, read_articles(input_file) if input_file else ())
+        write_jsonl(extract_many(source, args.workers), output)
+    finally:
+        if input_file not in (None, sys.stdin):
+            input_file.close()
+        if output is not sys.stdout:
+            output.close()
 
-print({"title": title, "description": description})
+if __name__ == "__main__":
+    main()
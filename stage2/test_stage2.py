@@ -0,0 +1,135 @@
+import unittest
+from unittest.mock import patch
+import io
+import json
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stage2 import stage2
+from scraper import http_client
+from scraper.local_server import LocalServer
+
+
+def article_head(title, description, body=""):
+    return (f'<html><head><meta charset="utf-8"><title>{title}</title>'
+            f'<meta name="description" content="{description}"></head>'
+            f'<body>{body}</body></html>')
+
+
+class TestStage2(unittest.TestCase):
+
+    def test_article_url_accepts_dois(self):
+        """Test that Nature DOIs in their usual spellings map onto article URLs."""
+        expected = "https://www.nature.com/articles/d41586-023-00103-3"
+        for value in ("10.1038/d41586-023-00103-3", "doi:10.1038/d41586-023-00103-3",
+                      "https://doi.org/10.1038/d41586-023-00103-3", expected):
+            with self.subTest(value=value):
+                self.assertEqual(stage2.article_url(value), expected)
+
+    def test_parse_metadata_reads_head_only(self):
+        """Test that markup after </head> is not parsed."""
+        html = article_head(" A title ", " A summary ",
+                            body="<title>Body title</title><meta name='description' content='x'>")
+        self.assertEqual(http_client.head_markup(html.encode()), html.split('<body>')[0].encode())
+        self.assertEqual(stage2.parse_metadata(html.encode()),
+                         {"title": "A title", "description": "A summary"})
+
+    def test_parse_metadata_requires_title_and_description(self):
+        """Test that a page without a description is rejected."""
+        with self.assertRaises(stage2.InvalidPageError):
+            stage2.parse_metadata(b"<html><head><title>Only a title</title></head></html>")
+
+
+class TestStage2Batch(unittest.TestCase):
+
+    def setUp(self):
+        """Serve a few article pages from a local server."""
+        self.server = LocalServer({
+            '/articles/a1': article_head("First | Nature", "One"),
+            '/articles/a2': article_head("Second | Nature", "Two"),
+            '/articles/empty': "<html><head></head><body></body></html>",
+        }).start()
+        self.addCleanup(self.server.stop)
+        stage2.http_client.set_client(http_client.HttpClient())
+        self.addCleanup(stage2.http_client.set_client, None)
+        patcher = patch('stage2.stage2.ARTICLE_URL_MARKER', '/articles/')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_extract_many_reports_errors_per_url(self):
+        """Test that failures become error records and do not stop the batch."""
+        urls = [self.server.url('/articles/a1'), self.server.url('/articles/missing'),
+                self.server.url('/articles/empty'), "https://example.com/about",
+                self.server.url('/articles/a2')]
+
+        records = list(stage2.extract_many(urls, workers=3))
+
+        self.assertEqual([record["url"] for record in records], urls)
+        self.assertEqual(records[0]["title"], "First | Nature")
+        self.assertEqual(records[1]["error"], "HTTP 404")
+        self.assertEqual(records[2]["error"], "missing title or description")
+        self.assertEqual(records[3]["error"], "not a nature.com article URL")
+        self.assertEqual(records[4], {"url": urls[4], "title": "Second | Nature", "description": "Two"})
+
+    def test_network_errors_are_reported(self):
+        """Test that connection failures are reported instead of raised."""
+        url = self.server.url('/articles/a1')
+        self.server.stop()
+
+        record, = stage2.extract_many([url])
+
+        self.assertIn("ConnectionError", record["error"])
+
+    def test_extract_many_is_lazy(self):
+        """Test that only a bounded window of inputs is consumed ahead of the output."""
+        consumed = []
+
+        def urls():
+            for i in range(100):
+                consumed.append(i)
+                yield self.server.url('/articles/a1')
+
+        records = stage2.extract_many(urls(), workers=2)
+        next(records)
+
+        self.assertLessEqual(len(consumed), 2 * 4 + 1)
+        records.close()
+
+    def test_main_writes_json_lines(self):
+        """Test the batch CLI reading an input file and writing JSON Lines."""
+        with tempfile.TemporaryDirectory() as tempdir:
+            input_path = os.path.join(tempdir, 'urls.txt')
+            output_path = os.path.join(tempdir, 'out.jsonl')
+            with open(input_path, 'w', encoding='utf-8') as file:
+                file.write(f"# articles\n{self.server.url('/articles/a1')}\n\n"
+                           f"{self.server.url('/articles/missing')}\n")
+
+            stage2.main([self.server.url('/articles/a2'), '--input', input_path,
+                         '--output', output_path])
+
+            with open(output_path, encoding='utf-8') as file:
+                records = [json.loads(line) for line in file]
+        self.assertEqual([record.get("title") for record in records],
+                         ["Second | Nature", "First | Nature", None])
+
+    def test_main_without_arguments_keeps_single_page_output(self):
+        """Test that the hardcoded URL is still printed as a dict."""
+        with patch('stage2.stage2.url', self.server.url('/articles/a1')), \
+                patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            stage2.main([])
+
+        self.assertEqual(stdout.getvalue().strip(), str({"title": "First | Nature", "description": "One"}))
+
+    def test_main_without_arguments_reports_invalid_page(self):
+        """Test that a bad hardcoded URL prints the original error message."""
+        with patch('stage2.stage2.url', self.server.url('/articles/missing')), \
+                patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            stage2.main([])
+
+        self.assertEqual(stdout.getvalue().strip(), "Invalid page!")
+
+
+if __name__ == '__main__':
+    unittest.main()
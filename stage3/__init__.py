@@ -0,0 +1,23 @@
+"""
+Stage 3: save a web page to a file or an archive.
+
+Run it with ``python -m stage3`` from the repository root. Importing the
+package has no side effects; its functions are imported from their module
+on first use::
+
+    from stage3 import get_response
+"""
+
+from scraper.lazy import lazy_exports
+
+# Public name -> module defining it
+_EXPORTS = {
+    'get_response': 'stage3',
+    'save_to_file': 'stage3',
+    'save_to_archive': 'stage3',
+    'download_to_file': 'stage3',
+}
+
+__all__ = sorted(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -0,0 +1,4 @@
+# python -m stage3: runs stage3/stage3.py as the main module
+import runpy
+
+runpy.run_module('stage3.stage3', run_name='__main__', alter_sys=True)
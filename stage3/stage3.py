@@ -1,13 +1,19 @@
-import requests
 from http import HTTPStatus
 
+from scraper import http_client
+from scraper.archive import Archive
+from scraper.download import DEFAULT_CHUNK_SIZE, download
+from scraper.lazy import lazy_import
+
+requests = lazy_import('requests')
+
 headers = {'Accept-Language': 'en-US,en;q=0.5'}
 url_ok = "https://www.facebook.com/"
 url_bad = "http://google.com/asdfg"
 
 
 def get_response():
-    response = requests.get(url=url_ok, headers=headers)
+    response = http_client.get(url=url_ok, headers=headers)
     if response.status_code == HTTPStatus.OK:
         return response.content
 
@@ -25,7 +31,30 @@ def save_to_file(input_data):
         print("Error during saving file")
 
 
-data = get_response()
-if data:
-    save_to_file(data)
+def save_to_archive(input_data, archive_dir, url=url_ok, filename="source.html"):
+    # Compressed and deduplicated: an unchanged page costs no new blob
+    try:
+        with Archive(archive_dir) as archive:
+            archive.put(url, input_data, filename=filename)
+        print("Content saved.")
+    except PermissionError:
+        print("Error during saving file")
+
+
+# Returns the number of bytes saved, or None when nothing was saved
+def download_to_file(url=url_ok, filename="source.html", chunk_size=DEFAULT_CHUNK_SIZE, resume=False):
+    try:
+        size = download(url, filename, chunk_size=chunk_size, resume=resume, headers=headers)
+        print("Content saved.")
+        return size
+    except requests.exceptions.HTTPError as error:
+        print(f"The URL returned {error.response.status_code}!")
+    except PermissionError:
+        print("Error during saving file")
+    return None
+
+
+if __name__ == "__main__":
+    download_to_file()
+
 
@@ -0,0 +1,151 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import requests
+from stage3 import stage3
+from scraper import http_client
+from scraper.archive import Archive
+from scraper.local_server import LocalServer
+
+PAGE = b"<html><body><h1>Saved page</h1></body></html>"
+# Large next to the chunk size, so keeping it in memory would show up
+LARGE_BODY = bytes(range(256)) * 16 * 1024
+
+
+class LocalSiteTestCase(unittest.TestCase):
+    """Runs stage3 against a local stand-in site from a temporary working directory."""
+
+    def setUp(self):
+        """Serve a page, a large file and a missing page from a local server."""
+        self.server = LocalServer({
+            '/page': (200, {'Content-Type': 'text/html'}, PAGE),
+            '/large': (200, {'Content-Type': 'application/octet-stream'}, LARGE_BODY),
+            '/missing': (404, {}, b'Not found'),
+        }).start()
+        self.addCleanup(self.server.stop)
+        stage3.http_client.set_client(http_client.HttpClient())
+        self.addCleanup(stage3.http_client.set_client, None)
+
+        self.workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.workdir.cleanup)
+        cwd = os.getcwd()
+        os.chdir(self.workdir.name)
+        self.addCleanup(os.chdir, cwd)
+
+    def read(self, path):
+        with open(path, 'rb') as file:
+            return file.read()
+
+
+class TestDownloadToFile(LocalSiteTestCase):
+
+    @patch('builtins.print')
+    def test_saves_page_and_returns_byte_count(self, mock_print):
+        """Test that the page is saved and its size in bytes returned."""
+        size = stage3.download_to_file(self.server.url('/page'))
+
+        self.assertEqual(size, len(PAGE))
+        self.assertEqual(self.read("source.html"), PAGE)
+        self.assertEqual(sorted(os.listdir('.')), ["source.html"])
+        mock_print.assert_called_once_with("Content saved.")
+
+    @patch('builtins.print')
+    def test_streams_large_body_to_disk(self, mock_print):
+        """Test that a large body is written in chunks instead of held in memory."""
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+        size = stage3.download_to_file(self.server.url('/large'), "large.bin", chunk_size=16 * 1024)
+        _, peak = tracemalloc.get_traced_memory()
+
+        self.assertEqual(size, len(LARGE_BODY))
+        self.assertEqual(self.read("large.bin"), LARGE_BODY)
+        self.assertLess(peak, len(LARGE_BODY) // 4)
+
+    @patch('builtins.print')
+    def test_error_status_leaves_no_partial_file(self, mock_print):
+        """Test that an error response saves nothing and keeps an earlier copy."""
+        with open("source.html", 'wb') as file:
+            file.write(PAGE)
+
+        self.assertIsNone(stage3.download_to_file(self.server.url('/missing')))
+
+        self.assertEqual(self.read("source.html"), PAGE)
+        self.assertEqual(sorted(os.listdir('.')), ["source.html"])
+        mock_print.assert_called_once_with("The URL returned 404!")
+
+    @patch('builtins.print')
+    def test_dropped_connection_keeps_part_file_for_resume(self, mock_print):
+        """Test that a body cut off mid-way leaves only the .part file, which resume completes."""
+        def dropped(handler):
+            # announce the whole body, send half of it, then hang up
+            handler.send_response(200)
+            handler.send_header('Content-Length', str(len(LARGE_BODY)))
+            handler.end_headers()
+            handler.wfile.write(LARGE_BODY[:len(LARGE_BODY) // 2])
+            # the server drops the connection quietly, like a reset one
+            raise ConnectionResetError
+
+        self.server.routes['/large'] = dropped
+        with self.assertRaises(requests.exceptions.RequestException):
+            stage3.download_to_file(self.server.url('/large'), "large.bin")
+        self.assertFalse(os.path.exists("large.bin"))
+        self.assertTrue(os.path.exists("large.bin.part"))
+
+        self.server.routes['/large'] = (200, {'Content-Type': 'application/octet-stream'}, LARGE_BODY)
+        self.assertEqual(stage3.download_to_file(self.server.url('/large'), "large.bin", resume=True),
+                         len(LARGE_BODY))
+        self.assertEqual(self.read("large.bin"), LARGE_BODY)
+        self.assertEqual(sorted(os.listdir('.')), ["large.bin"])
+
+    @patch('builtins.print')
+    def test_permission_error_is_reported(self, mock_print):
+        """Test that a file that can't be written prints an error and returns None."""
+        with patch('stage3.stage3.download', side_effect=PermissionError):
+            self.assertIsNone(stage3.download_to_file(self.server.url('/page')))
+        mock_print.assert_called_once_with("Error during saving file")
+
+
+class TestSaveToArchive(LocalSiteTestCase):
+
+    def setUp(self):
+        """Point stage3 at the local page."""
+        super().setUp()
+        patcher = patch.object(stage3, 'url_ok', self.server.url('/page'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch('builtins.print')
+    def test_saves_fetched_page(self, mock_print):
+        """Test that the fetched page is stored under its URL."""
+        stage3.save_to_archive(stage3.get_response(), "archive", url=stage3.url_ok)
+
+        with Archive("archive") as archive:
+            self.assertEqual(archive.get(stage3.url_ok), PAGE)
+            self.assertEqual(archive.entries[stage3.url_ok]['filename'], "source.html")
+        mock_print.assert_called_once_with("Content saved.")
+
+    @patch('builtins.print')
+    def test_unchanged_page_adds_no_blob(self, mock_print):
+        """Test that saving the same page twice stores one blob."""
+        for _ in range(2):
+            stage3.save_to_archive(stage3.get_response(), "archive", url=stage3.url_ok)
+
+        blobs = [name for _, _, files in os.walk(os.path.join("archive", "objects")) for name in files]
+        self.assertEqual(len(blobs), 1)
+        self.assertEqual(self.server.hits['/page'], 2)
+
+    @patch('builtins.print')
+    def test_permission_error_is_reported(self, mock_print):
+        """Test that an archive that can't be written prints an error."""
+        with patch('stage3.stage3.Archive', side_effect=PermissionError):
+            stage3.save_to_archive(PAGE, "archive")
+        mock_print.assert_called_once_with("Error during saving file")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,25 @@
+"""
+Stage 4: the News articles of one Nature listing page.
+
+Run it with ``python -m stage4`` from the repository root. Importing the
+package has no side effects; its functions are imported from their module
+on first use::
+
+    from stage4 import get_soup
+"""
+
+from scraper.lazy import lazy_exports
+
+# Public name -> module defining it
+_EXPORTS = {
+    'get_soup': 'stage4',
+    'get_news_articles': 'stage4',
+    'get_news_article_links': 'stage4',
+    'extract_article_content': 'stage4',
+    'save_article': 'stage4',
+    'main': 'stage4',
+}
+
+__all__ = sorted(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -0,0 +1,4 @@
+# python -m stage4: runs stage4/stage4.py as the main module
+import runpy
+
+runpy.run_module('stage4.stage4', run_name='__main__', alter_sys=True)
@@ -1,19 +1,27 @@
+import argparse
 import string
-import requests
-from bs4 import BeautifulSoup
+
+from scraper import http_client, metrics, parsing
+from scraper.sinks import SINKS, make_record, open_sink
 
 BASE_URL = "https://www.nature.com"
-TARGET_URL = "https://www.nature.com/nature/articles?sort=PubDate&year=2020&page=3"
+TARGET_PAGE = 3
+TARGET_URL = f"https://www.nature.com/nature/articles?sort=PubDate&year=2020&page={TARGET_PAGE}"
 HEADERS = {'Accept-Language': 'en-US,en;q=0.5'}
 
 def get_soup(url):
-    response = requests.get(url, headers=HEADERS)
+    response = http_client.get(url, headers=HEADERS)
     response.raise_for_status()
-    return BeautifulSoup(response.text, 'html.parser')
+    with metrics.timer('parse'):
+        return parsing.parse_document(response.text)
 
-def get_news_article_links(soup):
+def get_news_articles(soup):
+    # (URL, link text) of each News card in page order; the link text is the
+    # record title
+    if parsing.is_lxml_tree(soup):
+        return get_news_articles_lxml(soup)
     articles = soup.find_all('article')
-    links = []
+    news = []
 
     for article in articles:
         article_type_tag = article.find('span', {'data-test': 'article.type'})
@@ -22,8 +30,21 @@ def get_news_article_links(soup):
             if a_tag:
                 relative_link = a_tag.get('href')
                 full_link = BASE_URL + relative_link
-                links.append(full_link)
-    return links
+                news.append((full_link, a_tag.get_text(strip=True)))
+    return news
+
+def get_news_articles_lxml(tree):
+    news = []
+    for article in tree.iter('article'):
+        type_tags = article.xpath('.//span[@data-test="article.type"]')
+        if type_tags and type_tags[0].text_content().strip() == 'News':
+            a_tags = article.xpath('.//a[@data-track-action="view article"]')
+            if a_tags:
+                news.append((BASE_URL + a_tags[0].get('href'), parsing.element_text(a_tags[0])))
+    return news
+
+def get_news_article_links(soup):
+    return [link for link, _ in get_news_articles(soup)]
 
 def clean_filename(title):
     title = title.translate(str.maketrans('', '', string.punctuation))
@@ -32,32 +53,73 @@ def clean_filename(title):
 
 def extract_article_content(article_url):
     soup = get_soup(article_url)
+    with metrics.timer('extract'):
+        if parsing.is_lxml_tree(soup):
+            return extract_article_content_lxml(soup)
+
+        paragraphs = soup.find_all('p', class_='article__teaser')
+        text = "\n".join(p.get_text(strip=True) for p in paragraphs)
 
-    paragraphs = soup.find_all('p', class_='article__teaser')
-    text = "\n".join(p.get_text(strip=True) for p in paragraphs)
+        title_tag = soup.find('h1')
+        if title_tag:
+            raw_title = title_tag.get_text(strip=True).split('|')[0].strip()
+            filename = clean_filename(raw_title) + ".txt"
+            return filename, text
+        return None, None
 
-    title_tag = soup.find('h1')
-    if title_tag:
-        raw_title = title_tag.get_text(strip=True).split('|')[0].strip()
+def extract_article_content_lxml(tree):
+    paragraphs = tree.xpath(parsing.has_class_xpath('p', 'article__teaser'))
+    text = "\n".join(parsing.element_text(p) for p in paragraphs)
+
+    title_tags = tree.xpath('//h1')
+    if title_tags:
+        raw_title = parsing.element_text(title_tags[0]).split('|')[0].strip()
         filename = clean_filename(raw_title) + ".txt"
         return filename, text
     return None, None
 
 def save_article(filename, content):
-    with open(filename, "wb") as file:
-        file.write(content.encode('utf-8'))
+    data = content.encode('utf-8')
+    with metrics.timer('save', len(data)), open(filename, "wb") as file:
+        file.write(data)
 
-def main():
+def main(sink=None, metrics_path=None, prometheus_path=None):
     soup = get_soup(TARGET_URL)
-    article_links = get_news_article_links(soup)
+    news = get_news_articles(soup)
 
     saved_files = []
-    for link in article_links:
+    for link, title in news:
         filename, content = extract_article_content(link)
         if filename and content:
-            save_article(filename, content)
+            if sink is None:
+                save_article(filename, content)
+            else:
+                with metrics.timer('save', len(content.encode('utf-8'))):
+                    sink.write(make_record(link, title, 'News', TARGET_PAGE, content))
             saved_files.append(filename)
 
     print(f"Saved articles: {saved_files}")
+    metrics.get_metrics().export(metrics_path, prometheus_path)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Nature.com News article scraper")
+    parser.add_argument('--sink', choices=('txt',) + SINKS, default='txt',
+                        help="where articles go: one <title>.txt file each (default) "
+                             "or records in a single JSON Lines, SQLite or Parquet file, or a "
+                             "deduplicating compressed archive directory")
+    parser.add_argument('--output',
+                        help="output file (or archive directory) of --sink (default: articles.<ext>)")
+    parser.add_argument('--metrics', nargs='?', const='-', metavar='FILE',
+                        help="write per-phase timings (fetch, parse, extract, save) as JSON to "
+                             "FILE at the end (no value: print them)")
+    parser.add_argument('--prometheus', metavar='FILE',
+                        help="also write the timings to FILE in the Prometheus text format")
+    return parser.parse_args(argv)
 
-main()
+if __name__ == "__main__":
+    args = parse_args()
+    if args.sink == 'txt':
+        main(metrics_path=args.metrics, prometheus_path=args.prometheus)
+    else:
+        with open_sink(args.sink, args.output) as sink:
+            main(sink, metrics_path=args.metrics, prometheus_path=args.prometheus)
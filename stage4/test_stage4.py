@@ -2,13 +2,15 @@ import unittest
 from unittest.mock import patch, Mock, mock_open
 import requests
 from bs4 import BeautifulSoup
+import json
 import string
 import sys
 import os
+import tempfile
 
-# Add the stage4 directory to the path so we can import the module
-sys.path.insert(0, os.path.dirname(__file__))
-import stage4
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stage4 import stage4
+from scraper import metrics, parsing
 
 
 class TestStage4(unittest.TestCase):
@@ -48,7 +50,7 @@ class TestStage4(unittest.TestCase):
         </html>
         """
     
-    @patch('requests.get')
+    @patch('stage4.stage4.http_client.get')
     def test_get_soup_success(self, mock_get):
         """Test successful soup creation."""
         mock_response = Mock()
@@ -62,7 +64,7 @@ class TestStage4(unittest.TestCase):
         mock_get.assert_called_once_with("https://test.com", headers=stage4.HEADERS)
         mock_response.raise_for_status.assert_called_once()
     
-    @patch('requests.get')
+    @patch('stage4.stage4.http_client.get')
     def test_get_soup_http_error(self, mock_get):
         """Test soup creation with HTTP error."""
         mock_response = Mock()
@@ -117,7 +119,7 @@ class TestStage4(unittest.TestCase):
                 result = stage4.clean_filename(input_title)
                 self.assertEqual(result, expected_output)
     
-    @patch('stage4.get_soup')
+    @patch('stage4.stage4.get_soup')
     def test_extract_article_content_success(self, mock_get_soup):
         """Test successful article content extraction."""
         mock_soup = BeautifulSoup(self.sample_article_html, 'html.parser')
@@ -129,7 +131,7 @@ class TestStage4(unittest.TestCase):
         expected_content = "First paragraph of the article content.\nSecond paragraph of the article content."
         self.assertEqual(content, expected_content)
     
-    @patch('stage4.get_soup')
+    @patch('stage4.stage4.get_soup')
     def test_extract_article_content_no_title(self, mock_get_soup):
         """Test article content extraction with no title."""
         html_no_title = "<html><body><p class='article__teaser'>Content</p></body></html>"
@@ -141,7 +143,7 @@ class TestStage4(unittest.TestCase):
         self.assertIsNone(filename)
         self.assertIsNone(content)
     
-    @patch('stage4.get_soup')
+    @patch('stage4.stage4.get_soup')
     def test_extract_article_content_no_teasers(self, mock_get_soup):
         """Test article content extraction with no teaser paragraphs."""
         html_no_teasers = "<html><body><h1>Title</h1><p>Regular paragraph</p></body></html>"
@@ -163,10 +165,10 @@ class TestStage4(unittest.TestCase):
         mock_file.assert_called_once_with("test_article.txt", "wb")
         mock_file().write.assert_called_once_with(test_content.encode('utf-8'))
     
-    @patch('stage4.save_article')
-    @patch('stage4.extract_article_content')
-    @patch('stage4.get_news_article_links')
-    @patch('stage4.get_soup')
+    @patch('stage4.stage4.save_article')
+    @patch('stage4.stage4.extract_article_content')
+    @patch('stage4.stage4.get_news_articles')
+    @patch('stage4.stage4.get_soup')
     @patch('builtins.print')
     def test_main_function_success(self, mock_print, mock_get_soup, mock_get_links, 
                                    mock_extract_content, mock_save_article):
@@ -176,8 +178,8 @@ class TestStage4(unittest.TestCase):
         mock_get_soup.return_value = mock_soup
         
         mock_get_links.return_value = [
-            "https://www.nature.com/articles/test1",
-            "https://www.nature.com/articles/test2"
+            ("https://www.nature.com/articles/test1", "Test 1"),
+            ("https://www.nature.com/articles/test2", "Test 2")
         ]
         
         mock_extract_content.side_effect = [
@@ -201,10 +203,10 @@ class TestStage4(unittest.TestCase):
         self.assertIn("article1.txt", args)
         self.assertIn("article2.txt", args)
     
-    @patch('stage4.save_article')
-    @patch('stage4.extract_article_content')
-    @patch('stage4.get_news_article_links')
-    @patch('stage4.get_soup')
+    @patch('stage4.stage4.save_article')
+    @patch('stage4.stage4.extract_article_content')
+    @patch('stage4.stage4.get_news_articles')
+    @patch('stage4.stage4.get_soup')
     @patch('builtins.print')
     def test_main_function_no_content(self, mock_print, mock_get_soup, mock_get_links,
                                       mock_extract_content, mock_save_article):
@@ -212,7 +214,7 @@ class TestStage4(unittest.TestCase):
         # Mock the chain with no valid content
         mock_soup = Mock()
         mock_get_soup.return_value = mock_soup
-        mock_get_links.return_value = ["https://www.nature.com/articles/test1"]
+        mock_get_links.return_value = [("https://www.nature.com/articles/test1", "Test 1")]
         mock_extract_content.return_value = (None, None)
         
         # Call main function
@@ -222,6 +224,63 @@ class TestStage4(unittest.TestCase):
         mock_save_article.assert_not_called()
         mock_print.assert_called_once_with("Saved articles: []")
     
+    @patch('stage4.stage4.save_article')
+    @patch('stage4.stage4.extract_article_content')
+    @patch('stage4.stage4.get_soup')
+    @patch('builtins.print')
+    def test_main_function_writes_to_sink(self, mock_print, mock_get_soup,
+                                          mock_extract_content, mock_save_article):
+        """Test that with a sink main() writes records instead of .txt files."""
+        mock_get_soup.return_value = BeautifulSoup(self.sample_article_list_html, 'html.parser')
+        mock_extract_content.side_effect = [("article1.txt", "Content 1"), ("article3.txt", "Content 3")]
+        sink = Mock()
+
+        stage4.main(sink)
+
+        mock_save_article.assert_not_called()
+        records = [args[0] for args, _ in sink.write.call_args_list]
+        self.assertEqual([(r['url'], r['title'], r['type'], r['page'], r['text']) for r in records], [
+            ("https://www.nature.com/articles/test-article-1", "Article 1", "News", 3, "Content 1"),
+            ("https://www.nature.com/articles/test-article-3", "Article 3", "News", 3, "Content 3"),
+        ])
+
+    @patch('stage4.stage4.extract_article_content')
+    @patch('stage4.stage4.get_soup')
+    @patch('builtins.print')
+    def test_main_function_exports_metrics(self, mock_print, mock_get_soup, mock_extract_content):
+        """Test that main() ends with a JSON summary of the timed phases."""
+        mock_get_soup.return_value = BeautifulSoup(self.sample_article_list_html, 'html.parser')
+        mock_extract_content.side_effect = [("article1.txt", "Content 1"), ("article3.txt", "Content 3")]
+        self.addCleanup(metrics.set_metrics, metrics.get_metrics())
+        metrics.set_metrics(metrics.Metrics())
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = os.path.join(tempdir, 'metrics.json')
+            stage4.main(Mock(), metrics_path=path)
+            with open(path, encoding='utf-8') as file:
+                summary = json.load(file)
+
+        self.assertEqual(summary['save']['count'], 2)
+        self.assertEqual(summary['save']['bytes'], len("Content 1") + len("Content 3"))
+
+    @unittest.skipUnless(parsing.lxml_html, "lxml is not installed")
+    def test_get_news_articles_lxml(self):
+        """Test that the lxml fast path finds the same links and titles as BeautifulSoup."""
+        soup = BeautifulSoup(self.sample_article_list_html, 'html.parser')
+        tree = parsing.parse_document(self.sample_article_list_html, parsing.LXML_FAST_PATH)
+
+        self.assertEqual(stage4.get_news_articles(tree), stage4.get_news_articles(soup))
+        self.assertEqual(stage4.get_news_articles(soup), [
+            ("https://www.nature.com/articles/test-article-1", "Article 1"),
+            ("https://www.nature.com/articles/test-article-3", "Article 3"),
+        ])
+
+    def test_parse_args_sink(self):
+        """Test the --sink and --output options."""
+        self.assertEqual(stage4.parse_args([]).sink, 'txt')
+        args = stage4.parse_args(['--sink', 'jsonl', '--output', 'news.jsonl'])
+        self.assertEqual((args.sink, args.output), ('jsonl', 'news.jsonl'))
+
     def test_constants_defined(self):
         """Test that all constants are properly defined."""
         self.assertEqual(stage4.BASE_URL, "https://www.nature.com")
@@ -0,0 +1,31 @@
+"""
+Stage 5: multi-page Nature crawler (serial, threaded, async or on a shared frontier).
+
+Run it with ``python -m stage5`` from the repository root. Importing the
+package has no side effects; its functions are imported from their module
+on first use::
+
+    from stage5 import get_soup
+"""
+
+from scraper.lazy import lazy_exports
+
+# Public name -> module defining it
+_EXPORTS = {
+    'get_soup': 'stage5',
+    'get_listing': 'stage5',
+    'get_news_article_links': 'stage5',
+    'extract_article_content': 'stage5',
+    'fetch_article_html': 'stage5',
+    'parse_article_html': 'stage5',
+    'save_article': 'stage5',
+    'crawl_serially': 'stage5',
+    'crawl_concurrently': 'stage5',
+    'crawl': 'stage5',
+    'crawl_frontier': 'stage5',
+    'main': 'stage5',
+}
+
+__all__ = sorted(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
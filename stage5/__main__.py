@@ -0,0 +1,4 @@
+# python -m stage5: runs stage5/stage5.py as the main module
+import runpy
+
+runpy.run_module('stage5.stage5', run_name='__main__', alter_sys=True)
@@ -1,39 +1,160 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
 import os.path
 import string
-import requests
-from bs4 import BeautifulSoup
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from scraper import http_client, metrics, parsing
+from scraper.async_client import AsyncHttpClient, aiohttp
+from scraper.checkpoint import Checkpoint
+from scraper.frontier import DEFAULT_LEASE_SECONDS, open_frontier
+from scraper.http_cache import DEFAULT_MAX_BYTES, ResponseCache
+from scraper.lazy import lazy_import
+from scraper.manifest import Manifest, content_digest, merge_manifests
+from scraper.sinks import DEFAULT_PATHS, SINKS, make_record, merge_sinks, open_sink
+from scraper.rate_limit import DEFAULT_RATE, AdaptiveRateLimiter
+from scraper.rules import ExtractionRules, load_rules
+from scraper.retry import DEFAULT_MAX_RETRIES, RetryPolicy, RetryQueue, is_retryable, retry_after_of
+from scraper.writer import BackgroundWriter
+
+requests = lazy_import('requests')
 
 BASE_URL = "https://www.nature.com"
-TARGET_URL = "https://www.nature.com/nature/articles?sort=PubDate&year=2020&page="
+LISTING_URL = "https://www.nature.com/nature/articles?sort=PubDate&year={year}&page="
+DEFAULT_YEAR = 2020
+TARGET_URL = LISTING_URL.format(year=DEFAULT_YEAR)
 HEADERS = {'Accept-Language': 'en-US,en;q=0.5'}
+DEFAULT_MANIFEST = "manifest.jsonl"
+DEFAULT_CHECKPOINT = "crawl-checkpoint.jsonl"
+DEFAULT_WORKERS = 8
+DEFAULT_PER_HOST = 4
+DEFAULT_LISTING_WORKERS = 2
+DEFAULT_QUEUE_SIZE = 32
+# Frontier crawls lease articles before listing pages, which keeps the queue short
+ARTICLE_PRIORITY = 0
+LISTING_PRIORITY = 1
+FRONTIER_POLL_SECONDS = 0.5
+# Where the parts of Nature's listing and article pages are (see
+# scraper/rules.py for the format); --rules FILE overrides any of them
+DEFAULT_RULES = {
+    'title': {'tag': 'h1', 'split': '|'},
+    # Article body containers, by priority, to support different page layouts
+    'body': [
+        {'tag': 'div', 'class': 'c-article-body'},
+        {'tag': 'div', 'class': 'article__body'},
+        {'tag': 'div', 'class': 'article-item__body'},
+        {'tag': 'div', 'class': 'article__content'},
+        {'tag': 'div', 'class': 'main-content'},
+    ],
+    'paragraph': {'tag': 'p'},
+    'card': {'tag': 'article'},
+    'type': {'tag': 'span', 'attrs': {'data-test': 'article.type'}},
+    'link': {'tag': 'a', 'attrs': {'data-track-action': 'view article'}},
+}
+RULES = ExtractionRules(DEFAULT_RULES)
+
+def set_year(year):
+    global TARGET_URL
+    TARGET_URL = LISTING_URL.format(year=year)
+
+def page_range(pages):
+    # A page count (pages 1..N), a [first, last] pair or a range of pages
+    if isinstance(pages, range):
+        return pages
+    if isinstance(pages, int):
+        return range(1, pages + 1)
+    first, last = pages
+    return range(first, last + 1)
+
+def page_spec(pages):
+    # JSON form of page_range's argument, for the checkpoint
+    if isinstance(pages, int):
+        return pages
+    pages = page_range(pages)
+    return [pages.start, pages.stop - 1]
+
+def shard_pages(pages, shard, shards):
+    # The shard-th of shards contiguous, equally sized slices (1-based)
+    pages = page_range(pages)
+    return pages[(shard - 1) * len(pages) // shards:shard * len(pages) // shards]
+
+def shard_path(path, shard, shards):
+    root, ext = os.path.splitext(path)
+    return f"{root}.shard-{shard}-of-{shards}{ext}"
+
+def set_rules(spec):
+    global RULES
+    RULES = ExtractionRules(spec)
+
+def configure_rules(path):
+    # Rules missing from the file keep their defaults
+    global RULES
+    RULES = load_rules(path, DEFAULT_RULES)
+
+def is_article_part(name, attrs):
+    return RULES.is_article_part(name, attrs)
+
+def is_listing_part(name, attrs):
+    return RULES.is_listing_part(name, attrs)
 
-def get_soup(url):
-    response = requests.get(url, headers=HEADERS)
+# Listing pages only need the cards, article pages only need the title, the
+# body containers and (as a fallback) loose paragraphs
+LISTING_STRAINER = parsing.TagStrainer(is_listing_part)
+ARTICLE_STRAINER = parsing.TagStrainer(is_article_part)
+
+def get_soup(url, parse_only=None, retry=True):
+    # retry=False: the crawl's own retry queue or frontier retries the page
+    response = (http_client.get(url, headers=HEADERS) if retry
+                else http_client.get(url, headers=HEADERS, retry=False))
     response.raise_for_status()
-    return BeautifulSoup(response.text, 'html.parser')
+    with metrics.timer('parse'):
+        return parsing.parse_document(response.text, parse_only=parse_only)
+
+class ListingIndex:
+    # Everything stage5 needs from a listing page, collected in one scan:
+    # every <article> card in page order plus a type -> cards lookup table
+
+    def __init__(self):
+        self.articles = []
+        self.by_type = {}
+
+    def add(self, article_type, url, title):
+        entry = {'type': article_type, 'url': url, 'title': title}
+        self.articles.append(entry)
+        if article_type is not None:
+            self.by_type.setdefault(article_type, []).append(entry)
+
+    def types(self):
+        return set(self.by_type)
+
+    def links(self, article_type):
+        return [entry['url'] for entry in self.by_type.get(article_type, []) if entry['url']]
+
+def index_articles(soup):
+    index = ListingIndex()
+    for article_type, relative_link, title in RULES.extract_cards(soup):
+        url = BASE_URL + relative_link if relative_link is not None else None
+        index.add(article_type, url, title)
+    return index
+
+def as_index(listing):
+    return listing if isinstance(listing, ListingIndex) else index_articles(listing)
+
+def get_listing(page):
+    return index_articles(get_soup(f"{TARGET_URL}{page}", parse_only=LISTING_STRAINER))
 
 def get_all_article_types(soup):
-    types = set()
-    articles = soup.find_all('article')
-    for article in articles:
-        article_type_tag = article.find('span', {'data-test': 'article.type'})
-        if article_type_tag:
-            types.add(article_type_tag.text.strip())
-    return types
+    return as_index(soup).types()
 
 def get_news_article_links(soup, desired_type):
-    articles = soup.find_all('article')
-    links = []
-
-    for article in articles:
-        article_type_tag = article.find('span', {'data-test': 'article.type'})
-        if article_type_tag and article_type_tag.text.strip() == desired_type:
-            a_tag = article.find('a', {'data-track-action': 'view article'})
-            if a_tag:
-                relative_link = a_tag.get('href')
-                full_link = BASE_URL + relative_link
-                links.append(full_link)
-    return links
+    return as_index(soup).links(desired_type)
 
 def clean_filename(title):
     title = title.translate(str.maketrans('', '', string.punctuation))
@@ -41,68 +162,835 @@ def clean_filename(title):
     return title
 
 def extract_article_content(article_url):
-    soup = get_soup(article_url)
-
-    body_classes = [
-        'c-article-body',
-        'article__body',
-        'article-item__body',
-        'article__content',
-        'main-content'
-    ]
-
-    paragraphs = []
-    for cls in body_classes:
-        body = soup.find('div', class_=cls)
-        if body:
-            paragraphs = body.find_all('p')
-            break
+    soup = get_soup(article_url, parse_only=ARTICLE_STRAINER, retry=False)
+    return parse_article_content(soup, urlsplit(article_url).netloc)
+
+def fetch_article_html(article_url):
+    response = http_client.get(article_url, headers=HEADERS, retry=False)
+    response.raise_for_status()
+    return response.text
+
+def parse_article_html(html, site=None):
+    with metrics.timer('parse'):
+        soup = parsing.parse_document(html, parse_only=ARTICLE_STRAINER)
+    return parse_article_content(soup, site)
+
+def parse_in_worker(html, site=None):
+    # Parse pool task: the body rule hits go back with the record, since the
+    # worker's RULES are not the ones main() reports
+    return parse_article_html(html, site), RULES.pop_hits()
 
-    if not paragraphs:
-        paragraphs = soup.find_all('p')
+def from_worker(result):
+    record, hits = result
+    RULES.merge_hits(hits)
+    return record
 
-    text = "\n".join(p.get_text(strip=True) for p in paragraphs)
+def init_parse_worker(backend, rules):
+    parsing.set_backend(backend)
+    set_rules(rules)
 
-    title_tag = soup.find('h1')
-    if title_tag:
-        raw_title = title_tag.get_text(strip=True).split('|')[0].strip()
-        filename = clean_filename(raw_title) + ".txt"
-        return filename, text
+def make_parse_pool(parse_workers):
+    # Worker processes parse outside this process's GIL; they start with the
+    # parser backend and extraction rules selected here (spawned workers
+    # don't inherit them). Spawned, not forked: the pool starts workers from
+    # a fetch thread, and a fork would copy locks other threads hold, held
+    # for good in the child.
+    return ProcessPoolExecutor(max_workers=parse_workers, initializer=init_parse_worker,
+                               initargs=(parsing.get_backend(), RULES.spec),
+                               mp_context=multiprocessing.get_context('spawn'))
 
-    return None, None
+def article_extractor(parse_pool=None):
+    if parse_pool is None:
+        return extract_article_content
+
+    def extract(article_url):
+        # Fetch in the calling thread, parse in a worker process. Only the
+        # HTML and the (filename, text) record with its rule hits cross the
+        # process boundary.
+        html = fetch_article_html(article_url)
+        site = urlsplit(article_url).netloc
+        # the workers' own metrics stay in their processes; this is the round trip
+        with metrics.timer('parse'):
+            return from_worker(parse_pool.submit(parse_in_worker, html, site).result())
+    return extract
+
+def parse_article_content(soup, site=None):
+    with metrics.timer('extract'):
+        raw_title, paragraphs = RULES.extract_article(soup, site)
+    if raw_title is None:
+        return None, None
+    return clean_filename(raw_title) + ".txt", "\n".join(paragraphs)
 
 def save_article(filename, content, path_to_file):
     file_path = os.path.join(str(path_to_file), filename)
     with open(file_path, "wb") as file:
         file.write(content.encode('utf-8'))
 
-def main():
-    while True:
-        try:
-            number_of_pages = int(input("Input number of pages to search:\n"))
-            break
-        except ValueError:
-            print("Enter number!")
-    example_soup = get_soup(f"{TARGET_URL}1")
-    available_types = get_all_article_types(example_soup)
-    print("Available article types on page 1:")
-    print(available_types)
-    article_type = input("Enter which type of articles are you interested:\n")
-
-    for page in range(1, number_of_pages + 1):
-        url = f"{TARGET_URL}{page}"
-        soup = get_soup(url)
-        article_links = get_news_article_links(soup, article_type)
+def select_new_links(article_links, manifest):
+    # Returns the links still to fetch and whether the page held only known
+    # articles, which is where an incremental crawl stops paginating
+    if manifest is None:
+        return article_links, False
+    new_links = [link for link in article_links if link not in manifest]
+    return new_links, bool(article_links) and not new_links
+
+def load_listing(page, article_type, checkpoint=None):
+    # A page listed before an interrupted run is rebuilt from the checkpoint
+    # instead of being fetched again
+    if checkpoint is None or page not in checkpoint.pages:
+        return get_listing(page)
+    listing = ListingIndex()
+    for url, title in checkpoint.pages[page]:
+        listing.add(article_type, url, title)
+    return listing
+
+def select_page_links(page, listing, article_type, manifest=None, checkpoint=None):
+    # select_new_links plus the checkpoint: each crawled page is logged once
+    # and articles stored before an interruption are not fetched again
+    article_links, all_known = select_new_links(get_news_article_links(listing, article_type), manifest)
+    if checkpoint is None:
+        return article_links, all_known
+    if page in checkpoint.pages:
+        # it did not end the crawl the first time round either
+        all_known = False
+    elif not all_known:
+        checkpoint.record_page(page, [(entry['url'], entry['title'])
+                                      for entry in as_index(listing).by_type.get(article_type, [])])
+    return [link for link in article_links if link not in checkpoint.done], all_known
+
+def store_article(link, filename, content, folder_name, manifest=None):
+    if manifest is None:
+        save_article(filename, content, folder_name)
+        return True
+    path = os.path.join(folder_name, filename)
+    digest = content_digest(content)
+    changed = not manifest.is_current(path, digest)
+    if changed:
+        save_article(filename, content, folder_name)
+    manifest.record(link, path, digest)
+    return changed
+
+class ArticleWriter:
+    # Where a crawl's articles end up: Page_N/<title>.txt files (the default)
+    # or records in a structured sink (scraper.sinks), plus the manifest of
+    # an incremental crawl. With a file_writer (scraper.writer) the disk
+    # writes happen on its background thread instead of the crawl's. Stored
+    # articles are logged to the checkpoint of a resumable crawl.
 
+    def __init__(self, article_type, manifest=None, sink=None, file_writer=None, checkpoint=None):
+        self.article_type = article_type
+        self.manifest = manifest
+        self.sink = sink
+        self.file_writer = file_writer
+        self.checkpoint = checkpoint
+        self.titles = {}
+
+    def open_page(self, page, listing):
+        if self.sink is None and self.file_writer is not None:
+            self.file_writer.makedirs(f"Page_{page}")
+        elif self.sink is None:
+            os.makedirs(f"Page_{page}", exist_ok=True)
+        else:
+            # Records carry the title from the listing card
+            for entry in as_index(listing).by_type.get(self.article_type, []):
+                self.titles[entry['url']] = entry['title']
+
+    def store(self, page, link, filename, content):
+        # Returns where the article went, or None if it was already saved unchanged
+        with metrics.timer('save', len(content.encode('utf-8'))):
+            return self.save(page, link, filename, content)
+
+    def save(self, page, link, filename, content):
         folder_name = f"Page_{page}"
-        os.makedirs(folder_name, exist_ok=True)
+        if self.sink is None and self.file_writer is not None:
+            return self.store_in_background(link, os.path.join(folder_name, filename), content)
+        if self.sink is None:
+            changed = store_article(link, filename, content, folder_name, self.manifest)
+            self.stored(link)
+            return os.path.join(folder_name, filename) if changed else None
+        if self.file_writer is not None:
+            self.file_writer.call(self.write_record, page, link, content)
+        else:
+            self.write_record(page, link, content)
+        return link
+
+    def store_in_background(self, link, path, content):
+        if self.manifest is None:
+            self.file_writer.write(path, content.encode('utf-8'), then=lambda: self.stored(link))
+            return path
+        digest = content_digest(content)
+        if self.manifest.is_current(path, digest):
+            self.manifest.record(link, path, digest)
+            self.stored(link)
+            return None
+
+        def written():
+            # recorded only once the file is on disk
+            self.manifest.record(link, path, digest)
+            self.stored(link)
+        self.file_writer.write(path, content.encode('utf-8'), then=written)
+        return path
+
+    def write_record(self, page, link, content):
+        self.sink.write(make_record(link, self.titles.get(link), self.article_type, page, content))
+        if self.manifest is not None:
+            self.manifest.record(link, self.sink.path, content_digest(content))
+        self.stored(link)
+
+    def stored(self, link):
+        if self.checkpoint is not None:
+            self.checkpoint.record_article(link)
+
+    def sync(self):
+        # Buffered sink records reach the disk before the checkpoint says they did
+        if self.sink is not None:
+            self.sink.flush()
+        self.checkpoint.flush()
+
+    def finish_page(self):
+        if self.checkpoint is None:
+            return
+        if self.file_writer is not None:
+            self.file_writer.call(self.sync)
+        else:
+            self.sync()
+
+    def finish(self):
+        if self.file_writer is not None:
+            self.file_writer.flush()
+        if self.checkpoint is not None:
+            self.sync()
+            self.checkpoint.record_finished()
+
+def defer_failed_article(retries, item, error, attempt=1):
+    # Throttled/5xx/dropped fetches get another try later; anything else is
+    # given up on right away. Either way the crawl carries on.
+    if is_retryable(error):
+        retries.push(item, attempt, error, retry_after_of(error))
+    else:
+        retries.failed.append((item, error))
+
+def retry_failed_articles(retries, writer, executor=None, extract=extract_article_content):
+    # Items are (page, link). Each round waits for the earliest backoff to
+    # pass and then fetches every article that is due (in parallel when an
+    # executor is given).
+    while retries:
+        due = retries.pop_due()
+        fetches = [(item, attempt, executor.submit(extract, item[1]) if executor else None)
+                   for item, attempt in due]
+        for (page, link), attempt, future in fetches:
+            try:
+                filename, content = future.result() if future else extract(link)
+            except requests.exceptions.RequestException as error:
+                defer_failed_article(retries, (page, link), error, attempt + 1)
+                continue
+            if filename and content:
+                writer.store(page, link, filename, content)
+
+def report_failures(failed):
+    for (page, link), error in failed:
+        print(f"Could not fetch {link} (page {page}): {error}")
+
+def report_rule_hits(hits):
+    # which body rule matched how often on each site ("fallback": none did)
+    for site in sorted(hits, key=str):
+        counts = ", ".join(f"{rule} {count}" for rule, count in sorted(hits[site].items()))
+        print(f"Body rules on {site}: {counts}")
+
+def crawl_serially(pages, article_type, first_page=None, manifest=None, sink=None,
+                   file_writer=None, checkpoint=None):
+    # pages: see page_range; first_page is the listing of its first page
+    pages = page_range(pages)
+    writer = ArticleWriter(article_type, manifest, sink, file_writer, checkpoint)
+    retries = RetryQueue(http_client.get_client().retry)
+    for page in pages:
+        if page == pages[0] and first_page is not None:
+            listing = first_page
+        else:
+            listing = load_listing(page, article_type, checkpoint)
+        article_links, all_known = select_page_links(page, listing, article_type, manifest, checkpoint)
+        if all_known:
+            break
+
+        writer.open_page(page, listing)
         for link in article_links:
-            filename, content = extract_article_content(link)
+            try:
+                filename, content = extract_article_content(link)
+            except requests.exceptions.RequestException as error:
+                defer_failed_article(retries, (page, link), error)
+                continue
+            if filename and content:
+                writer.store(page, link, filename, content)
+        writer.finish_page()
+
+    retry_failed_articles(retries, writer)
+    writer.finish()
+    report_failures(retries.failed)
+    return retries.failed
+
+def crawl_concurrently(pages, article_type, workers=DEFAULT_WORKERS,
+                       per_host=DEFAULT_PER_HOST, first_page=None, manifest=None, parse_workers=0,
+                       sink=None, file_writer=None, checkpoint=None):
+    # Fetches run in the pool (capped per host by the shared client), while
+    # results are consumed in page/link order so the saved files are the same
+    # as in a serial run no matter which request finishes first. With
+    # parse_workers, article pages are parsed in that many processes.
+    # Articles are submitted one page ahead of the page being stored, not all
+    # up front, so the queue stays short and an interrupted crawl (Ctrl-C)
+    # has little to cancel.
+    http_client.get_client().set_max_per_host(per_host)
+    writer = ArticleWriter(article_type, manifest, sink, file_writer, checkpoint)
+    retries = RetryQueue(http_client.get_client().retry)
+    pages = page_range(pages)
+
+    def store_page(page, listing, futures):
+        writer.open_page(page, listing)
+        for link, future in futures:
+            try:
+                filename, content = future.result()
+            except requests.exceptions.RequestException as error:
+                defer_failed_article(retries, (page, link), error)
+                continue
+            if filename and content:
+                writer.store(page, link, filename, content)
+        writer.finish_page()
+
+    with (make_parse_pool(parse_workers) if parse_workers else nullcontext()) as parse_pool, \
+            ThreadPoolExecutor(max_workers=workers) as executor:
+        extract = article_extractor(parse_pool)
+
+        def submit_listing(index):
+            if index >= len(pages) or (index == 0 and first_page is not None):
+                return None
+            return executor.submit(load_listing, pages[index], article_type, checkpoint)
+
+        try:
+            submitted = []
+            next_listing = submit_listing(0)
+            for index, page in enumerate(pages):
+                listing_future, next_listing = next_listing, submit_listing(index + 1)
+                listing = first_page if listing_future is None else listing_future.result()
+                article_links, all_known = select_page_links(page, listing, article_type, manifest, checkpoint)
+                if all_known:
+                    if next_listing is not None:
+                        next_listing.cancel()
+                    break
+                submitted.append((page, listing, [(link, executor.submit(extract, link))
+                                                  for link in article_links]))
+                if len(submitted) > 1:
+                    store_page(*submitted.pop(0))
+            for item in submitted:
+                store_page(*item)
+
+            retry_failed_articles(retries, writer, executor, extract)
+        except BaseException:
+            # e.g. Ctrl-C: drop the queued fetches; leaving the with block
+            # only waits for the ones already running
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+    writer.finish()
+    report_failures(retries.failed)
+    return retries.failed
+
+def seed_frontier(frontier, pages):
+    # Every worker seeds the same listing pages; the frontier keeps one of each
+    for page in page_range(pages):
+        frontier.push(f"{TARGET_URL}{page}", kind='listing', priority=LISTING_PRIORITY, data={'page': page})
+
+def crawl_frontier(frontier, pages, article_type, workers=1, per_host=DEFAULT_PER_HOST, first_page=None,
+                   manifest=None, parse_workers=0, sink=None, file_writer=None,
+                   poll_interval=FRONTIER_POLL_SECONDS):
+    # Any number of processes, on one host (SQLite frontier) or several
+    # (Redis), run this against one shared frontier (scraper.frontier), each
+    # with `workers` threads. Listing pages and articles are leased from it
+    # until every URL pushed is done or failed, so none is fetched twice
+    # while its lease holds. Articles are stored as they come, in no
+    # particular order. All listing pages are seeded up front: an incremental
+    # crawl skips known articles but does not stop paginating.
+    http_client.get_client().set_max_per_host(per_host)
+    pages = page_range(pages)
+    seed_frontier(frontier, pages)
+    writer = ArticleWriter(article_type, manifest, sink, file_writer)
+    policy = http_client.get_client().retry
+    store_lock = threading.Lock()
+    failed = []
+
+    def process(task, extract):
+        page = task.data['page']
+        if task.kind == 'listing':
+            listing = first_page if page == pages[0] and first_page is not None else get_listing(page)
+            article_links, _ = select_new_links(get_news_article_links(listing, article_type), manifest)
+            titles = {entry['url']: entry['title'] for entry in as_index(listing).by_type.get(article_type, [])}
+            for link in article_links:
+                frontier.push(link, kind='article', priority=ARTICLE_PRIORITY,
+                              data={'page': page, 'title': titles.get(link)})
+            return
+        filename, content = extract(task.url)
+        if filename and content:
+            card = ListingIndex()
+            card.add(article_type, task.url, task.data['title'])
+            # sinks are written from one thread at a time
+            with store_lock:
+                writer.open_page(page, card)
+                writer.store(page, task.url, filename, content)
+
+    def work(extract):
+        while True:
+            task = frontier.lease()
+            if task is None:
+                if frontier.finished:
+                    return
+                # the rest is leased by other workers, whose listings may add
+                # articles and whose leases may run out
+                time.sleep(poll_interval)
+                continue
+            try:
+                process(task, extract)
+            except requests.exceptions.RequestException as error:
+                attempt = task.attempts + 1
+                # no policy: retries are disabled (--max-retries 0)
+                if is_retryable(error) and policy is not None and policy.should_retry(attempt):
+                    frontier.retry(task, policy.delay(attempt, retry_after_of(error)))
+                else:
+                    frontier.fail(task)
+                    failed.append(((task.data['page'], task.url), error))
+                continue
+            frontier.ack(task)
+
+    with (make_parse_pool(parse_workers) if parse_workers else nullcontext()) as parse_pool, \
+            ThreadPoolExecutor(max_workers=workers) as executor:
+        extract = article_extractor(parse_pool)
+        for future in [executor.submit(work, extract) for _ in range(workers)]:
+            future.result()
+    writer.finish()
+    report_failures(failed)
+    return failed
+
+async def get_soup_async(client, url, parse_only=None):
+    text = await client.get_text(url, headers=HEADERS)
+    with metrics.timer('parse'):
+        return parsing.parse_document(text, parse_only=parse_only)
+
+async def crawl(pages, article_type, workers=DEFAULT_WORKERS, per_host=DEFAULT_PER_HOST,
+                listing_workers=DEFAULT_LISTING_WORKERS, queue_size=DEFAULT_QUEUE_SIZE,
+                first_page=None, manifest=None, parse_workers=0, sink=None,
+                file_writer=None, checkpoint=None):
+    # listing fetchers -> link_queue -> article fetchers -> html_queue -> parser(s)
+    # Both queues are bounded, so when parsing falls behind the fetchers block
+    # instead of piling up downloaded pages in memory. With parse_workers the
+    # parsers hand the HTML to that many worker processes.
+    link_queue = asyncio.Queue(maxsize=queue_size)
+    html_queue = asyncio.Queue(maxsize=queue_size)
+    pages = page_range(pages)
+    first_page_number = pages[0] if pages else None
+    pages = iter(pages)
+    writer = ArticleWriter(article_type, manifest, sink, file_writer, checkpoint)
+    expected = {}
+    links = {}
+    results = {}
+    saved_files = {}
+    failed = []
+    stop_after = None
+
+    def flush_page(page):
+        # Save a page only once all of its articles are parsed, in link order,
+        # so the output does not depend on completion order
+        page_results = results.pop(page)
+        page_links = links.pop(page)
+        saved_files[page] = []
+        for index in range(expected.pop(page)):
+            filename, content = page_results[index]
             if filename and content:
-                save_article(filename, content, folder_name)
+                saved = writer.store(page, page_links[index], filename, content)
+                if saved:
+                    saved_files[page].append(saved)
+        writer.finish_page()
+
+    async def fetch_listings(client):
+        nonlocal stop_after
+        for page in pages:
+            if stop_after is not None and page > stop_after:
+                return
+            if page == first_page_number and first_page is not None:
+                listing = first_page
+            elif checkpoint is not None and page in checkpoint.pages:
+                listing = load_listing(page, article_type, checkpoint)
+            else:
+                listing = index_articles(await get_soup_async(client, f"{TARGET_URL}{page}",
+                                                              parse_only=LISTING_STRAINER))
+            article_links, all_known = select_page_links(page, listing, article_type, manifest, checkpoint)
+            if all_known or (stop_after is not None and page > stop_after):
+                # Listing workers run ahead of each other; pages before the
+                # first fully known one are still crawled
+                stop_after = page - 1 if stop_after is None else min(stop_after, page - 1)
+                continue
+            writer.open_page(page, listing)
+            expected[page] = len(article_links)
+            links[page] = article_links
+            results[page] = {}
+            if not article_links:
+                flush_page(page)
+            for index, link in enumerate(article_links):
+                await link_queue.put((page, index, link))
+
+    async def fetch_articles(client):
+        while True:
+            item = await link_queue.get()
+            if item is None:
+                return
+            page, index, link = item
+            try:
+                html = await client.get_text(link, headers=HEADERS)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                # the client has already retried; skip the article, not the crawl
+                failed.append(((page, link), error))
+                html = None
+            await html_queue.put((page, index, html))
+
+    async def parse_articles(parse_pool):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await html_queue.get()
+            if item is None:
+                return
+            page, index, html = item
+            site = urlsplit(links[page][index]).netloc
+            if html is None:
+                results[page][index] = (None, None)
+            elif parse_pool is not None:
+                with metrics.timer('parse'):
+                    results[page][index] = from_worker(
+                        await loop.run_in_executor(parse_pool, parse_in_worker, html, site))
+            else:
+                results[page][index] = await asyncio.to_thread(parse_article_html, html, site)
+            if len(results[page]) == expected[page]:
+                flush_page(page)
 
+    async def run_stage(tasks, next_queue, consumers):
+        await asyncio.gather(*tasks)
+        for _ in range(consumers):
+            await next_queue.put(None)
+
+    shared_client = http_client.get_client()
+    parsers = max(1, parse_workers)
+    with (make_parse_pool(parse_workers) if parse_workers else nullcontext()) as parse_pool:
+        async with AsyncHttpClient(limit=workers + listing_workers, limit_per_host=per_host,
+                                   rate_limiter=shared_client.rate_limiter,
+                                   retry=shared_client.retry) as client:
+            listing_tasks = [asyncio.create_task(fetch_listings(client)) for _ in range(listing_workers)]
+            article_tasks = [asyncio.create_task(fetch_articles(client)) for _ in range(workers)]
+            parser_tasks = [asyncio.create_task(parse_articles(parse_pool)) for _ in range(parsers)]
+            all_tasks = listing_tasks + article_tasks + parser_tasks
+            try:
+                await asyncio.gather(
+                    run_stage(listing_tasks, link_queue, workers),
+                    run_stage(article_tasks, html_queue, parsers),
+                    *parser_tasks,
+                )
+            finally:
+                for task in all_tasks:
+                    task.cancel()
+                await asyncio.gather(*all_tasks, return_exceptions=True)
+
+    writer.finish()
+    report_failures(failed)
+    return [path for page in sorted(saved_files) for path in saved_files[page]]
+
+def main(workers=1, per_host=DEFAULT_PER_HOST, use_async=False, manifest=None, parse_workers=0,
+         sink=None, file_writer=None, checkpoint=None, metrics_path=None, prometheus_path=None,
+         pages=None, article_type=None, frontier=None):
+    # pages and article_type are asked for unless given (or resumed)
+    first_page = None
+    if checkpoint is not None and checkpoint.params is not None:
+        # A resumed crawl keeps the pages and type it was started with
+        pages, article_type = checkpoint.params['pages'], checkpoint.params['type']
+        print(f"Resuming crawl of {len(page_range(pages))} pages of '{article_type}' articles: "
+              f"{len(checkpoint.pages)} pages listed, {len(checkpoint.done)} articles saved")
+    else:
+        while pages is None:
+            try:
+                pages = int(input("Input number of pages to search:\n"))
+            except ValueError:
+                print("Enter number!")
+        if article_type is None:
+            # The first page is fetched and indexed once, for type discovery and for the crawl
+            first_page_number = next(iter(page_range(pages)), 1)
+            first_page = get_listing(first_page_number)
+            available_types = get_all_article_types(first_page)
+            print(f"Available article types on page {first_page_number}:")
+            print(available_types)
+            article_type = input("Enter which type of articles are you interested:\n")
+        if checkpoint is not None:
+            checkpoint.start(page_spec(pages), article_type)
+
+    if frontier is not None:
+        crawl_frontier(frontier, pages, article_type, workers, per_host,
+                       first_page=first_page, manifest=manifest, parse_workers=parse_workers,
+                       sink=sink, file_writer=file_writer)
+    elif use_async:
+        asyncio.run(crawl(pages, article_type, workers, per_host,
+                          first_page=first_page, manifest=manifest, parse_workers=parse_workers,
+                          sink=sink, file_writer=file_writer, checkpoint=checkpoint))
+    elif workers > 1 or parse_workers:
+        crawl_concurrently(pages, article_type, workers, per_host,
+                           first_page=first_page, manifest=manifest, parse_workers=parse_workers,
+                           sink=sink, file_writer=file_writer, checkpoint=checkpoint)
+    else:
+        crawl_serially(pages, article_type, first_page=first_page, manifest=manifest,
+                       sink=sink, file_writer=file_writer, checkpoint=checkpoint)
 
     print("Saved all articles.")
+    report_rule_hits(RULES.hits)
+    metrics.get_metrics().export(metrics_path, prometheus_path)
+
+def parse_pages(value):
+    # "N" for pages 1..N, "A-B" for pages A..B
+    first, dash, last = value.partition('-')
+    try:
+        pages = range(int(first), int(last) + 1) if dash else range(1, int(first) + 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected N or FIRST-LAST, got {value!r}")
+    if pages.start < 1 or len(pages) == 0:
+        raise argparse.ArgumentTypeError(f"no pages in {value!r}")
+    return pages
+
+def parse_shard(value):
+    # "I/N": the I-th of N shards, counted from 1
+    shard, _, shards = value.partition('/')
+    try:
+        shard, shards = int(shard), int(shards)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected I/N, got {value!r}")
+    if not 1 <= shard <= shards:
+        raise argparse.ArgumentTypeError(f"shard {shard} is not in 1..{shards}")
+    return shard, shards
+
+def option_key(name):
+    # --config keys: option name or dest, with or without the dashes
+    return name.lstrip('-').replace('-', '_')
+
+def load_config(parser, path, options):
+    # Option values from a JSON object, keyed by option name with or without
+    # the dashes: {"pages": "1-50", "type": "News", "cache-dir": "cache"}.
+    # options maps option_key() names to the parser's actions.
+    try:
+        with open(path, encoding='utf-8') as file:
+            config = json.load(file)
+    except (OSError, ValueError) as error:
+        parser.error(f"cannot read --config {path}: {error}")
+    if not isinstance(config, dict):
+        parser.error(f"--config {path} must hold a JSON object of option values")
+    defaults = {}
+    for key, value in config.items():
+        action = options.get(option_key(key))
+        if action is None:
+            parser.error(f"unknown option {key!r} in --config {path}")
+        if action.nargs == 0:
+            # flags such as "async": true
+            if not isinstance(value, bool):
+                parser.error(f"{key!r} in --config {path} must be true or false")
+        elif action.type is not None:
+            # argparse only converts and checks string defaults; numbers go
+            # through the same conversion as on the command line
+            try:
+                value = action.type(str(value))
+            except (argparse.ArgumentTypeError, ValueError) as error:
+                parser.error(f"{key!r} in --config {path}: {error}")
+        elif not isinstance(value, str):
+            parser.error(f"{key!r} in --config {path} must be a string")
+        if action.choices is not None and value not in action.choices:
+            parser.error(f"{key!r} in --config {path} must be one of {', '.join(map(str, action.choices))}")
+        defaults[action.dest] = value
+    return defaults
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-page Nature.com article scraper")
+    # every option but --config (and --help) can be set in the --config file
+    options = {}
+
+    def option(*names, **kwargs):
+        action = parser.add_argument(*names, **kwargs)
+        for name in (action.dest, *action.option_strings):
+            options[option_key(name)] = action
+
+    parser.add_argument('--config', metavar='FILE',
+                        help="JSON file of option values, e.g. {\"pages\": \"1-50\", \"type\": \"News\", "
+                             "\"workers\": 8}; options given on the command line override it")
+    option('--pages', type=parse_pages, metavar='N|FIRST-LAST',
+           help="listing pages to crawl: 1 to N, or FIRST to LAST (default: ask)")
+    option('--type', dest='article_type', metavar='TYPE',
+           help="type of the articles to save, e.g. News (default: list the types "
+                "on the first page and ask)")
+    option('--year', type=int, default=DEFAULT_YEAR,
+           help="publication year of the listed articles")
+    option('--shard', type=parse_shard, metavar='I/N',
+           help="crawl only the I-th of N equal slices of --pages, e.g. one per node; "
+                "the output, manifest and checkpoint names get a .shard-I-of-N suffix")
+    option('--merge', type=int, metavar='N',
+           help="instead of crawling, merge the outputs (and, with --incremental, the "
+                "manifests) of the N shards of a crawl run with the same options")
+    option('--frontier', metavar='SPEC',
+           help="lease listing and article URLs from a shared frontier instead of "
+                "crawling the pages in order: 'memory', a SQLite file shared by the "
+                "processes of one host, or redis://HOST:PORT/DB shared by several hosts")
+    option('--lease', type=float, default=DEFAULT_LEASE_SECONDS, metavar='SECONDS',
+           help="how long a --frontier URL stays leased to a worker before another "
+                "one may fetch it")
+    option('--workers', type=int, default=1,
+           help=f"number of concurrent fetches (e.g. {DEFAULT_WORKERS}); "
+                "1 crawls serially unless --async is given")
+    option('--per-host', type=int, default=DEFAULT_PER_HOST,
+           help="maximum concurrent requests to a single host")
+    option('--async', dest='use_async', action='store_true',
+           help="use the asyncio crawl engine (requires aiohttp)")
+    option('--parser', choices=parsing.BACKENDS, default=parsing.get_backend(),
+           help=f"HTML parser backend; '{parsing.LXML_FAST_PATH}' skips BeautifulSoup")
+    option('--cache-dir',
+           help="keep an on-disk HTTP cache here and revalidate pages on re-runs")
+    option('--cache-max-mb', type=int, default=DEFAULT_MAX_BYTES // 2 ** 20,
+           help="size limit of the HTTP cache; least recently used pages are evicted")
+    option('--cache-only', action='store_true',
+           help="offline mode: serve every page from --cache-dir, never hit the network")
+    option('--incremental', action='store_true',
+           help="skip articles already in the manifest and stop at the first "
+                "page with only known articles")
+    option('--manifest', default=DEFAULT_MANIFEST,
+           help="manifest file used by --incremental")
+    option('--parse-workers', type=int, nargs='?', const=os.cpu_count() or 1, default=0,
+           help="parse article pages in this many worker processes "
+                "(no value: one per CPU core; default: parse in the fetching threads)")
+    option('--rate', type=float, default=DEFAULT_RATE,
+           help="initial requests per second per host; adapts to 429/503, "
+                "Retry-After and errors (0 disables rate limiting)")
+    option('--max-retries', type=int, default=DEFAULT_MAX_RETRIES,
+           help="retries for throttled, failed or dropped requests (0 disables)")
+    option('--sink', choices=('txt',) + SINKS, default='txt',
+           help="where articles go: one Page_N/<title>.txt file each (default) "
+                "or records in a single JSON Lines, SQLite or Parquet file, or a "
+                "deduplicating compressed archive directory")
+    option('--output',
+           help="output file (or archive directory) of --sink (default: articles.<ext>)")
+    option('--rules',
+           help="JSON file of extraction rules (title, body, paragraph, card, type, "
+                "link) overriding the built-in Nature layouts")
+    option('--write-batch', type=int, default=0,
+           help="save articles on a background writer thread in batches of this size "
+                "(default: write on the crawl thread)")
+    option('--fsync', action='store_true',
+           help="with --write-batch: make every batch durable with one round of fsyncs")
+    option('--checkpoint',
+           help=f"log the crawl frontier to this file so an interrupted crawl can be "
+                f"resumed (default with --resume: {DEFAULT_CHECKPOINT})")
+    option('--resume', action='store_true',
+           help="continue the crawl in --checkpoint without refetching listed pages "
+                "or saved articles")
+    option('--metrics', nargs='?', const='-', metavar='FILE',
+           help="write per-phase timings (fetch, ttfb, throttle, parse, extract, save) "
+                "as JSON to FILE at the end (no value: print them)")
+    option('--prometheus', metavar='FILE',
+           help="also write the timings to FILE in the Prometheus text format")
+    args = parser.parse_args(argv)
+    if args.config:
+        parser.set_defaults(**load_config(parser, args.config, options))
+        args = parser.parse_args(argv)
+    if args.cache_only and not args.cache_dir:
+        parser.error("--cache-only requires --cache-dir")
+    if args.cache_dir and args.use_async:
+        # the aiohttp client has no cache; --cache-only would fetch everything
+        parser.error("--cache-dir and --cache-only don't work with --async")
+    if args.fsync and not args.write_batch:
+        parser.error("--fsync requires --write-batch")
+    if args.sink == 'parquet' and (args.resume or args.incremental):
+        # the manifest and checkpoint would list articles the rewritten file has lost
+        parser.error("--resume and --incremental cannot continue a parquet file, which every run rewrites")
+    if args.resume and not args.checkpoint:
+        args.checkpoint = DEFAULT_CHECKPOINT
+    if args.frontier and (args.checkpoint or args.shard or args.use_async):
+        parser.error("--frontier keeps its own state and splits the work itself; "
+                     "leave out --checkpoint, --resume, --shard and --async")
+    if args.shard:
+        if args.pages is None:
+            parser.error("--shard requires --pages")
+        if args.merge:
+            parser.error("--merge combines all shards; leave out --shard")
+        shard, shards = args.shard
+        args.pages = shard_pages(args.pages, shard, shards)
+        args.manifest = shard_path(args.manifest, shard, shards)
+        if args.checkpoint:
+            args.checkpoint = shard_path(args.checkpoint, shard, shards)
+        if args.sink != 'txt':
+            args.output = shard_path(args.output or DEFAULT_PATHS[args.sink], shard, shards)
+    return args
+
+def merge_shards(shards, sink_kind, output=None, manifest=None):
+    # Combine the files written by the --shard I/N runs of one crawl (the
+    # Page_N folders of the txt sink need no merging: shards share no page)
+    merges = []
+    if sink_kind != 'txt':
+        output = output or DEFAULT_PATHS[sink_kind]
+        if sink_kind == 'jsonl' and os.path.exists(output):
+            # JSON Lines output is appended to, so merging twice would duplicate it
+            raise FileExistsError(f"{output} already exists")
+        merges.append(("articles", output, lambda sources: merge_sinks(sink_kind, sources, output)))
+    if manifest is not None:
+        merges.append(("manifest entries", manifest, lambda sources: merge_manifests(manifest, sources)))
+    sources = {target: [shard_path(target, shard, shards) for shard in range(1, shards + 1)]
+               for _, target, _ in merges}
+    missing = [path for paths in sources.values() for path in paths if not os.path.exists(path)]
+    if missing:
+        raise FileNotFoundError(f"missing shard files: {', '.join(missing)}")
+    for label, target, merge in merges:
+        print(f"Merged {shards} shards into {target}: {merge(sources[target])} {label}")
+    return [target for _, target, _ in merges]
+
+def configure_cache(cache_dir, cache_max_mb, cache_only=False):
+    cache = ResponseCache(cache_dir, max_bytes=cache_max_mb * 2 ** 20)
+    http_client.get_client().set_cache(cache, cache_only=cache_only)
+    return cache
+
+def configure_throttling(rate, max_retries):
+    rate_limiter = AdaptiveRateLimiter(rate=rate) if rate > 0 else None
+    retry = RetryPolicy(max_retries=max_retries) if max_retries > 0 else None
+    http_client.get_client().set_throttling(rate_limiter, retry)
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    if args.merge:
+        try:
+            merge_shards(args.merge, args.sink, args.output, args.manifest if args.incremental else None)
+        except OSError as error:
+            sys.exit(f"Cannot merge: {error}")
+        sys.exit()
+    set_year(args.year)
+    parsing.set_backend(args.parser)
+    if args.rules:
+        configure_rules(args.rules)
+    configure_throttling(args.rate, args.max_retries)
+    if args.cache_dir:
+        configure_cache(args.cache_dir, args.cache_max_mb, args.cache_only)
+    manifest = Manifest(args.manifest) if args.incremental else None
+    sink = open_sink(args.sink, args.output) if args.sink != 'txt' else None
+    file_writer = (BackgroundWriter(batch_size=args.write_batch, fsync=args.fsync)
+                   if args.write_batch else None)
+    checkpoint = Checkpoint(args.checkpoint, resume=args.resume) if args.checkpoint else None
+    frontier = open_frontier(args.frontier, args.lease) if args.frontier else None
+    try:
+        main(workers=args.workers, per_host=args.per_host, use_async=args.use_async,
+             manifest=manifest, parse_workers=args.parse_workers, sink=sink, file_writer=file_writer,
+             checkpoint=checkpoint, metrics_path=args.metrics, prometheus_path=args.prometheus,
+             pages=args.pages, article_type=args.article_type, frontier=frontier)
+    finally:
+        # Drains the queue, also on Ctrl-C, before the sink, manifest and checkpoint close
+        try:
+            if file_writer is not None:
+                file_writer.close()
+                print(file_writer.report())
+        finally:
+            if sink is not None:
+                sink.close()
+            if manifest is not None:
+                manifest.close()
+            if checkpoint is not None:
+                checkpoint.close()
+            if frontier is not None:
+                frontier.close()
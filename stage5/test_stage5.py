@@ -1,14 +1,31 @@
 import unittest
-from unittest.mock import patch, Mock, mock_open, call
+from unittest.mock import ANY, patch, Mock, mock_open, call
+import asyncio
+import json
 import requests
 from bs4 import BeautifulSoup
 import string
 import sys
 import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
 
-# Add the stage5 directory to the path so we can import the module
-sys.path.insert(0, os.path.dirname(__file__))
-import stage5
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stage5 import stage5
+from scraper import metrics, parsing, sinks
+from scraper.async_client import aiohttp
+from scraper.checkpoint import Checkpoint
+from scraper.fixtures import RICH_ARTICLE_HTML, RICH_LISTING_HTML, SOURCE_HTML
+from scraper.frontier import MemoryFrontier, RedisFrontier, SQLiteFrontier
+from scraper.local_redis import LocalRedis
+from scraper.local_server import LocalServer
+from scraper.manifest import Manifest
+from scraper.metrics import Metrics
+from scraper.retry import RetryPolicy
+from scraper.sinks import open_sink
+from scraper.writer import BackgroundWriter
 
 
 class TestStage5(unittest.TestCase):
@@ -78,7 +95,7 @@ class TestStage5(unittest.TestCase):
         </html>
         """
 
-    @patch('requests.get')
+    @patch('stage5.stage5.http_client.get')
     def test_get_soup_success(self, mock_get):
         """Test successful soup creation."""
         mock_response = Mock()
@@ -92,7 +109,7 @@ class TestStage5(unittest.TestCase):
         mock_get.assert_called_once_with("https://test.com", headers=stage5.HEADERS)
         mock_response.raise_for_status.assert_called_once()
     
-    @patch('requests.get')
+    @patch('stage5.stage5.http_client.get')
     def test_get_soup_http_error(self, mock_get):
         """Test soup creation with HTTP error."""
         mock_response = Mock()
@@ -130,6 +147,45 @@ class TestStage5(unittest.TestCase):
         ]
         self.assertEqual(research_results, expected_research_links)
     
+    def test_index_articles(self):
+        """Test that one scan indexes type, link and title of every article."""
+        soup = BeautifulSoup(self.sample_article_list_html, 'html.parser')
+
+        index = stage5.index_articles(soup)
+
+        self.assertEqual(index.articles, [
+            {'type': "News", 'url': "https://www.nature.com/articles/test-article-1", 'title': "Article 1"},
+            {'type': "Research", 'url': "https://www.nature.com/articles/test-article-2", 'title': "Article 2"},
+            {'type': "News", 'url': "https://www.nature.com/articles/test-article-3", 'title': "Article 3"},
+        ])
+        self.assertEqual(index.types(), {"News", "Research"})
+        self.assertEqual(index.links("Research"), ["https://www.nature.com/articles/test-article-2"])
+        self.assertEqual(index.links("Editorial"), [])
+
+    def test_index_reused_by_type_and_link_lookups(self):
+        """Test that an index is passed through without rescanning the page."""
+        soup = BeautifulSoup(self.sample_article_list_html, 'html.parser')
+        index = stage5.index_articles(soup)
+
+        with patch('stage5.stage5.index_articles') as mock_index:
+            self.assertEqual(stage5.get_all_article_types(index), {"News", "Research"})
+            self.assertEqual(len(stage5.get_news_article_links(index, "News")), 2)
+
+        mock_index.assert_not_called()
+
+    @patch('stage5.stage5.get_soup')
+    def test_crawl_serially_reuses_first_page(self, mock_get_soup):
+        """Test that the serial crawl does not refetch an already indexed page 1."""
+        first_page = stage5.index_articles(BeautifulSoup(self.sample_article_list_html, 'html.parser'))
+        mock_get_soup.return_value = BeautifulSoup("<html></html>", 'html.parser')
+
+        with patch('stage5.stage5.extract_article_content', return_value=(None, None)) as mock_extract, \
+                patch('os.makedirs'):
+            stage5.crawl_serially(2, "News", first_page=first_page)
+
+        mock_get_soup.assert_called_once_with(f"{stage5.TARGET_URL}2", parse_only=stage5.LISTING_STRAINER)
+        self.assertEqual(mock_extract.call_count, 2)
+
     def test_get_news_article_links_no_matching_type(self):
         """Test extraction when no articles with matching type are present."""
         soup = BeautifulSoup(self.sample_article_list_html, 'html.parser')
@@ -140,7 +196,7 @@ class TestStage5(unittest.TestCase):
     
 
     
-    @patch('stage5.get_soup')
+    @patch('stage5.stage5.get_soup')
     def test_extract_article_content_article_body(self, mock_get_soup):
         """Test article content extraction with article__body class."""
         mock_soup = BeautifulSoup(self.sample_article_html, 'html.parser')
@@ -152,7 +208,7 @@ class TestStage5(unittest.TestCase):
         expected_content = "First paragraph of the article content.\nSecond paragraph of the article content."
         self.assertEqual(content, expected_content)
     
-    @patch('stage5.get_soup')
+    @patch('stage5.stage5.get_soup')
     def test_extract_article_content_c_article_body(self, mock_get_soup):
         """Test article content extraction with c-article-body class."""
         mock_soup = BeautifulSoup(self.sample_article_html_alternative, 'html.parser')
@@ -164,7 +220,7 @@ class TestStage5(unittest.TestCase):
         expected_content = "First paragraph using alternative class.\nSecond paragraph using alternative class."
         self.assertEqual(content, expected_content)
     
-    @patch('stage5.get_soup')
+    @patch('stage5.stage5.get_soup')
     def test_extract_article_content_no_body_div(self, mock_get_soup):
         """Test article content extraction with no body div class."""
         mock_soup = BeautifulSoup(self.sample_article_html_no_body_div, 'html.parser')
@@ -177,7 +233,7 @@ class TestStage5(unittest.TestCase):
         expected_content = "First paragraph without body div.\nSecond paragraph without body div."
         self.assertEqual(content, expected_content)
     
-    @patch('stage5.get_soup')
+    @patch('stage5.stage5.get_soup')
     def test_extract_article_content_no_title(self, mock_get_soup):
         """Test article content extraction with no title."""
         html_no_title = "<html><body><p>Content</p></body></html>"
@@ -203,14 +259,14 @@ class TestStage5(unittest.TestCase):
         mock_file().write.assert_called_once_with(test_content.encode('utf-8'))
     
     @patch('os.makedirs')
-    @patch('stage5.save_article')
-    @patch('stage5.extract_article_content')
-    @patch('stage5.get_news_article_links')
-    @patch('stage5.get_all_article_types')
-    @patch('stage5.get_soup')
+    @patch('stage5.stage5.save_article')
+    @patch('stage5.stage5.extract_article_content')
+    @patch('stage5.stage5.get_news_article_links')
+    @patch('stage5.stage5.get_all_article_types')
+    @patch('stage5.stage5.get_listing')
     @patch('builtins.input')
     @patch('builtins.print')
-    def test_main_function_success(self, mock_print, mock_input, mock_get_soup, 
+    def test_main_function_success(self, mock_print, mock_input, mock_get_listing, 
                                   mock_get_types, mock_get_links, mock_extract_content, 
                                   mock_save_article, mock_makedirs):
         """Test the main function execution."""
@@ -219,7 +275,7 @@ class TestStage5(unittest.TestCase):
         
         # Mock soup and article types
         mock_soup = Mock()
-        mock_get_soup.return_value = mock_soup
+        mock_get_listing.return_value = mock_soup
         mock_get_types.return_value = {"News", "Research"}
         
         # Mock article links for two pages
@@ -238,6 +294,10 @@ class TestStage5(unittest.TestCase):
         # Call main function
         stage5.main()
         
+        # Page 1 is fetched once and reused for the crawl
+        mock_get_listing.assert_has_calls([call(1), call(2)])
+        self.assertEqual(mock_get_listing.call_count, 2)
+
         # Verify the number of pages input
         mock_input.assert_has_calls([
             call("Input number of pages to search:\n"),
@@ -258,15 +318,15 @@ class TestStage5(unittest.TestCase):
         mock_print.assert_any_call("Saved all articles.")
     
     @patch('os.makedirs')
-    @patch('stage5.save_article')
-    @patch('stage5.extract_article_content')
-    @patch('stage5.get_news_article_links')
-    @patch('stage5.get_all_article_types')
-    @patch('stage5.get_soup')
+    @patch('stage5.stage5.save_article')
+    @patch('stage5.stage5.extract_article_content')
+    @patch('stage5.stage5.get_news_article_links')
+    @patch('stage5.stage5.get_all_article_types')
+    @patch('stage5.stage5.get_listing')
     @patch('builtins.input')
     @patch('builtins.print')
     def test_main_function_invalid_input_then_valid(self, mock_print, mock_input, 
-                                                   mock_get_soup, mock_get_types, 
+                                                   mock_get_listing, mock_get_types, 
                                                    mock_get_links, mock_extract_content, 
                                                    mock_save_article, mock_makedirs):
         """Test main function with invalid input followed by valid input."""
@@ -275,7 +335,7 @@ class TestStage5(unittest.TestCase):
         
         # Mock other functions
         mock_soup = Mock()
-        mock_get_soup.return_value = mock_soup
+        mock_get_listing.return_value = mock_soup
         mock_get_types.return_value = {"News", "Research"}
         mock_get_links.return_value = ["https://www.nature.com/articles/test1"]
         mock_extract_content.return_value = ("article1.txt", "Content 1")
@@ -290,13 +350,13 @@ class TestStage5(unittest.TestCase):
         mock_save_article.assert_called_once()
     
     @patch('os.makedirs')
-    @patch('stage5.save_article')
-    @patch('stage5.extract_article_content')
-    @patch('stage5.get_news_article_links')
-    @patch('stage5.get_all_article_types')
-    @patch('stage5.get_soup')
+    @patch('stage5.stage5.save_article')
+    @patch('stage5.stage5.extract_article_content')
+    @patch('stage5.stage5.get_news_article_links')
+    @patch('stage5.stage5.get_all_article_types')
+    @patch('stage5.stage5.get_listing')
     @patch('builtins.input')
-    def test_main_function_no_articles(self, mock_input, mock_get_soup, mock_get_types, 
+    def test_main_function_no_articles(self, mock_input, mock_get_listing, mock_get_types, 
                                       mock_get_links, mock_extract_content, 
                                       mock_save_article, mock_makedirs):
         """Test main function when no articles match the criteria."""
@@ -305,7 +365,7 @@ class TestStage5(unittest.TestCase):
         
         # Mock other functions
         mock_soup = Mock()
-        mock_get_soup.return_value = mock_soup
+        mock_get_listing.return_value = mock_soup
         mock_get_types.return_value = {"News", "Research"}
         mock_get_links.return_value = []  # No matching articles
         
@@ -316,6 +376,129 @@ class TestStage5(unittest.TestCase):
         mock_extract_content.assert_not_called()
         mock_save_article.assert_not_called()
     
+    @patch('os.makedirs')
+    @patch('stage5.stage5.save_article')
+    @patch('stage5.stage5.extract_article_content')
+    @patch('stage5.stage5.get_news_article_links')
+    @patch('stage5.stage5.get_all_article_types')
+    @patch('stage5.stage5.get_listing')
+    @patch('builtins.input')
+    @patch('builtins.print')
+    def test_main_function_concurrent_keeps_order(self, mock_print, mock_input, mock_get_listing,
+                                                  mock_get_types, mock_get_links,
+                                                  mock_extract_content, mock_save_article,
+                                                  mock_makedirs):
+        """Test that concurrent mode saves the same files in the same order as serial mode."""
+        mock_input.side_effect = ["2", "News"]
+        mock_get_listing.side_effect = lambda page: f"{stage5.TARGET_URL}{page}"
+        mock_get_types.return_value = {"News"}
+        mock_get_links.side_effect = lambda soup, article_type: [
+            f"{soup}-a", f"{soup}-b", f"{soup}-c"
+        ]
+
+        # Earlier links finish later, so completion order is reversed
+        delays = {"a": 0.06, "b": 0.03, "c": 0.0}
+
+        def slow_extract(link):
+            time.sleep(delays[link[-1]])
+            return f"{link[-8:]}.txt", f"Content of {link}"
+
+        mock_extract_content.side_effect = slow_extract
+
+        stage5.main(workers=4, per_host=2)
+
+        saved = [c.args for c in mock_save_article.call_args_list]
+        expected = []
+        for page in (1, 2):
+            for suffix in "abc":
+                link = f"{stage5.TARGET_URL}{page}-{suffix}"
+                expected.append((f"{link[-8:]}.txt", f"Content of {link}", f"Page_{page}"))
+        self.assertEqual(saved, expected)
+        mock_makedirs.assert_has_calls([
+            call("Page_1", exist_ok=True),
+            call("Page_2", exist_ok=True)
+        ])
+        mock_print.assert_any_call("Saved all articles.")
+
+    @patch('stage5.stage5.get_news_article_links', return_value=[])
+    @patch('stage5.stage5.get_listing')
+    @patch('os.makedirs')
+    def test_crawl_concurrently_sets_per_host_limit(self, mock_makedirs, mock_get_listing,
+                                                    mock_get_links):
+        """Test that the per-host limit is applied to the shared HTTP client."""
+        client = stage5.http_client.HttpClient()
+        stage5.http_client.set_client(client)
+        self.addCleanup(stage5.http_client.set_client, None)
+
+        stage5.crawl_concurrently(3, "News", workers=4, per_host=3)
+
+        self.assertEqual(client.max_per_host, 3)
+        self.assertEqual(mock_get_listing.call_count, 3)
+        self.assertEqual(mock_makedirs.call_count, 3)
+
+    def test_parse_args(self):
+        """Test command line parsing of the concurrency options."""
+        args = stage5.parse_args([])
+        self.assertEqual(args.workers, 1)
+        self.assertEqual(args.per_host, stage5.DEFAULT_PER_HOST)
+
+        args = stage5.parse_args(["--workers", "16", "--per-host", "2"])
+        self.assertEqual(args.workers, 16)
+        self.assertEqual(args.per_host, 2)
+
+    @patch('builtins.print')
+    def test_parse_args_cache_options(self, mock_print):
+        """Test the HTTP cache options and that --cache-only needs a cache directory."""
+        args = stage5.parse_args(["--cache-dir", "cache", "--cache-max-mb", "64", "--cache-only"])
+        self.assertEqual((args.cache_dir, args.cache_max_mb, args.cache_only), ("cache", 64, True))
+
+        with patch('sys.stderr'), self.assertRaises(SystemExit):
+            stage5.parse_args(["--cache-only"])
+        with patch('sys.stderr'), self.assertRaises(SystemExit):
+            stage5.parse_args(["--cache-dir", "cache", "--cache-only", "--async"])
+
+    def test_parse_args_throttling_options(self):
+        """Test the rate limit and retry options."""
+        args = stage5.parse_args([])
+        self.assertEqual((args.rate, args.max_retries), (stage5.DEFAULT_RATE, stage5.DEFAULT_MAX_RETRIES))
+
+        args = stage5.parse_args(["--rate", "2.5", "--max-retries", "0"])
+        self.assertEqual((args.rate, args.max_retries), (2.5, 0))
+
+    def test_parse_args_parse_workers(self):
+        """Test that --parse-workers defaults to off and to one process per core without a value."""
+        self.assertEqual(stage5.parse_args([]).parse_workers, 0)
+        self.assertEqual(stage5.parse_args(["--parse-workers", "3"]).parse_workers, 3)
+        self.assertEqual(stage5.parse_args(["--parse-workers"]).parse_workers, os.cpu_count() or 1)
+
+    def test_configure_throttling(self):
+        """Test that configure_throttling sets up (or disables) the shared client's throttling."""
+        client = stage5.http_client.HttpClient()
+        stage5.http_client.set_client(client)
+        self.addCleanup(stage5.http_client.set_client, None)
+
+        stage5.configure_throttling(3.0, 5)
+        self.assertEqual(client.rate_limiter.rate, 3.0)
+        self.assertEqual(client.retry.max_retries, 5)
+
+        stage5.configure_throttling(0, 0)
+        self.assertIsNone(client.rate_limiter)
+        self.assertIsNone(client.retry)
+
+    def test_configure_cache_attaches_cache_to_shared_client(self):
+        """Test that configure_cache makes get_soup go through the response cache."""
+        client = stage5.http_client.HttpClient()
+        stage5.http_client.set_client(client)
+        self.addCleanup(stage5.http_client.set_client, None)
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = stage5.configure_cache(cache_dir, 1, cache_only=True)
+            self.addCleanup(cache.close)
+            self.assertIs(client.cache, cache)
+            self.assertEqual(cache.max_bytes, 2 ** 20)
+            with self.assertRaises(stage5.http_client.CacheMissError):
+                stage5.get_soup("https://www.nature.com/articles/not-cached")
+
     def test_constants_defined(self):
         """Test that all constants are properly defined."""
         self.assertEqual(stage5.BASE_URL, "https://www.nature.com")
@@ -324,5 +507,1024 @@ class TestStage5(unittest.TestCase):
         self.assertEqual(stage5.HEADERS['Accept-Language'], 'en-US,en;q=0.5')
 
 
+def listing_page(*articles):
+    """Build a listing page from (type, href) pairs."""
+    items = "".join(
+        f'<article><span data-test="article.type">{article_type}</span>'
+        f'<a data-track-action="view article" href="{href}">{href}</a></article>'
+        for article_type, href in articles
+    )
+    return f"<html><body>{items}</body></html>"
+
+
+def article_page(title, *paragraphs):
+    """Build an article page with a c-article-body container."""
+    body = "".join(f"<p>{p}</p>" for p in paragraphs)
+    return f'<html><body><h1>{title} | Nature</h1><div class="c-article-body">{body}</div></body></html>'
+
+
+class LocalSiteTestCase(unittest.TestCase):
+    """Runs crawls against a local stand-in site from a temporary working directory."""
+
+    def setUp(self):
+        """Serve three listing pages and their articles from a local server, fetched
+        through a fresh shared HTTP client."""
+        self.server = LocalServer({
+            '/nature/articles?page=1': listing_page(("News", "/articles/a1"),
+                                                    ("Research", "/articles/r1"),
+                                                    ("News", "/articles/a2")),
+            '/nature/articles?page=2': listing_page(("News", "/articles/a3")),
+            '/nature/articles?page=3': listing_page(("Research", "/articles/r2")),
+            '/articles/a1': article_page("First story", "One", "Two"),
+            '/articles/a2': article_page("Second story", "Three"),
+            '/articles/a3': article_page("Third story", "Four"),
+        }).start()
+        self.addCleanup(self.server.stop)
+        stage5.http_client.set_client(stage5.http_client.HttpClient())
+        self.addCleanup(stage5.http_client.set_client, None)
+
+        for name, value in (('BASE_URL', self.server.base_url),
+                            ('TARGET_URL', self.server.url('/nature/articles?page='))):
+            patcher = patch.object(stage5, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.workdir.cleanup)
+        cwd = os.getcwd()
+        os.chdir(self.workdir.name)
+        self.addCleanup(os.chdir, cwd)
+
+    def read(self, *parts):
+        with open(os.path.join(*parts), encoding='utf-8') as file:
+            return file.read()
+
+
+@unittest.skipUnless(aiohttp, "aiohttp is not installed")
+class TestStage5AsyncCrawl(LocalSiteTestCase):
+
+    def test_crawl_saves_articles_into_page_folders(self):
+        """Test that the async crawl fetches each article once and saves it per page."""
+        saved = asyncio.run(stage5.crawl(3, "News", workers=4, per_host=2, queue_size=1))
+
+        self.assertEqual(saved, [
+            os.path.join("Page_1", "First_story.txt"),
+            os.path.join("Page_1", "Second_story.txt"),
+            os.path.join("Page_2", "Third_story.txt"),
+        ])
+        self.assertEqual(self.read("Page_1", "First_story.txt"), "One\nTwo")
+        self.assertEqual(self.read("Page_2", "Third_story.txt"), "Four")
+        self.assertTrue(os.path.isdir("Page_3"))
+        self.assertEqual(os.listdir("Page_3"), [])
+        self.assertEqual(self.server.hits['/articles/a1'], 1)
+        self.assertEqual(self.server.hits['/articles/r1'], 0)
+
+    def test_crawl_output_is_deterministic(self):
+        """Test that saved files keep link order even when early articles are slow."""
+        self.server.routes['/articles/a1'] = lambda handler: (
+            time.sleep(0.1) or (200, {}, article_page("First story", "One"))
+        )
+
+        saved = asyncio.run(stage5.crawl(2, "News", workers=3, listing_workers=2))
+
+        self.assertEqual(saved, [
+            os.path.join("Page_1", "First_story.txt"),
+            os.path.join("Page_1", "Second_story.txt"),
+            os.path.join("Page_2", "Third_story.txt"),
+        ])
+
+    def test_wrong_charset_is_decoded_with_replacement(self):
+        """Test that a page whose bytes don't match its declared charset is saved like the blocking crawl does."""
+        self.server.routes['/articles/a3'] = (200, {'Content-Type': 'text/html; charset=ascii'},
+                                              article_page("Third story", "caf\u00e9").encode('utf-8'))
+
+        asyncio.run(stage5.crawl(2, "News", workers=2))
+        async_text = self.read("Page_2", "Third_story.txt")
+        stage5.crawl_serially(2, "News")
+
+        self.assertEqual(async_text, "caf\ufffd\ufffd")
+        self.assertEqual(self.read("Page_2", "Third_story.txt"), async_text)
+
+    def test_crawl_http_error_propagates(self):
+        """Test that an HTTP error aborts the crawl instead of hanging."""
+        with self.assertRaises(aiohttp.ClientResponseError):
+            asyncio.run(asyncio.wait_for(stage5.crawl(5, "News", workers=2), timeout=10))
+
+    @patch('stage5.stage5.crawl')
+    @patch('builtins.input')
+    @patch('stage5.stage5.get_all_article_types', return_value={"News"})
+    @patch('stage5.stage5.get_listing')
+    @patch('builtins.print')
+    def test_main_uses_async_engine(self, mock_print, mock_get_listing, mock_get_types,
+                                    mock_input, mock_crawl):
+        """Test that main() runs the async engine when requested."""
+        mock_input.side_effect = ["2", "News"]
+
+        async def fake_crawl(*args, **kwargs):
+            return []
+
+        mock_crawl.side_effect = fake_crawl
+
+        stage5.main(workers=8, per_host=2, use_async=True)
+
+        mock_crawl.assert_called_once_with(2, "News", 8, 2,
+                                           first_page=mock_get_listing.return_value,
+                                           manifest=None, parse_workers=0, sink=None,
+                                           file_writer=None, checkpoint=None)
+        mock_print.assert_any_call("Saved all articles.")
+
+
+class TestStage5IncrementalCrawl(LocalSiteTestCase):
+
+    def open_manifest(self):
+        manifest = Manifest(stage5.DEFAULT_MANIFEST)
+        self.addCleanup(manifest.close)
+        return manifest
+
+    def article_hits(self):
+        return sum(count for path, count in self.server.hits.items() if path.startswith('/articles/'))
+
+    def test_second_run_fetches_nothing_and_stops_paginating(self):
+        """Test that a re-run skips known articles and stops at the first fully known page."""
+        stage5.crawl_serially(2, "News", manifest=self.open_manifest())
+        self.assertEqual(self.article_hits(), 3)
+        self.server.reset_counters()
+
+        stage5.crawl_serially(2, "News", manifest=self.open_manifest())
+
+        self.assertEqual(self.article_hits(), 0)
+        self.assertEqual(self.server.hits['/nature/articles?page=1'], 1)
+        self.assertEqual(self.server.hits['/nature/articles?page=2'], 0)
+
+    def test_only_new_articles_are_fetched(self):
+        """Test that only articles missing from the manifest are downloaded."""
+        stage5.crawl_serially(2, "News", manifest=self.open_manifest())
+        self.server.routes['/nature/articles?page=1'] = listing_page(
+            ("News", "/articles/new"), ("News", "/articles/a1"), ("News", "/articles/a2"))
+        self.server.routes['/articles/new'] = article_page("Brand new", "Fresh")
+        self.server.reset_counters()
+
+        stage5.crawl_serially(2, "News", manifest=self.open_manifest())
+
+        self.assertEqual(self.server.hits['/articles/new'], 1)
+        self.assertEqual(self.article_hits(), 1)
+        self.assertEqual(self.read("Page_1", "Brand_new.txt"), "Fresh")
+        # page 2 holds only known articles, so pagination stops there
+        self.assertEqual(self.server.hits['/nature/articles?page=2'], 1)
+
+    def test_deleted_file_is_fetched_again(self):
+        """Test that a manifest entry whose file is gone counts as unknown."""
+        stage5.crawl_serially(1, "News", manifest=self.open_manifest())
+        os.remove(os.path.join("Page_1", "First_story.txt"))
+        self.server.reset_counters()
+
+        stage5.crawl_serially(1, "News", manifest=self.open_manifest())
+
+        self.assertEqual(self.server.hits['/articles/a1'], 1)
+        self.assertEqual(self.read("Page_1", "First_story.txt"), "One\nTwo")
+
+    def test_unchanged_content_is_not_rewritten(self):
+        """Test that store_article skips the write when the content hash is unchanged."""
+        manifest = self.open_manifest()
+        os.makedirs("Page_1")
+
+        with patch('stage5.stage5.save_article', wraps=stage5.save_article) as mock_save:
+            self.assertTrue(stage5.store_article("u1", "a.txt", "Text", "Page_1", manifest))
+            self.assertFalse(stage5.store_article("u2", "a.txt", "Text", "Page_1", manifest))
+            self.assertTrue(stage5.store_article("u3", "a.txt", "Changed", "Page_1", manifest))
+
+        self.assertEqual(mock_save.call_count, 2)
+        self.assertEqual(self.read("Page_1", "a.txt"), "Changed")
+
+    def test_concurrent_crawl_is_incremental(self):
+        """Test that the threaded crawl also skips known articles."""
+        stage5.crawl_concurrently(2, "News", workers=4, manifest=self.open_manifest())
+        self.server.reset_counters()
+
+        stage5.crawl_concurrently(2, "News", workers=4, manifest=self.open_manifest())
+
+        self.assertEqual(self.article_hits(), 0)
+
+    @unittest.skipUnless(aiohttp, "aiohttp is not installed")
+    def test_async_crawl_is_incremental(self):
+        """Test that the async crawl also skips known articles."""
+        saved = asyncio.run(stage5.crawl(2, "News", workers=2, manifest=self.open_manifest()))
+        self.assertEqual(len(saved), 3)
+        self.server.reset_counters()
+
+        saved = asyncio.run(stage5.crawl(2, "News", workers=2, manifest=self.open_manifest()))
+
+        self.assertEqual(saved, [])
+        self.assertEqual(self.article_hits(), 0)
+
+
+class TestStage5Interrupt(LocalSiteTestCase):
+
+    def setUp(self):
+        """Serve five listing pages of four articles each."""
+        super().setUp()
+        for page in range(1, 6):
+            links = [f"/articles/p{page}-{n}" for n in range(4)]
+            self.server.routes[f'/nature/articles?page={page}'] = listing_page(*[("News", link)
+                                                                                 for link in links])
+            for link in links:
+                self.server.routes[link] = article_page(link, "Text")
+
+    def test_ctrl_c_stops_the_threaded_crawl(self):
+        """Test that an interrupt cancels the queued fetches instead of crawling every page first."""
+        extracted = []
+
+        def extract(link):
+            extracted.append(link)
+            if link.endswith('/p1-0'):
+                raise KeyboardInterrupt
+            return stage5.extract_article_content(link)
+
+        with patch('stage5.stage5.article_extractor', return_value=extract), self.assertRaises(KeyboardInterrupt):
+            stage5.crawl_concurrently(5, "News", workers=2)
+
+        # at most the articles of the page being stored and of the one after it
+        self.assertLessEqual(len(extracted), 8)
+        self.assertTrue(all(link.rsplit('/', 1)[1].startswith(('p1-', 'p2-')) for link in extracted))
+        self.assertEqual(self.server.hits['/nature/articles?page=4'], 0)
+
+
+class TestStage5ParsePool(LocalSiteTestCase):
+
+    def assert_saved(self):
+        self.assertEqual(sorted(os.listdir("Page_1")), ["First_story.txt", "Second_story.txt"])
+        self.assertEqual(self.read("Page_1", "First_story.txt"), "One\nTwo")
+        self.assertEqual(self.read("Page_2", "Third_story.txt"), "Four")
+
+    def test_parse_article_html_matches_extract_article_content(self):
+        """Test that parsing fetched HTML gives the same record as the in-thread path."""
+        url = self.server.url('/articles/a1')
+        self.assertEqual(stage5.parse_article_html(stage5.fetch_article_html(url)),
+                         stage5.extract_article_content(url))
+
+    def test_concurrent_crawl_with_parse_processes(self):
+        """Test the threaded crawl handing article pages to worker processes."""
+        self.addCleanup(setattr, stage5, 'RULES', stage5.RULES)
+        stage5.set_rules(stage5.DEFAULT_RULES)
+        stage5.crawl_concurrently(2, "News", workers=2, parse_workers=2)
+
+        self.assert_saved()
+        # the workers' rule hits are counted in this process
+        self.assertEqual(sum(stage5.RULES.hits[urlsplit(self.server.url()).netloc].values()), 3)
+
+    @unittest.skipUnless(aiohttp, "aiohttp is not installed")
+    def test_async_crawl_with_parse_processes(self):
+        """Test the async crawl handing article pages to worker processes."""
+        self.addCleanup(setattr, stage5, 'RULES', stage5.RULES)
+        stage5.set_rules(stage5.DEFAULT_RULES)
+        saved = asyncio.run(stage5.crawl(2, "News", workers=2, parse_workers=2))
+
+        self.assertEqual(len(saved), 3)
+        self.assert_saved()
+        self.assertEqual(sum(stage5.RULES.hits[urlsplit(self.server.url()).netloc].values()), 3)
+
+    def test_parse_pool_workers_use_selected_backend(self):
+        """Test that worker processes are spawned and initialised with this process's backend and rules."""
+        with patch('stage5.stage5.ProcessPoolExecutor') as mock_pool:
+            stage5.make_parse_pool(3)
+
+        mock_pool.assert_called_once_with(max_workers=3, initializer=stage5.init_parse_worker,
+                                          initargs=(stage5.parsing.get_backend(), stage5.RULES.spec),
+                                          mp_context=ANY)
+        self.assertEqual(mock_pool.call_args.kwargs['mp_context'].get_start_method(), 'spawn')
+
+
+class TestStage5FailedArticles(LocalSiteTestCase):
+
+    def setUp(self):
+        """Make one article fail a few times and another one for good."""
+        super().setUp()
+        calls = []
+
+        def flaky(handler):
+            calls.append(handler.path)
+            if len(calls) <= 2:
+                return 503, {}, b'busy'
+            return article_page("First story", "One", "Two")
+
+        self.server.routes['/articles/a1'] = flaky
+        del self.server.routes['/articles/a2']
+        # article fetches are sent once; the crawl's retry queue retries them
+        stage5.http_client.set_client(stage5.http_client.HttpClient(
+            retry=RetryPolicy(max_retries=2, backoff=0.001)))
+
+    def assert_crawl_finished(self, mock_print):
+        self.assertEqual(self.read("Page_1", "First_story.txt"), "One\nTwo")
+        self.assertEqual(self.read("Page_2", "Third_story.txt"), "Four")
+        self.assertEqual(self.server.hits['/articles/a1'], 3)
+        self.assertEqual(self.server.hits['/articles/a2'], 1)
+        printed = [args[0] for args, _ in mock_print.call_args_list]
+        self.assertEqual(len(printed), 1)
+        self.assertIn(self.server.url('/articles/a2'), printed[0])
+
+    @patch('builtins.print')
+    def test_serial_crawl_retries_and_skips_failures(self, mock_print):
+        """Test that the serial crawl defers the flaky article and reports the missing one."""
+        failed = stage5.crawl_serially(2, "News")
+
+        self.assert_crawl_finished(mock_print)
+        self.assertEqual([item for item, _ in failed], [(1, self.server.url('/articles/a2'))])
+
+    @patch('builtins.print')
+    def test_retries_disabled_fetch_each_article_once(self, mock_print):
+        """Test that with --max-retries 0 neither the client nor the retry queue tries again."""
+        stage5.configure_throttling(0, 0)
+
+        failed = stage5.crawl_serially(2, "News")
+
+        self.assertEqual(self.server.hits['/articles/a1'], 1)
+        self.assertEqual([item for item, _ in failed], [(1, self.server.url('/articles/a1')),
+                                                        (1, self.server.url('/articles/a2'))])
+
+    @patch('builtins.print')
+    def test_concurrent_crawl_retries_and_skips_failures(self, mock_print):
+        """Test that the threaded crawl defers the flaky article and reports the missing one."""
+        stage5.crawl_concurrently(2, "News", workers=4)
+
+        self.assert_crawl_finished(mock_print)
+
+    @unittest.skipUnless(aiohttp, "aiohttp is not installed")
+    @patch('builtins.print')
+    def test_async_crawl_retries_and_skips_failures(self, mock_print):
+        """Test that the async crawl retries the flaky article and reports the missing one."""
+        stage5.http_client.get_client().retry = RetryPolicy(max_retries=2, backoff=0.001)
+
+        saved = asyncio.run(stage5.crawl(2, "News", workers=2))
+
+        self.assertEqual(saved, [os.path.join("Page_1", "First_story.txt"),
+                                 os.path.join("Page_2", "Third_story.txt")])
+        self.assert_crawl_finished(mock_print)
+
+    @patch('builtins.print')
+    def test_frontier_crawl_retries_and_skips_failures(self, mock_print):
+        """Test that the frontier crawl leases the flaky article again and fails the missing one."""
+        frontier = MemoryFrontier()
+
+        failed = stage5.crawl_frontier(frontier, 2, "News", workers=2, poll_interval=0.01)
+
+        self.assert_crawl_finished(mock_print)
+        self.assertEqual([item for item, _ in failed], [(1, self.server.url('/articles/a2'))])
+        self.assertEqual(frontier.counts(), {'queued': 0, 'leased': 0, 'done': 4, 'failed': 1})
+
+
+class TestStage5Sinks(LocalSiteTestCase):
+
+    def read_records(self):
+        with open("articles.jsonl", encoding='utf-8') as file:
+            return [json.loads(line) for line in file]
+
+    def assert_records(self, key=None):
+        records = sorted(self.read_records(), key=key) if key else self.read_records()
+        self.assertEqual([(r['url'], r['title'], r['type'], r['page'], r['text']) for r in records], [
+            (self.server.url('/articles/a1'), '/articles/a1', 'News', 1, "One\nTwo"),
+            (self.server.url('/articles/a2'), '/articles/a2', 'News', 1, "Three"),
+            (self.server.url('/articles/a3'), '/articles/a3', 'News', 2, "Four"),
+        ])
+        self.assertEqual(sorted(os.listdir('.')), ["articles.jsonl"])
+
+    def test_serial_crawl_writes_records(self):
+        """Test that articles go to the sink, with their listing title, instead of .txt files."""
+        with open_sink('jsonl') as sink:
+            stage5.crawl_serially(3, "News", sink=sink)
+
+        self.assert_records()
+
+    def test_concurrent_crawl_writes_records(self):
+        """Test that the threaded crawl writes the same records in page order."""
+        with open_sink('jsonl') as sink:
+            stage5.crawl_concurrently(3, "News", workers=4, sink=sink)
+
+        self.assert_records()
+
+    @unittest.skipUnless(aiohttp, "aiohttp is not installed")
+    def test_async_crawl_writes_records(self):
+        """Test that the async crawl writes the same records; pages are flushed as they complete."""
+        with open_sink('jsonl') as sink:
+            saved = asyncio.run(stage5.crawl(3, "News", workers=2, sink=sink))
+
+        self.assertEqual(saved, [self.server.url(f'/articles/{name}') for name in ('a1', 'a2', 'a3')])
+        self.assert_records(key=lambda record: (record['page'], record['url']))
+
+    @unittest.skipUnless(sinks.pyarrow, "pyarrow is not installed")
+    def test_incremental_parquet_run_is_rejected(self):
+        """Test that a second, incremental run can't truncate a parquet file the manifest points at."""
+        with Manifest("manifest.jsonl") as manifest, open_sink('parquet') as sink:
+            stage5.crawl_serially(3, "News", manifest=manifest, sink=sink)
+
+        with patch('sys.stderr'), self.assertRaises(SystemExit):
+            stage5.parse_args(['--incremental', '--sink', 'parquet', '--pages', '2'])
+
+        self.assertEqual(len(list(sinks.read_records('parquet', 'articles.parquet'))), 3)
+
+    def test_incremental_crawl_records_sink_in_manifest(self):
+        """Test that the manifest points at the sink, so a re-run skips stored articles."""
+        with Manifest("manifest.jsonl") as manifest, open_sink('jsonl') as sink:
+            stage5.crawl_serially(3, "News", manifest=manifest, sink=sink)
+        with Manifest("manifest.jsonl") as manifest, open_sink('jsonl') as sink:
+            stage5.crawl_serially(3, "News", manifest=manifest, sink=sink)
+
+        self.assertEqual(len(self.read_records()), 3)
+        with Manifest("manifest.jsonl") as manifest:
+            self.assertEqual({entry['path'] for entry in manifest.entries.values()}, {"articles.jsonl"})
+
+    def test_parse_args_sink(self):
+        """Test the --sink and --output options."""
+        self.assertEqual(stage5.parse_args([]).sink, 'txt')
+        args = stage5.parse_args(['--sink', 'sqlite', '--output', 'out/articles.db'])
+        self.assertEqual((args.sink, args.output), ('sqlite', 'out/articles.db'))
+
+
+class TestStage5BackgroundWriter(LocalSiteTestCase):
+
+    def setUp(self):
+        """Save articles through a background writer."""
+        super().setUp()
+        self.file_writer = BackgroundWriter(batch_size=2)
+        self.addCleanup(self.file_writer.close)
+
+    def assert_saved(self):
+        self.assertEqual(self.read("Page_1", "First_story.txt"), "One\nTwo")
+        self.assertEqual(self.read("Page_1", "Second_story.txt"), "Three")
+        self.assertEqual(self.read("Page_2", "Third_story.txt"), "Four")
+        self.assertEqual(self.file_writer.files, 3)
+
+    def test_serial_crawl_writes_in_background(self):
+        """Test that the crawl returns only after the writer has flushed its files."""
+        stage5.crawl_serially(3, "News", file_writer=self.file_writer)
+
+        self.assert_saved()
+        self.assertTrue(os.path.isdir("Page_3"))
+
+    def test_concurrent_crawl_records_manifest_after_write(self):
+        """Test that the manifest gets its records once the files exist, and re-runs skip them."""
+        with Manifest("manifest.jsonl") as manifest:
+            stage5.crawl_concurrently(3, "News", workers=4, manifest=manifest,
+                                      file_writer=self.file_writer)
+            self.assertEqual(len(manifest), 3)
+        self.assert_saved()
+
+        with Manifest("manifest.jsonl") as manifest:
+            stage5.crawl_concurrently(3, "News", workers=4, manifest=manifest,
+                                      file_writer=self.file_writer)
+        self.assertEqual(self.file_writer.files, 3)
+
+    @unittest.skipUnless(aiohttp, "aiohttp is not installed")
+    def test_async_crawl_writes_in_background(self):
+        """Test that the async crawl hands its pages to the writer."""
+        saved = asyncio.run(stage5.crawl(3, "News", workers=2, file_writer=self.file_writer))
+
+        self.assertEqual(len(saved), 3)
+        self.assert_saved()
+
+    def test_parse_args_write_batch(self):
+        """Test that --fsync needs --write-batch."""
+        args = stage5.parse_args(['--write-batch', '32', '--fsync'])
+        self.assertEqual((args.write_batch, args.fsync), (32, True))
+        with patch('sys.stderr'), self.assertRaises(SystemExit):
+            stage5.parse_args(['--fsync'])
+
+
+class TestStage5Checkpoint(LocalSiteTestCase):
+
+    def open_checkpoint(self, resume=False):
+        checkpoint = Checkpoint(stage5.DEFAULT_CHECKPOINT, resume=resume)
+        self.addCleanup(checkpoint.close)
+        return checkpoint
+
+    def interrupted_crawl(self, manifest=None):
+        """Crawl three pages, stopping with Ctrl-C while page 2's article is fetched."""
+        extract = stage5.extract_article_content
+
+        def interrupt_at_a3(link):
+            if link.endswith('/articles/a3'):
+                raise KeyboardInterrupt
+            return extract(link)
+
+        checkpoint = Checkpoint(stage5.DEFAULT_CHECKPOINT)
+        checkpoint.start(3, "News")
+        with patch('stage5.stage5.extract_article_content', side_effect=interrupt_at_a3), \
+                self.assertRaises(KeyboardInterrupt):
+            stage5.crawl_serially(3, "News", manifest=manifest, checkpoint=checkpoint)
+        checkpoint.close()
+        self.server.reset_counters()
+
+    def assert_resumed(self):
+        # only the unfinished listing page and the article in flight are fetched
+        self.assertEqual(self.server.hits['/nature/articles?page=1'], 0)
+        self.assertEqual(self.server.hits['/nature/articles?page=2'], 0)
+        self.assertEqual(self.server.hits['/nature/articles?page=3'], 1)
+        self.assertEqual(self.server.hits['/articles/a1'], 0)
+        self.assertEqual(self.server.hits['/articles/a2'], 0)
+        self.assertEqual(self.server.hits['/articles/a3'], 1)
+        self.assertEqual(self.read("Page_2", "Third_story.txt"), "Four")
+        self.assertTrue(self.open_checkpoint(resume=True).finished)
+
+    def test_serial_crawl_resumes(self):
+        """Test that a resumed crawl skips listed pages and saved articles."""
+        self.interrupted_crawl()
+
+        stage5.crawl_serially(3, "News", checkpoint=self.open_checkpoint(resume=True))
+
+        self.assert_resumed()
+        self.assertEqual(self.read("Page_1", "First_story.txt"), "One\nTwo")
+
+    def test_concurrent_crawl_resumes(self):
+        """Test that the threaded crawl resumes from the same checkpoint."""
+        self.interrupted_crawl()
+
+        stage5.crawl_concurrently(3, "News", workers=4, checkpoint=self.open_checkpoint(resume=True))
+
+        self.assert_resumed()
+
+    @unittest.skipUnless(aiohttp, "aiohttp is not installed")
+    def test_async_crawl_resumes(self):
+        """Test that the async crawl resumes from the same checkpoint."""
+        self.interrupted_crawl()
+
+        saved = asyncio.run(stage5.crawl(3, "News", workers=2, checkpoint=self.open_checkpoint(resume=True)))
+
+        self.assertEqual(saved, [os.path.join("Page_2", "Third_story.txt")])
+        self.assert_resumed()
+
+    def test_incremental_crawl_resumes_past_known_pages(self):
+        """Test that pages finished before the interruption do not end an incremental resume."""
+        with Manifest(stage5.DEFAULT_MANIFEST) as manifest:
+            self.interrupted_crawl(manifest)
+        with Manifest(stage5.DEFAULT_MANIFEST) as manifest:
+            stage5.crawl_serially(3, "News", manifest=manifest, checkpoint=self.open_checkpoint(resume=True))
+
+        self.assert_resumed()
+
+    @patch('stage5.stage5.crawl_serially')
+    @patch('stage5.stage5.get_listing')
+    @patch('builtins.input')
+    @patch('builtins.print')
+    def test_main_resumes_without_prompting(self, mock_print, mock_input, mock_get_listing,
+                                            mock_crawl_serially):
+        """Test that main takes the pages and type from the checkpoint."""
+        with Checkpoint(stage5.DEFAULT_CHECKPOINT) as checkpoint:
+            checkpoint.start(3, "News")
+        checkpoint = self.open_checkpoint(resume=True)
+
+        stage5.main(checkpoint=checkpoint)
+
+        mock_input.assert_not_called()
+        mock_get_listing.assert_not_called()
+        mock_crawl_serially.assert_called_once_with(3, "News", first_page=None, manifest=None,
+                                                    sink=None, file_writer=None, checkpoint=checkpoint)
+
+    def test_parse_args_checkpoint(self):
+        """Test that --resume uses the default checkpoint, and neither it nor --incremental continues a parquet file."""
+        self.assertIsNone(stage5.parse_args([]).checkpoint)
+        self.assertEqual(stage5.parse_args(['--resume']).checkpoint, stage5.DEFAULT_CHECKPOINT)
+        self.assertEqual(stage5.parse_args(['--checkpoint', 'run.jsonl']).checkpoint, 'run.jsonl')
+        for argv in (['--resume', '--sink', 'parquet'], ['--incremental', '--sink', 'parquet']):
+            with self.subTest(argv=argv), patch('sys.stderr'), self.assertRaises(SystemExit):
+                stage5.parse_args(argv)
+
+
+class TestStage5Metrics(LocalSiteTestCase):
+
+    def setUp(self):
+        """Record into a fresh registry."""
+        super().setUp()
+        self.registry = Metrics()
+        self.addCleanup(metrics.set_metrics, metrics.get_metrics())
+        metrics.set_metrics(self.registry)
+
+    def assert_phases(self, parses=6):
+        # three listing pages and three News articles
+        summary = self.registry.summary()
+        self.assertEqual(summary['fetch']['count'], 6)
+        self.assertEqual(summary['parse']['count'], parses)
+        self.assertEqual(summary['extract']['count'], 3)
+        self.assertEqual(summary['save']['count'], 3)
+        self.assertEqual(summary['save']['bytes'], len("One\nTwo") + len("Three") + len("Four"))
+        self.assertGreater(summary['fetch']['bytes'], 0)
+
+    def test_serial_crawl_records_phases(self):
+        """Test that fetch, parse, extract and save are counted per call."""
+        stage5.crawl_serially(3, "News")
+
+        self.assert_phases()
+        self.assertEqual(self.registry.summary()['ttfb']['count'], 6)
+
+    @unittest.skipUnless(aiohttp, "aiohttp is not installed")
+    def test_async_crawl_records_phases(self):
+        """Test that the async engine records the same phases."""
+        asyncio.run(stage5.crawl(3, "News", workers=2))
+
+        self.assert_phases()
+
+    @patch('builtins.input', side_effect=["1", "News"])
+    @patch('builtins.print')
+    def test_main_exports_summary(self, mock_print, mock_input):
+        """Test that main writes the JSON summary and the Prometheus text."""
+        stage5.main(metrics_path="metrics.json", prometheus_path="metrics.prom")
+
+        with open("metrics.json", encoding='utf-8') as file:
+            summary = json.load(file)
+        self.assertEqual(summary['save']['count'], 2)
+        self.assertEqual(set(summary['fetch']), {'count', 'errors', 'seconds', 'mean', 'p50', 'p90',
+                                                  'p99', 'max', 'bytes', 'bytes_per_second'})
+        self.assertIn('scraper_phase_seconds_count{phase="save"} 2', self.read("metrics.prom"))
+
+    @patch('builtins.input', side_effect=["1", "News"])
+    @patch('builtins.print')
+    def test_main_reports_rule_hits(self, mock_print, mock_input):
+        """Test that main ends with the body rules matched per site."""
+        self.addCleanup(setattr, stage5, 'RULES', stage5.RULES)
+        stage5.set_rules(stage5.DEFAULT_RULES)
+
+        stage5.main()
+
+        site = urlsplit(self.server.url()).netloc
+        mock_print.assert_any_call(f"Body rules on {site}: div.c-article-body 2")
+
+    def test_parse_args_metrics(self):
+        """Test that --metrics without a file prints the summary."""
+        self.assertIsNone(stage5.parse_args([]).metrics)
+        self.assertEqual(stage5.parse_args(['--metrics']).metrics, '-')
+        args = stage5.parse_args(['--metrics', 'm.json', '--prometheus', 'm.prom'])
+        self.assertEqual((args.metrics, args.prometheus), ('m.json', 'm.prom'))
+
+
+class TestStage5Frontier(LocalSiteTestCase):
+
+    def assert_fetched_once(self):
+        for path in ('/nature/articles?page=1', '/nature/articles?page=2', '/nature/articles?page=3',
+                     '/articles/a1', '/articles/a2', '/articles/a3'):
+            self.assertEqual(self.server.hits[path], 1, path)
+        self.assertEqual(self.read("Page_1", "First_story.txt"), "One\nTwo")
+        self.assertEqual(self.read("Page_1", "Second_story.txt"), "Three")
+        self.assertEqual(self.read("Page_2", "Third_story.txt"), "Four")
+
+    def crawl_in_parallel(self, frontiers, **kwargs):
+        """Run one crawl per frontier at once, like workers on separate hosts."""
+        with ThreadPoolExecutor(max_workers=len(frontiers)) as executor:
+            futures = [executor.submit(stage5.crawl_frontier, frontier, 3, "News", poll_interval=0.01, **kwargs)
+                       for frontier in frontiers]
+            return [future.result() for future in futures]
+
+    def test_threads_share_memory_frontier(self):
+        """Test that the worker threads of one crawl fetch every listing page and article once."""
+        frontier = MemoryFrontier()
+
+        self.assertEqual(stage5.crawl_frontier(frontier, 3, "News", workers=4, poll_interval=0.01), [])
+
+        self.assert_fetched_once()
+        self.assertEqual(frontier.counts()['done'], 6)
+
+    def test_workers_share_sqlite_frontier(self):
+        """Test that crawls with their own connections to one file split the work between them."""
+        frontiers = [SQLiteFrontier("frontier.sqlite3") for _ in range(3)]
+        for frontier in frontiers:
+            self.addCleanup(frontier.close)
+
+        self.crawl_in_parallel(frontiers, workers=2)
+
+        self.assert_fetched_once()
+
+    def test_workers_share_redis_frontier(self):
+        """Test that crawls on one Redis server (the local stand-in) split the work between them."""
+        server = LocalRedis()
+
+        self.crawl_in_parallel([RedisFrontier(server) for _ in range(3)], workers=2)
+
+        self.assert_fetched_once()
+
+    def test_finished_frontier_fetches_nothing(self):
+        """Test that a crawl against a frontier that is already done does not fetch again."""
+        with SQLiteFrontier("frontier.sqlite3") as frontier:
+            stage5.crawl_frontier(frontier, 3, "News")
+        self.server.reset_counters()
+
+        with SQLiteFrontier("frontier.sqlite3") as frontier:
+            stage5.crawl_frontier(frontier, 3, "News")
+
+        self.assertEqual(sum(self.server.hits.values()), 0)
+
+    def test_expired_lease_is_fetched_by_another_worker(self):
+        """Test that an article held by a worker that died is fetched once its lease runs out."""
+        frontier = MemoryFrontier(lease_seconds=0.05)
+        stage5.seed_frontier(frontier, 1)
+        frontier.push(self.server.url('/articles/a1'), priority=stage5.ARTICLE_PRIORITY,
+                      data={'page': 1, 'title': '/articles/a1'})
+        frontier.lease()
+
+        stage5.crawl_frontier(frontier, 1, "News", poll_interval=0.01)
+
+        self.assertEqual(self.read("Page_1", "First_story.txt"), "One\nTwo")
+        self.assertEqual(frontier.counts(), {'queued': 0, 'leased': 0, 'done': 3, 'failed': 0})
+
+    def test_frontier_crawl_writes_sink_records(self):
+        """Test that records keep the listing title when articles are leased separately."""
+        with open_sink('jsonl') as sink:
+            stage5.crawl_frontier(MemoryFrontier(), 3, "News", workers=2, sink=sink)
+
+        with open("articles.jsonl", encoding='utf-8') as file:
+            records = [json.loads(line) for line in file]
+        self.assertEqual(sorted((record['page'], record['title'], record['text']) for record in records),
+                         [(1, '/articles/a1', "One\nTwo"), (1, '/articles/a2', "Three"), (2, '/articles/a3', "Four")])
+
+    @patch('builtins.print')
+    def test_retries_disabled_fail_at_once(self, mock_print):
+        """Test that with --max-retries 0 a retryable error fails its URL instead of ending the crawl."""
+        stage5.configure_throttling(0, 0)
+        self.server.routes['/nature/articles?page=2'] = lambda handler: (503, {}, b'busy')
+        frontier = MemoryFrontier()
+
+        failed = stage5.crawl_frontier(frontier, 3, "News", workers=2, poll_interval=0.01)
+
+        self.assertEqual([item for item, _ in failed], [(2, self.server.url('/nature/articles?page=2'))])
+        self.assertEqual(self.server.hits['/nature/articles?page=2'], 1)
+        self.assertEqual(self.read("Page_1", "First_story.txt"), "One\nTwo")
+        self.assertEqual(frontier.counts(), {'queued': 0, 'leased': 0, 'done': 4, 'failed': 1})
+
+    @patch('stage5.stage5.crawl_frontier')
+    @patch('builtins.print')
+    def test_main_uses_frontier(self, mock_print, mock_crawl_frontier):
+        """Test that main hands the crawl to the frontier engine."""
+        frontier = MemoryFrontier()
+
+        stage5.main(workers=4, pages=3, article_type="News", frontier=frontier)
+
+        mock_crawl_frontier.assert_called_once_with(frontier, 3, "News", 4, stage5.DEFAULT_PER_HOST,
+                                                    first_page=None, manifest=None, parse_workers=0,
+                                                    sink=None, file_writer=None)
+
+    def test_parse_args_frontier(self):
+        """Test the --frontier and --lease options and what they can't be combined with."""
+        args = stage5.parse_args([])
+        self.assertEqual((args.frontier, args.lease), (None, stage5.DEFAULT_LEASE_SECONDS))
+        args = stage5.parse_args(['--frontier', 'redis://localhost:6379/0', '--lease', '30'])
+        self.assertEqual((args.frontier, args.lease), ('redis://localhost:6379/0', 30.0))
+        for option in (['--resume'], ['--async'], ['--pages', '4', '--shard', '1/2']):
+            with self.subTest(option=option), patch('sys.stderr'), self.assertRaises(SystemExit):
+                stage5.parse_args(['--frontier', 'frontier.sqlite3'] + option)
+
+
+class TestStage5BatchCli(LocalSiteTestCase):
+
+    def write_config(self, config):
+        with open("crawl.json", 'w', encoding='utf-8') as file:
+            json.dump(config, file)
+        return "crawl.json"
+
+    def assert_parse_error(self, argv):
+        with patch('sys.stderr'), self.assertRaises(SystemExit):
+            stage5.parse_args(argv)
+
+    def test_parse_args_pages_and_type(self):
+        """Test that --pages takes a count or a range, and --type and --year their values."""
+        args = stage5.parse_args([])
+        self.assertEqual((args.pages, args.article_type, args.year), (None, None, stage5.DEFAULT_YEAR))
+        self.assertEqual(stage5.parse_args(['--pages', '3']).pages, range(1, 4))
+        args = stage5.parse_args(['--pages', '4-6', '--type', 'News', '--year', '2021'])
+        self.assertEqual((args.pages, args.article_type, args.year), (range(4, 7), 'News', 2021))
+        for pages in ('x', '0', '0-2', '5-4', '1-'):
+            with self.subTest(pages=pages):
+                self.assert_parse_error(['--pages', pages])
+
+    def test_set_year_changes_listing_url(self):
+        """Test that --year selects the listing of that year."""
+        self.addCleanup(setattr, stage5, 'TARGET_URL', stage5.TARGET_URL)
+
+        stage5.set_year(2021)
+
+        self.assertEqual(stage5.TARGET_URL, "https://www.nature.com/nature/articles?sort=PubDate&year=2021&page=")
+
+    def test_shard_slices_pages_and_names_files(self):
+        """Test that --shard crawls its slice of the pages into files of its own."""
+        slices = [stage5.shard_pages(range(1, 11), shard, 3) for shard in (1, 2, 3)]
+        self.assertEqual([list(pages) for pages in slices], [[1, 2, 3], [4, 5, 6], [7, 8, 9, 10]])
+
+        args = stage5.parse_args(['--pages', '1-10', '--shard', '2/3', '--sink', 'sqlite',
+                                  '--checkpoint', 'run.jsonl'])
+
+        self.assertEqual(args.pages, range(4, 7))
+        self.assertEqual((args.output, args.manifest, args.checkpoint),
+                         ('articles.shard-2-of-3.sqlite3', 'manifest.shard-2-of-3.jsonl', 'run.shard-2-of-3.jsonl'))
+        self.assertIsNone(stage5.parse_args(['--pages', '2', '--shard', '1/2']).output)
+        for argv in (['--shard', '1/2'], ['--pages', '4', '--shard', '3/2'],
+                     ['--pages', '4', '--shard', 'one'], ['--pages', '4', '--shard', '1/2', '--merge', '2']):
+            with self.subTest(argv=argv):
+                self.assert_parse_error(argv)
+
+    def test_config_file_sets_defaults(self):
+        """Test that a --config file sets options, which the command line overrides."""
+        config = self.write_config({'pages': '2-3', 'type': 'News', '--workers': 4, 'sink': 'jsonl',
+                                    'per_host': 2, 'async': True, 'rate': 0.5, 'year': '2021'})
+
+        args = stage5.parse_args(['--config', config, '--workers', '8'])
+
+        self.assertEqual((args.pages, args.article_type, args.workers, args.sink, args.per_host, args.use_async),
+                         (range(2, 4), 'News', 8, 'jsonl', 2, True))
+        self.assertEqual((args.rate, args.year), (0.5, 2021))
+
+    def test_config_file_errors(self):
+        """Test that unknown options, bad values and unreadable files are rejected."""
+        for config in ({'colour': 'blue'}, {'sink': 'csv'}, {'pages': '0'}, {'pages': 0}, {'workers': 2.5},
+                       {'async': 'yes'}, {'cache-dir': 5}, {'help': True}, {'config': 'other.json'},
+                       ["--pages", "2"]):
+            with self.subTest(config=config):
+                self.assert_parse_error(['--config', self.write_config(config)])
+        self.assert_parse_error(['--config', 'missing.json'])
+
+    @patch('builtins.input')
+    @patch('builtins.print')
+    def test_main_with_pages_and_type_does_not_prompt(self, mock_print, mock_input):
+        """Test that a batch run asks nothing and crawls only the given pages."""
+        stage5.main(pages=range(2, 3), article_type="News")
+
+        mock_input.assert_not_called()
+        self.assertEqual(sorted(os.listdir('.')), ["Page_2"])
+        self.assertEqual(self.read("Page_2", "Third_story.txt"), "Four")
+        self.assertEqual(self.server.hits['/nature/articles?page=1'], 0)
+
+    @patch('builtins.input', return_value="Research")
+    @patch('builtins.print')
+    def test_main_lists_types_of_first_page_in_range(self, mock_print, mock_input):
+        """Test that type discovery uses the first page of the range, which is fetched once."""
+        stage5.main(pages=range(3, 4))
+
+        mock_print.assert_any_call("Available article types on page 3:")
+        mock_print.assert_any_call({"Research"})
+        self.assertEqual(self.server.hits['/nature/articles?page=3'], 1)
+
+    def test_checkpoint_records_page_range(self):
+        """Test that a resumed batch crawl keeps its page range."""
+        with Checkpoint(stage5.DEFAULT_CHECKPOINT) as checkpoint, patch('builtins.print'):
+            stage5.main(pages=range(2, 4), article_type="News", checkpoint=checkpoint)
+
+        with Checkpoint(stage5.DEFAULT_CHECKPOINT, resume=True) as checkpoint:
+            self.assertEqual(checkpoint.params['pages'], [2, 3])
+            self.assertEqual(stage5.page_range(checkpoint.params['pages']), range(2, 4))
+
+    @patch('builtins.print')
+    def test_sharded_crawl_merges_into_one_output(self, mock_print):
+        """Test that two shards of a crawl merge into the output and manifest of a single run."""
+        for shard in ('1/2', '2/2'):
+            args = stage5.parse_args(['--pages', '3', '--shard', shard, '--sink', 'jsonl', '--incremental'])
+            with Manifest(args.manifest) as manifest, open_sink(args.sink, args.output) as sink:
+                stage5.main(pages=args.pages, article_type="News", manifest=manifest, sink=sink)
+
+        targets = stage5.merge_shards(2, 'jsonl', manifest=stage5.DEFAULT_MANIFEST)
+
+        self.assertEqual(targets, ["articles.jsonl", stage5.DEFAULT_MANIFEST])
+        with open("articles.jsonl", encoding='utf-8') as file:
+            records = [json.loads(line) for line in file]
+        self.assertEqual([(record['page'], record['text']) for record in records],
+                         [(1, "One\nTwo"), (1, "Three"), (2, "Four")])
+        with Manifest(stage5.DEFAULT_MANIFEST) as manifest:
+            self.assertEqual(len(manifest), 3)
+        mock_print.assert_any_call("Merged 2 shards into articles.jsonl: 3 articles")
+        with self.assertRaises(FileExistsError):
+            stage5.merge_shards(2, 'jsonl')
+        with self.assertRaises(FileNotFoundError):
+            stage5.merge_shards(3, 'sqlite')
+
+
+class TestParserParity(unittest.TestCase):
+    """Every parser backend must produce exactly the same extraction output."""
+
+    def setUp(self):
+        """Collect fixture pages used across all backends."""
+        fixtures = TestStage5()
+        fixtures.setUp()
+        self.listing_pages = {
+            'sample_listing': fixtures.sample_article_list_html,
+            'rich_listing': RICH_LISTING_HTML,
+        }
+        self.article_pages = {
+            'article__body': fixtures.sample_article_html,
+            'c-article-body': fixtures.sample_article_html_alternative,
+            'no_body_div': fixtures.sample_article_html_no_body_div,
+            'rich_article': RICH_ARTICLE_HTML,
+            'no_title': "<html><body><p>Content</p></body></html>",
+        }
+        with open(SOURCE_HTML, encoding='utf-8') as file:
+            source_html = file.read()
+        self.listing_pages['stage3_source'] = source_html
+        self.article_pages['stage3_source'] = source_html
+        self.backends = [backend for backend in ('html.parser', 'lxml', parsing.LXML_FAST_PATH)
+                         if parsing.lxml_html is not None or backend == 'html.parser']
+
+    def assert_same_for_all_backends(self, pages, extract):
+        for name, html in pages.items():
+            reference = extract(parsing.parse_document(html, 'html.parser'))
+            for backend in self.backends:
+                with self.subTest(page=name, backend=backend):
+                    self.assertEqual(extract(parsing.parse_document(html, backend)), reference)
+
+    def test_article_types_parity(self):
+        """Test that article type discovery matches across backends."""
+        self.assert_same_for_all_backends(self.listing_pages, stage5.get_all_article_types)
+
+    def test_article_links_parity(self):
+        """Test that link extraction matches across backends for several types."""
+        for article_type in ("News", "News & Views", "Research"):
+            self.assert_same_for_all_backends(
+                self.listing_pages,
+                lambda document: stage5.get_news_article_links(document, article_type)
+            )
+
+    def test_article_content_parity(self):
+        """Test that title/body extraction matches across backends."""
+        self.assert_same_for_all_backends(self.article_pages, stage5.parse_article_content)
+
+    def test_strained_parsing_parity(self):
+        """Test that partial parsing with the strainers gives the same results as a full parse."""
+        for backend in ('html.parser', 'lxml'):
+            if backend == 'lxml' and parsing.lxml_html is None:
+                continue
+            for name, html in self.listing_pages.items():
+                full = parsing.parse_document(html, backend)
+                strained = parsing.parse_document(html, backend, parse_only=stage5.LISTING_STRAINER)
+                with self.subTest(page=name, backend=backend):
+                    self.assertEqual(stage5.get_all_article_types(strained),
+                                     stage5.get_all_article_types(full))
+                    self.assertEqual(stage5.get_news_article_links(strained, "News"),
+                                     stage5.get_news_article_links(full, "News"))
+            for name, html in self.article_pages.items():
+                full = parsing.parse_document(html, backend)
+                strained = parsing.parse_document(html, backend, parse_only=stage5.ARTICLE_STRAINER)
+                with self.subTest(page=name, backend=backend):
+                    self.assertEqual(stage5.parse_article_content(strained),
+                                     stage5.parse_article_content(full))
+
+    def test_article_strainer_drops_page_chrome(self):
+        """Test that the article strainer keeps only the title and body parts."""
+        html = ('<html><head><script>var x = 1;</script></head><body><nav><ul><li>Menu</li></ul></nav>'
+                '<h1>Title</h1><div class="c-article-body extra"><p>Body</p></div>'
+                '<div class="sidebar"><span>Ad</span></div></body></html>')
+        soup = parsing.parse_document(html, 'html.parser', parse_only=stage5.ARTICLE_STRAINER)
+
+        self.assertEqual([tag.name for tag in soup.find_all(True)], ['h1', 'div', 'p'])
+        self.assertIsNone(soup.find('script'))
+        self.assertIsNone(soup.find('nav'))
+
+    def test_listing_strainer_keeps_only_articles(self):
+        """Test that the listing strainer keeps only <article> subtrees."""
+        html = "<html><body><nav>Menu</nav>" + RICH_LISTING_HTML + "<footer>Foot</footer></body></html>"
+        soup = parsing.parse_document(html, 'html.parser', parse_only=stage5.LISTING_STRAINER)
+
+        self.assertEqual(len(soup.find_all('article', recursive=False)), 5)
+        self.assertIsNone(soup.find('nav'))
+        self.assertIsNone(soup.find('footer'))
+
+    def test_rich_article_expected_output(self):
+        """Test the reference output of the rich fixture, so parity is not vacuous."""
+        filename, content = stage5.parse_article_content(
+            parsing.parse_document(RICH_ARTICLE_HTML, 'html.parser'))
+
+        self.assertEqual(filename, "Caf\u00e9science_the_2023_\u201cbreakthrough\u201d.txt")
+        self.assertEqual(content.split("\n")[0], "Firstlinkedparagraph withboldtext.")
+        self.assertTrue(content.endswith("Unicode: \u03b1\u03b2\u03b3 \u2014 \u00fc\u00f1\u00ee\u00e7\u00f8d\u00e9"))
+        self.assertNotIn("Footer paragraph.", content)
+
+    def test_rules_file_adds_layout(self):
+        """Test that a new body layout only needs a rules file."""
+        html = '<h1>New layout</h1><p>Teaser</p><main class="story"><p>Body</p></main>'
+        self.addCleanup(setattr, stage5, 'RULES', stage5.RULES)
+        self.assertEqual(stage5.parse_article_html(html), ("New_layout.txt", "Teaser\nBody"))
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = os.path.join(tempdir, 'rules.json')
+            with open(path, 'w', encoding='utf-8') as file:
+                json.dump({'body': [{'tag': 'main', 'class': 'story'}]}, file)
+            stage5.configure_rules(path)
+
+        self.assertEqual(stage5.parse_article_html(html, 'example.com'), ("New_layout.txt", "Body"))
+        self.assertEqual(stage5.RULES.hits, {'example.com': {'main.story': 1}})
+
+    @unittest.skipUnless(parsing.lxml_html, "lxml is not installed")
+    def test_fast_path_returns_lxml_tree(self):
+        """Test that the lxml.html backend bypasses BeautifulSoup."""
+        document = parsing.parse_document(RICH_LISTING_HTML, parsing.LXML_FAST_PATH)
+
+        self.assertTrue(parsing.is_lxml_tree(document))
+        self.assertNotIsInstance(document, BeautifulSoup)
+
+    @unittest.skipUnless(parsing.lxml_html, "lxml is not installed")
+    @patch('stage5.stage5.http_client.get')
+    def test_get_soup_uses_configured_backend(self, mock_get):
+        """Test that get_soup parses with the backend selected in scraper.parsing."""
+        mock_get.return_value = Mock(text=RICH_LISTING_HTML)
+        backend = parsing.get_backend()
+        self.addCleanup(parsing.set_backend, backend)
+
+        parsing.set_backend(parsing.LXML_FAST_PATH)
+        self.assertTrue(parsing.is_lxml_tree(stage5.get_soup("https://test.com")))
+
+        parsing.set_backend('html.parser')
+        self.assertIsInstance(stage5.get_soup("https://test.com"), BeautifulSoup)
+
+
 if __name__ == '__main__':
     unittest.main()